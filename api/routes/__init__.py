@@ -1,4 +1,4 @@
-from . import marr_hildreth_routes, canny_routes, otsu_method_routes, watershed_routes, freeman_chain_routes, object_count_routes, box_filter_routes, segmentation_filter_routes
+from . import marr_hildreth_routes, canny_routes, otsu_method_routes, watershed_routes, freeman_chain_routes, object_count_routes, box_filter_routes, segmentation_filter_routes, pipeline_routes
 
 
 __all__ = [
@@ -9,5 +9,6 @@ __all__ = [
     "freeman_chain_routes",
     "object_count_routes",
     "box_filter_routes",
-    "segmentation_filter_routes"
+    "segmentation_filter_routes",
+    "pipeline_routes"
 ]
\ No newline at end of file
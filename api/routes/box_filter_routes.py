@@ -1,8 +1,8 @@
 from fastapi import APIRouter, File, UploadFile, Form
-from fastapi.responses import Response
+from fastapi.responses import Response, StreamingResponse
 from controllers.box_filter_controller import BoxFilterController
-import tempfile
-import os
+from controllers.batch_controller import BatchController
+from typing import List, Optional
 
 router = APIRouter(
     prefix="/box-filter",
@@ -13,6 +13,11 @@ router = APIRouter(
 async def box_filter_process(
     file: UploadFile = File(...),
     box_size: int = Form(3),  # Deixei o usuário escolher o tamanho da caixa
+    box_width: Optional[int] = Form(None),
+    box_height: Optional[int] = Form(None),
+    max_side: Optional[int] = Form(None, description="Downscale while decoding so the longest side fits this many pixels"),
+    output_format: str = Form("png", description="Encoding: 'png', 'png_bilevel', 'png_palette', 'webp' or 'npy'"),
+    compression_level: Optional[int] = Form(None, description="zlib level 0-9 for PNG/WebP (default: encoder default)"),
 ) -> Response:
     """
     Apply box filter (mean filter) to reduce noise in image.
@@ -23,22 +28,61 @@ async def box_filter_process(
     Parameters:
     - file: Input image
     - box_size: Size of the box kernel (must be odd, default: 3)
+    - box_width: Box width for non-square boxes (default: box_size)
+    - box_height: Box height for non-square boxes (default: box_size)
+    - max_side: Downscale the image while decoding so its longest side fits
+      this many pixels (JPEGs decode directly at 1/2, 1/4 or 1/8 scale)
+    - output_format: Response encoding (default: "png")
+        - "png": 8-bit grayscale PNG
+        - "png_bilevel": 1-bit PNG, pixels >= 128 become white (binary masks)
+        - "png_palette": palette PNG with only the gray levels present (1-4 bits for few levels)
+        - "webp": lossless WebP
+        - "npy": raw NumPy array (np.save)
+    - compression_level: zlib level 0-9 for PNG (0-1 are fastest), mapped to the
+      WebP effort; default keeps the encoder default
+    
+    The filter uses an integral image, so large boxes cost the same as small ones.
     
     Returns:
     - Smoothed image with reduced noise
     """
-    # Save uploaded file to a temporary location
-    with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(file.filename)[1]) as tmp:
-        content = await file.read()
-        tmp.write(content)
-        tmp_path = tmp.name
+    # Decode straight from the upload's spooled file, no temporary file round trip
+    return await BoxFilterController.process_image(
+        file.file,
+        box_size,
+        box_width,
+        box_height,
+        max_side,
+        output_format,
+        compression_level,
+    )
+
+
+@router.post("/batch", status_code=200)
+async def box_filter_batch(
+    files: List[UploadFile] = File(...),
+    box_size: int = Form(3),
+    box_width: Optional[int] = Form(None),
+    box_height: Optional[int] = Form(None),
+    max_side: Optional[int] = Form(None, description="Downscale while decoding so the longest side fits this many pixels"),
+    output_format: str = Form("png", description="Encoding: 'png', 'png_bilevel', 'png_palette', 'webp' or 'npy'"),
+    compression_level: Optional[int] = Form(None, description="zlib level 0-9 for PNG/WebP (default: encoder default)"),
+    archive: str = Form("zip", description="Response: 'zip' or 'multipart' (multipart/mixed)"),
+) -> StreamingResponse:
+    """
+    Box filter for many images in one request.
     
-    try:
-        return await BoxFilterController.process_image(
-            tmp_path,
-            box_size,
-        )
-    finally:
-        # Clean up the temporary file
-        if os.path.exists(tmp_path):
-            os.unlink(tmp_path)
\ No newline at end of file
+    Takes the same parameters as /process, applied to every file. Files are
+    processed concurrently and returned in completion order.
+    
+    Returns:
+    - Zip with one image entry per file plus manifest.json, or a
+      multipart/mixed body; failed files get a .error.json entry with
+      their status code and detail
+    """
+    return await BatchController.process_batch(
+        files,
+        lambda image_source: BoxFilterController.process_image(image_source, box_size, box_width, box_height, max_side, output_format, compression_level),
+        "box_filter",
+        archive,
+    )
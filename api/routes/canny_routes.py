@@ -1,9 +1,8 @@
 from fastapi import APIRouter, File, UploadFile, Form
-from fastapi.responses import Response
+from fastapi.responses import Response, StreamingResponse
 from controllers.canny_controller import CannyController
-from typing import Optional
-import tempfile
-import os
+from controllers.batch_controller import BatchController
+from typing import List, Optional
 
 
 router = APIRouter(
@@ -16,7 +15,11 @@ async def canny_process(
     file: UploadFile = File(...),
     sigma: float = Form(1.0),
     low_threshold: float = Form(0.1),
-    high_threshold: float = Form(0.3)
+    high_threshold: float = Form(0.3),
+    interpolate_nms: bool = Form(False),
+    max_side: Optional[int] = Form(None, description="Downscale while decoding so the longest side fits this many pixels"),
+    output_format: str = Form("png", description="Encoding: 'png', 'png_bilevel', 'png_palette', 'webp' or 'npy'"),
+    compression_level: Optional[int] = Form(None, description="zlib level 0-9 for PNG/WebP (default: encoder default)"),
 ) -> Response:
     """
     Detect edges using Canny algorithm.
@@ -29,21 +32,54 @@ async def canny_process(
     - sigma: Gaussian smoothing parameter (default: 1.0)
     - low_threshold: Lower threshold for hysteresis (0-1, default: 0.1)
     - high_threshold: Upper threshold for hysteresis (0-1, default: 0.3)
+    - interpolate_nms: Interpolate magnitudes along the exact gradient direction
+      during non-maximum suppression for cleaner edges (default: false)
+    - max_side: Downscale the image while decoding so its longest side fits
+      this many pixels (JPEGs decode directly at 1/2, 1/4 or 1/8 scale)
+    - output_format: Response encoding (default: "png")
+        - "png": 8-bit grayscale PNG
+        - "png_bilevel": 1-bit PNG, pixels >= 128 become white (binary masks)
+        - "png_palette": palette PNG with only the gray levels present (1-4 bits for few levels)
+        - "webp": lossless WebP
+        - "npy": raw NumPy array (np.save)
+    - compression_level: zlib level 0-9 for PNG (0-1 are fastest), mapped to the
+      WebP effort; default keeps the encoder default
     
     Returns:
     - Binary image with detected edges
     """
-    # Save uploaded file to a temporary location
-    with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(file.filename)[1]) as tmp:
-        content = await file.read()
-        tmp.write(content)
-        tmp_path = tmp.name
+    # Decode straight from the upload's spooled file, no temporary file round trip
+    return await CannyController.process_image_controller(
+        file.file, sigma, low_threshold, high_threshold, interpolate_nms, max_side, output_format, compression_level
+    )
+
+
+@router.post("/batch", status_code=200)
+async def canny_batch(
+    files: List[UploadFile] = File(...),
+    sigma: float = Form(1.0),
+    low_threshold: float = Form(0.1),
+    high_threshold: float = Form(0.3),
+    interpolate_nms: bool = Form(False),
+    max_side: Optional[int] = Form(None, description="Downscale while decoding so the longest side fits this many pixels"),
+    output_format: str = Form("png", description="Encoding: 'png', 'png_bilevel', 'png_palette', 'webp' or 'npy'"),
+    compression_level: Optional[int] = Form(None, description="zlib level 0-9 for PNG/WebP (default: encoder default)"),
+    archive: str = Form("zip", description="Response: 'zip' or 'multipart' (multipart/mixed)"),
+) -> StreamingResponse:
+    """
+    Canny edge detection for many images in one request.
+    
+    Takes the same parameters as /process, applied to every file. Files are
+    processed concurrently and returned in completion order.
     
-    try:
-        return await CannyController.process_image_controller(
-            tmp_path, sigma, low_threshold, high_threshold
-        )
-    finally:
-        # Clean up the temporary file
-        if os.path.exists(tmp_path):
-            os.unlink(tmp_path)
\ No newline at end of file
+    Returns:
+    - Zip with one image entry per file plus manifest.json, or a
+      multipart/mixed body; failed files get a .error.json entry with
+      their status code and detail
+    """
+    return await BatchController.process_batch(
+        files,
+        lambda image_source: CannyController.process_image_controller(image_source, sigma, low_threshold, high_threshold, interpolate_nms, max_side, output_format, compression_level),
+        "canny",
+        archive,
+    )
@@ -1,8 +1,8 @@
 from fastapi import APIRouter, File, UploadFile, Form
-from fastapi.responses import JSONResponse
+from fastapi.responses import Response, StreamingResponse
 from controllers.freeman_chain_controller import FreemanChainController
-import tempfile
-import os
+from controllers.batch_controller import BatchController
+from typing import List, Optional
 
 router = APIRouter(
     prefix="/freeman-chain",
@@ -12,25 +12,66 @@ router = APIRouter(
 @router.post("/process", status_code=200)
 async def freeman_chain_process(
     file: UploadFile = File(...),
-    threshold: int = Form(128)
-) -> JSONResponse:
+    threshold: int = Form(128),
+    chain_format: str = Form("json", alias="format", description="Chain code format: 'json', 'packed', 'rle' or 'diff'"),
+    compress: bool = Form(False, description="zlib-compress 'diff' chain codes"),
+    stream: bool = Form(False, description="Stream contours as NDJSON"),
+    max_side: Optional[int] = Form(None, description="Downscale while decoding so the longest side fits this many pixels"),
+) -> Response:
     """
     Process image with Freeman Chain Code algorithm.
     
     Parameters:
     - file: Input image
     - threshold: Binarization threshold (0-255)
+    - format: Chain code wire format (default: "json")
+        - "json": list of directions
+        - "packed": 3 bits per direction (MSB first) in base64; read "length" directions
+        - "rle": flat list [direction, run, direction, run, ...]
+        - "diff": first direction followed by turns (d[k] - d[k-1]) mod 8, as a digit string
+    - compress: zlib-compress the "diff" string and base64 encode it (default: false)
+    - stream: Send an NDJSON stream (application/x-ndjson) instead of one JSON
+      document: one contour object per line, traced as the response is sent,
+      then a trailer line {"total_contours": N, "format": "..."} (default: false)
+    - max_side: Downscale the image while decoding so its longest side fits
+      this many pixels (JPEGs decode directly at 1/2, 1/4 or 1/8 scale)
+      Start points are mapped back to original coordinates and "scale" gives
+      the [row, column] factor; chain codes stay at the decoded resolution.
+    
+    Contours are traced with Moore-neighbor tracing: one outer contour per
+    object (8-connected) and one inner contour per hole ("is_hole": true).
+    Directions: 0=N, 1=NE, 2=E, 3=SE, 4=S, 5=SW, 6=W, 7=NW.
     
     Returns:
-    - JSON with Freeman chain codes for each contour
+    - JSON with Freeman chain codes for each contour, or the NDJSON stream
+    """
+    # Decode straight from the upload's spooled file, no temporary file round trip
+    return await FreemanChainController.process_image(file.file, threshold, chain_format, compress, stream, max_side)
+
+
+@router.post("/batch", status_code=200)
+async def freeman_chain_batch(
+    files: List[UploadFile] = File(...),
+    threshold: int = Form(128),
+    chain_format: str = Form("json", alias="format", description="Chain code format: 'json', 'packed', 'rle' or 'diff'"),
+    compress: bool = Form(False, description="zlib-compress 'diff' chain codes"),
+    max_side: Optional[int] = Form(None, description="Downscale while decoding so the longest side fits this many pixels"),
+    archive: str = Form("zip", description="Response: 'zip' or 'multipart' (multipart/mixed)"),
+) -> StreamingResponse:
     """
-    with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(file.filename)[1]) as tmp:
-        content = await file.read()
-        tmp.write(content)
-        tmp_path = tmp.name
+    Freeman chain code for many images in one request.
     
-    try:
-        return await FreemanChainController.process_image(tmp_path, threshold)
-    finally:
-        if os.path.exists(tmp_path):
-            os.unlink(tmp_path)
\ No newline at end of file
+    Takes the same parameters as /process, applied to every file. Files are
+    processed concurrently and returned in completion order.
+    
+    Returns:
+    - Zip with one JSON entry per file plus manifest.json, or a
+      multipart/mixed body; failed files get a .error.json entry with
+      their status code and detail
+    """
+    return await BatchController.process_batch(
+        files,
+        lambda image_source: FreemanChainController.process_image(image_source, threshold, chain_format, compress, max_side=max_side),
+        "freeman_chain",
+        archive,
+    )
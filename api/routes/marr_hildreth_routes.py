@@ -1,9 +1,8 @@
 from fastapi import APIRouter, File, UploadFile, Form
-from fastapi.responses import Response
+from fastapi.responses import Response, StreamingResponse
 from controllers.marr_hildreth_controller import MarrHildrethController
-from typing import Optional
-import tempfile
-import os
+from controllers.batch_controller import BatchController
+from typing import List, Optional
 
 router = APIRouter(
     prefix="/marr-hildreth",
@@ -14,7 +13,11 @@ router = APIRouter(
 async def marr_hildreth_process(
     file: UploadFile = File(...),
     sigma: float = Form(1.0),
-    threshold: Optional[float] = Form(0.1)
+    threshold: Optional[float] = Form(0.1),
+    zero_crossing_mode: str = Form("window", description="Zero-crossing test: 'window' or 'opposing'"),
+    max_side: Optional[int] = Form(None, description="Downscale while decoding so the longest side fits this many pixels"),
+    output_format: str = Form("png", description="Encoding: 'png', 'png_bilevel', 'png_palette', 'webp' or 'npy'"),
+    compression_level: Optional[int] = Form(None, description="zlib level 0-9 for PNG/WebP (default: encoder default)"),
 ) -> Response:
     """
     Detect edges using Marr-Hildreth (Laplacian of Gaussian) algorithm.
@@ -26,21 +29,54 @@ async def marr_hildreth_process(
     - file: Input image
     - sigma: Standard deviation for Gaussian (default: 1.0)
     - threshold: Threshold for zero-crossing detection (default: 0.1)
+    - zero_crossing_mode: Zero-crossing test (default: "window")
+        - "window": sign change between the min and max of the 3x3 neighborhood
+        - "opposing": sign change between opposing neighbors (N/S, W/E and diagonals), thinner edges
+    - max_side: Downscale the image while decoding so its longest side fits
+      this many pixels (JPEGs decode directly at 1/2, 1/4 or 1/8 scale)
+    - output_format: Response encoding (default: "png")
+        - "png": 8-bit grayscale PNG
+        - "png_bilevel": 1-bit PNG, pixels >= 128 become white (binary masks)
+        - "png_palette": palette PNG with only the gray levels present (1-4 bits for few levels)
+        - "webp": lossless WebP
+        - "npy": raw NumPy array (np.save)
+    - compression_level: zlib level 0-9 for PNG (0-1 are fastest), mapped to the
+      WebP effort; default keeps the encoder default
     
     Returns:
     - Binary image with detected edges
     """
-    # Save uploaded file to a temporary location
-    with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(file.filename)[1]) as tmp:
-        content = await file.read()
-        tmp.write(content)
-        tmp_path = tmp.name
+    # Decode straight from the upload's spooled file, no temporary file round trip
+    return await MarrHildrethController.process_image_controller(
+        file.file, sigma, threshold, zero_crossing_mode, max_side, output_format, compression_level
+    )
+
+
+@router.post("/batch", status_code=200)
+async def marr_hildreth_batch(
+    files: List[UploadFile] = File(...),
+    sigma: float = Form(1.0),
+    threshold: Optional[float] = Form(0.1),
+    zero_crossing_mode: str = Form("window", description="Zero-crossing test: 'window' or 'opposing'"),
+    max_side: Optional[int] = Form(None, description="Downscale while decoding so the longest side fits this many pixels"),
+    output_format: str = Form("png", description="Encoding: 'png', 'png_bilevel', 'png_palette', 'webp' or 'npy'"),
+    compression_level: Optional[int] = Form(None, description="zlib level 0-9 for PNG/WebP (default: encoder default)"),
+    archive: str = Form("zip", description="Response: 'zip' or 'multipart' (multipart/mixed)"),
+) -> StreamingResponse:
+    """
+    Marr-Hildreth edge detection for many images in one request.
     
-    try:
-        return await MarrHildrethController.process_image_controller(
-            tmp_path, sigma, threshold
-        )
-    finally:
-        # Clean up the temporary file
-        if os.path.exists(tmp_path):
-            os.unlink(tmp_path)
\ No newline at end of file
+    Takes the same parameters as /process, applied to every file. Files are
+    processed concurrently and returned in completion order.
+    
+    Returns:
+    - Zip with one image entry per file plus manifest.json, or a
+      multipart/mixed body; failed files get a .error.json entry with
+      their status code and detail
+    """
+    return await BatchController.process_batch(
+        files,
+        lambda image_source: MarrHildrethController.process_image_controller(image_source, sigma, threshold, zero_crossing_mode, max_side, output_format, compression_level),
+        "marr_hildreth",
+        archive,
+    )
@@ -1,8 +1,8 @@
 from fastapi import APIRouter, File, UploadFile, Form
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from controllers.object_count_controller import ObjectCountController
-import tempfile
-import os
+from controllers.batch_controller import BatchController
+from typing import List, Optional
 
 router = APIRouter(
     prefix="/object-count",
@@ -13,7 +13,11 @@ router = APIRouter(
 async def object_count_process(
     file: UploadFile = File(...),
     threshold: int = Form(128),
-    method: str = Form("ccl", description="Method: 'ccl' or 'freeman'")
+    method: str = Form("ccl", description="Method: 'ccl' or 'freeman'"),
+    connectivity: int = Form(4, description="CCL pixel connectivity: 4 or 8"),
+    chain_format: str = Form("json", alias="format", description="Freeman chain code format: 'json', 'packed', 'rle' or 'diff'"),
+    compress: bool = Form(False, description="zlib-compress 'diff' chain codes"),
+    max_side: Optional[int] = Form(None, description="Downscale while decoding so the longest side fits this many pixels"),
 ) -> JSONResponse:
     """
     Count objects in image.
@@ -22,8 +26,15 @@ async def object_count_process(
     - file: Input image
     - threshold: Binarization threshold (0-255)
     - method: Counting method
-        - "ccl": Connected Component Labeling (faster, simple count)
-        - "freeman": Freeman Chain Code (slower, includes contour details)
+        - "ccl": Connected Component Labeling (faster, includes area, bbox and centroid per object)
+        - "freeman": Freeman Chain Code (includes contour details, counts outer contours)
+    - connectivity: Pixel connectivity used by CCL (4 or 8)
+    - format: Chain code format for "freeman" (see /freeman-chain/process)
+    - compress: zlib-compress "diff" chain codes
+    - max_side: Downscale the image while decoding so its longest side fits
+      this many pixels (JPEGs decode directly at 1/2, 1/4 or 1/8 scale)
+      Areas, boxes, centroids and start points are mapped back to original
+      coordinates, and "scale" gives the [row, column] factor.
     
     Returns:
     - JSON with object count and method-specific information
@@ -35,7 +46,16 @@ async def object_count_process(
     {
         "object_count": 5,
         "threshold_used": 128,
-        "method": "connected_component_labeling"
+        "method": "connected_component_labeling",
+        "connectivity": 4,
+        "objects": [
+            {
+                "label": 1,
+                "area": 120,
+                "bbox": [10, 20, 21, 31],
+                "centroid": [15.5, 25.5]
+            }
+        ]
     }
     ```
     
@@ -45,23 +65,47 @@ async def object_count_process(
         "object_count": 5,
         "threshold_used": 128,
         "method": "freeman_chain_code",
+        "format": "json",
         "contours": [
             {
                 "start_point": [10, 20],
-                "chain_code": [0, 0, 1, 2, 3],
-                "length": 5
+                "chain_code": [2, 2, 4, 4, 6, 6, 0, 0],
+                "length": 8,
+                "is_hole": false
             }
         ]
     }
     ```
     """
-    with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(file.filename)[1]) as tmp:
-        content = await file.read()
-        tmp.write(content)
-        tmp_path = tmp.name
+    # Decode straight from the upload's spooled file, no temporary file round trip
+    return await ObjectCountController.process_image(file.file, threshold, method, connectivity, chain_format, compress, max_side)
+
+
+@router.post("/batch", status_code=200)
+async def object_count_batch(
+    files: List[UploadFile] = File(...),
+    threshold: int = Form(128),
+    method: str = Form("ccl", description="Method: 'ccl' or 'freeman'"),
+    connectivity: int = Form(4, description="CCL pixel connectivity: 4 or 8"),
+    chain_format: str = Form("json", alias="format", description="Freeman chain code format: 'json', 'packed', 'rle' or 'diff'"),
+    compress: bool = Form(False, description="zlib-compress 'diff' chain codes"),
+    max_side: Optional[int] = Form(None, description="Downscale while decoding so the longest side fits this many pixels"),
+    archive: str = Form("zip", description="Response: 'zip' or 'multipart' (multipart/mixed)"),
+) -> StreamingResponse:
+    """
+    Object count for many images in one request.
+    
+    Takes the same parameters as /process, applied to every file. Files are
+    processed concurrently and returned in completion order.
     
-    try:
-        return await ObjectCountController.process_image(tmp_path, threshold, method)
-    finally:
-        if os.path.exists(tmp_path):
-            os.unlink(tmp_path)
\ No newline at end of file
+    Returns:
+    - Zip with one JSON entry per file plus manifest.json, or a
+      multipart/mixed body; failed files get a .error.json entry with
+      their status code and detail
+    """
+    return await BatchController.process_batch(
+        files,
+        lambda image_source: ObjectCountController.process_image(image_source, threshold, method, connectivity, chain_format, compress, max_side),
+        "object_count",
+        archive,
+    )
@@ -1,8 +1,8 @@
-from fastapi import APIRouter, File, UploadFile
-from fastapi.responses import Response
+from fastapi import APIRouter, File, UploadFile, Form
+from fastapi.responses import Response, StreamingResponse
 from controllers.otus_method_controller import OtusMethodController
-import tempfile
-import os
+from controllers.batch_controller import BatchController
+from typing import List, Optional
 
 
 router = APIRouter(
@@ -13,6 +13,10 @@ router = APIRouter(
 @router.post("/process", status_code=200)
 async def otsu_method_process(
     file: UploadFile = File(...),
+    num_thresholds: int = Form(1, description="1 for binary output, 2-4 for multi-level Otsu"),
+    max_side: Optional[int] = Form(None, description="Downscale while decoding so the longest side fits this many pixels"),
+    output_format: str = Form("png", description="Encoding: 'png', 'png_bilevel', 'png_palette', 'webp' or 'npy'"),
+    compression_level: Optional[int] = Form(None, description="zlib level 0-9 for PNG/WebP (default: encoder default)"),
 ) -> Response:
     """
     Apply Otsu's automatic thresholding method.
@@ -21,23 +25,56 @@ async def otsu_method_process(
     value that separates foreground from background by maximizing
     the between-class variance.
     
+    With more than one threshold (multi-level Otsu), the image is split
+    into num_thresholds + 1 classes shown as evenly spaced gray levels.
+    
     Parameters:
     - file: Input image
+    - num_thresholds: Number of thresholds (1-4, default: 1)
+    - max_side: Downscale the image while decoding so its longest side fits
+      this many pixels (JPEGs decode directly at 1/2, 1/4 or 1/8 scale)
+    - output_format: Response encoding (default: "png")
+        - "png": 8-bit grayscale PNG
+        - "png_bilevel": 1-bit PNG, pixels >= 128 become white (binary masks)
+        - "png_palette": palette PNG with only the gray levels present (1-4 bits for few levels)
+        - "webp": lossless WebP
+        - "npy": raw NumPy array (np.save)
+    - compression_level: zlib level 0-9 for PNG (0-1 are fastest), mapped to the
+      WebP effort; default keeps the encoder default
     
     Returns:
-    - Binary image (black and white)
+    - Binary image (black and white), or gray levels in multi-level mode
+    - Header X-Otsu-Thresholds: comma-separated thresholds found
+    """
+    # Decode straight from the upload's spooled file, no temporary file round trip
+    return await OtusMethodController.process_image(
+        file.file, num_thresholds, max_side, output_format, compression_level
+    )
+
+
+@router.post("/batch", status_code=200)
+async def otsu_method_batch(
+    files: List[UploadFile] = File(...),
+    num_thresholds: int = Form(1, description="1 for binary output, 2-4 for multi-level Otsu"),
+    max_side: Optional[int] = Form(None, description="Downscale while decoding so the longest side fits this many pixels"),
+    output_format: str = Form("png", description="Encoding: 'png', 'png_bilevel', 'png_palette', 'webp' or 'npy'"),
+    compression_level: Optional[int] = Form(None, description="zlib level 0-9 for PNG/WebP (default: encoder default)"),
+    archive: str = Form("zip", description="Response: 'zip' or 'multipart' (multipart/mixed)"),
+) -> StreamingResponse:
     """
-    # Save uploaded file to a temporary location
-    with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(file.filename)[1]) as tmp:
-        content = await file.read()
-        tmp.write(content)
-        tmp_path = tmp.name
+    Otsu's thresholding for many images in one request.
     
-    try:
-        return await OtusMethodController.process_image(
-            tmp_path
-        )
-    finally:
-        # Clean up the temporary file
-        if os.path.exists(tmp_path):
-            os.unlink(tmp_path)
\ No newline at end of file
+    Takes the same parameters as /process, applied to every file. Files are
+    processed concurrently and returned in completion order.
+    
+    Returns:
+    - Zip with one image entry per file plus manifest.json, or a
+      multipart/mixed body; failed files get a .error.json entry with
+      their status code and detail
+    """
+    return await BatchController.process_batch(
+        files,
+        lambda image_source: OtusMethodController.process_image(image_source, num_thresholds, max_side, output_format, compression_level),
+        "otsu",
+        archive,
+    )
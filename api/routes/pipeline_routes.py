@@ -0,0 +1,53 @@
+from fastapi import APIRouter, File, UploadFile, Form
+from fastapi.responses import Response
+from controllers.pipeline_controller import PipelineController
+from typing import Optional
+
+router = APIRouter(
+    prefix="/pipeline",
+    tags=["Pipeline"],
+)
+
+@router.post("/process", status_code=200)
+async def pipeline_process(
+    file: UploadFile = File(...),
+    steps: str = Form(..., description='JSON list of steps, e.g. [{"op": "box_filter", "box_size": 5}, {"op": "otsu"}]'),
+    max_side: Optional[int] = Form(None, description="Downscale while decoding so the longest side fits this many pixels"),
+    output_format: str = Form("png", description="Encoding: 'png', 'png_bilevel', 'png_palette', 'webp' or 'npy'"),
+    compression_level: Optional[int] = Form(None, description="zlib level 0-9 for PNG/WebP (default: encoder default)"),
+) -> Response:
+    """
+    Chain filters on one decoded image, without re-uploading intermediate results.
+    
+    Parameters:
+    - file: Input image
+    - steps: Ordered JSON list of steps. Each step has an "op" and the same
+      parameters as the matching endpoint:
+      - box_filter: box_size, box_width, box_height
+      - otsu: num_thresholds
+      - canny: sigma, low_threshold, high_threshold, interpolate_nms
+      - marr_hildreth: sigma, threshold, zero_crossing_mode
+      - segmentation: intensity_map (list of [min, max, value])
+      - watershed: gaussian_sigma, quantization_levels
+      - object_count: threshold, method, connectivity, chain_format, compress
+      - freeman_chain: threshold, chain_format, compress
+      
+      object_count and freeman_chain return JSON and must be the last step.
+    - max_side: Downscale the image while decoding so its longest side fits
+      this many pixels (JPEGs decode directly at 1/2, 1/4 or 1/8 scale)
+    - output_format: Response encoding (default: "png")
+        - "png": 8-bit grayscale PNG
+        - "png_bilevel": 1-bit PNG, pixels >= 128 become white (binary masks)
+        - "png_palette": palette PNG with only the gray levels present (1-4 bits for few levels)
+        - "webp": lossless WebP
+        - "npy": raw NumPy array (np.save)
+    - compression_level: zlib level 0-9 for PNG (0-1 are fastest), mapped to the
+      WebP effort; default keeps the encoder default
+      Coordinates in object_count and freeman_chain results are mapped back
+      to the original image.
+    
+    Returns:
+    - Final image (PNG), or JSON when the last step is object_count or freeman_chain
+    """
+    # Decode straight from the upload's spooled file, no temporary file round trip
+    return await PipelineController.process_image(file.file, steps, max_side, output_format, compression_level)
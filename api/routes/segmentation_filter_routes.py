@@ -1,8 +1,8 @@
-from fastapi import APIRouter, File, UploadFile
-from fastapi.responses import Response
+from fastapi import APIRouter, File, UploadFile, Form
+from fastapi.responses import Response, StreamingResponse
 from controllers.segmentation_filter_controller import SegmentationFilterController
-import tempfile
-import os
+from controllers.batch_controller import BatchController
+from typing import List, Optional
 
 router = APIRouter(
     prefix="/segmentation",
@@ -11,12 +11,16 @@ router = APIRouter(
 
 @router.post("/process", status_code=200)
 async def segmentation_process(
-    file: UploadFile = File(...)
+    file: UploadFile = File(...),
+    intensity_map: Optional[str] = Form(None, description="JSON list of [min, max, value] ranges"),
+    max_side: Optional[int] = Form(None, description="Downscale while decoding so the longest side fits this many pixels"),
+    output_format: str = Form("png", description="Encoding: 'png', 'png_bilevel', 'png_palette', 'webp' or 'npy'"),
+    compression_level: Optional[int] = Form(None, description="zlib level 0-9 for PNG/WebP (default: encoder default)"),
 ) -> Response:
     """
     Apply intensity-based segmentation to image.
     
-    Segments image into 5 discrete intensity levels based on ranges:
+    By default, segments image into 5 discrete intensity levels based on ranges:
     - [0-50]     → 25  (Very Dark)
     - [51-100]   → 75  (Dark)
     - [101-150]  → 125 (Medium)
@@ -25,19 +29,50 @@ async def segmentation_process(
     
     Parameters:
     - file: Input image
+    - intensity_map: Optional custom mapping table as JSON, e.g.
+      `[[0, 127, 0], [128, 255, 255]]`. Later entries win on overlaps and
+      unmapped intensities become 0.
+    - max_side: Downscale the image while decoding so its longest side fits
+      this many pixels (JPEGs decode directly at 1/2, 1/4 or 1/8 scale)
+    - output_format: Response encoding (default: "png")
+        - "png": 8-bit grayscale PNG
+        - "png_bilevel": 1-bit PNG, pixels >= 128 become white (binary masks)
+        - "png_palette": palette PNG with only the gray levels present (1-4 bits for few levels)
+        - "webp": lossless WebP
+        - "npy": raw NumPy array (np.save)
+    - compression_level: zlib level 0-9 for PNG (0-1 are fastest), mapped to the
+      WebP effort; default keeps the encoder default
     
     Returns:
-    - Segmented image with 5 intensity levels
+    - Segmented image with one intensity level per range
     """
-    # Save uploaded file to a temporary location
-    with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(file.filename)[1]) as tmp:
-        content = await file.read()
-        tmp.write(content)
-        tmp_path = tmp.name
+    # Decode straight from the upload's spooled file, no temporary file round trip
+    return await SegmentationFilterController.process_image(file.file, intensity_map, max_side, output_format, compression_level)
+
+
+@router.post("/batch", status_code=200)
+async def segmentation_batch(
+    files: List[UploadFile] = File(...),
+    intensity_map: Optional[str] = Form(None, description="JSON list of [min, max, value] ranges"),
+    max_side: Optional[int] = Form(None, description="Downscale while decoding so the longest side fits this many pixels"),
+    output_format: str = Form("png", description="Encoding: 'png', 'png_bilevel', 'png_palette', 'webp' or 'npy'"),
+    compression_level: Optional[int] = Form(None, description="zlib level 0-9 for PNG/WebP (default: encoder default)"),
+    archive: str = Form("zip", description="Response: 'zip' or 'multipart' (multipart/mixed)"),
+) -> StreamingResponse:
+    """
+    Intensity segmentation for many images in one request.
     
-    try:
-        return await SegmentationFilterController.process_image(tmp_path)
-    finally:
-        # Clean up the temporary file
-        if os.path.exists(tmp_path):
-            os.unlink(tmp_path)
\ No newline at end of file
+    Takes the same parameters as /process, applied to every file. Files are
+    processed concurrently and returned in completion order.
+    
+    Returns:
+    - Zip with one image entry per file plus manifest.json, or a
+      multipart/mixed body; failed files get a .error.json entry with
+      their status code and detail
+    """
+    return await BatchController.process_batch(
+        files,
+        lambda image_source: SegmentationFilterController.process_image(image_source, intensity_map, max_side, output_format, compression_level),
+        "segmentation",
+        archive,
+    )
@@ -1,8 +1,8 @@
 from fastapi import APIRouter, File, UploadFile, Form
-from fastapi.responses import Response
+from fastapi.responses import Response, StreamingResponse
 from controllers.watershed_controller import WatershedController
-import tempfile
-import os
+from controllers.batch_controller import BatchController
+from typing import List, Optional
 
 
 router = APIRouter(
@@ -14,6 +14,11 @@ router = APIRouter(
 async def watershed_process(
     file: UploadFile = File(...),
     gaussian_sigma: float = Form(1.0),
+    quantization_levels: int = Form(256, description="Gradient quantization: 256 or 65536 levels"),
+    output: str = Form("png", description="Output: 'png' (visualization) or 'npz' (label map)"),
+    max_side: Optional[int] = Form(None, description="Downscale while decoding so the longest side fits this many pixels"),
+    output_format: str = Form("png", description="Encoding: 'png', 'png_bilevel', 'png_palette', 'webp' or 'npy'"),
+    compression_level: Optional[int] = Form(None, description="zlib level 0-9 for PNG/WebP (default: encoder default)"),
 ) -> Response:
     """
     Segment image using Watershed algorithm.
@@ -24,22 +29,65 @@ async def watershed_process(
     Parameters:
     - file: Input image
     - gaussian_sigma: Smoothing parameter to reduce noise (default: 1.0)
+    - quantization_levels: Number of gradient levels used by the bucket-queue
+      flooding, 256 or 65536 for finer ordering (default: 256)
+    
+    - output: Response format (default: "png")
+        - "png": grayscale visualization of the regions
+        - "npz": compressed NumPy archive with the int32 label map ("labels",
+          -1 on watershed lines) and per-basin pixel counts ("basin_labels",
+          "basin_pixel_counts")
+    - max_side: Downscale the image while decoding so its longest side fits
+      this many pixels (JPEGs decode directly at 1/2, 1/4 or 1/8 scale)
+    - output_format: Encoding of the "png" visualization (default: "png")
+        - "png": 8-bit grayscale PNG
+        - "png_bilevel": 1-bit PNG, pixels >= 128 become white (binary masks)
+        - "png_palette": palette PNG with only the gray levels present (1-4 bits for few levels)
+        - "webp": lossless WebP
+        - "npy": raw NumPy array (np.save)
+    - compression_level: zlib level 0-9 for PNG (0-1 are fastest), mapped to the
+      WebP effort; default keeps the encoder default
     
     Returns:
-    - Segmented image with regions in different intensities
+    - Segmented image with regions in different intensities, or the .npz label map
+    """
+    # Decode straight from the upload's spooled file, no temporary file round trip
+    return await WatershedController.process_image(
+        file.file,
+        gaussian_sigma,
+        quantization_levels,
+        output,
+        max_side,
+        output_format,
+        compression_level,
+    )
+
+
+@router.post("/batch", status_code=200)
+async def watershed_batch(
+    files: List[UploadFile] = File(...),
+    gaussian_sigma: float = Form(1.0),
+    quantization_levels: int = Form(256, description="Gradient quantization: 256 or 65536 levels"),
+    output: str = Form("png", description="Output: 'png' (visualization) or 'npz' (label map)"),
+    max_side: Optional[int] = Form(None, description="Downscale while decoding so the longest side fits this many pixels"),
+    output_format: str = Form("png", description="Encoding: 'png', 'png_bilevel', 'png_palette', 'webp' or 'npy'"),
+    compression_level: Optional[int] = Form(None, description="zlib level 0-9 for PNG/WebP (default: encoder default)"),
+    archive: str = Form("zip", description="Response: 'zip' or 'multipart' (multipart/mixed)"),
+) -> StreamingResponse:
     """
-    # Save uploaded file to a temporary location
-    with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(file.filename)[1]) as tmp:
-        content = await file.read()
-        tmp.write(content)
-        tmp_path = tmp.name
+    Watershed segmentation for many images in one request.
+    
+    Takes the same parameters as /process, applied to every file. Files are
+    processed concurrently and returned in completion order.
     
-    try:
-        return await WatershedController.process_image(
-            tmp_path,
-            gaussian_sigma,
-        )
-    finally:
-        # Clean up the temporary file
-        if os.path.exists(tmp_path):
-            os.unlink(tmp_path)
\ No newline at end of file
+    Returns:
+    - Zip with one image or .npz entry per file plus manifest.json, or a
+      multipart/mixed body; failed files get a .error.json entry with
+      their status code and detail
+    """
+    return await BatchController.process_batch(
+        files,
+        lambda image_source: WatershedController.process_image(image_source, gaussian_sigma, quantization_levels, output, max_side, output_format, compression_level),
+        "watershed",
+        archive,
+    )
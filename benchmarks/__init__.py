@@ -0,0 +1,5 @@
+from .synthetic_images import SyntheticImages
+from .benchmark_suite import BenchmarkSuite
+
+
+__all__ = ["SyntheticImages", "BenchmarkSuite"]
@@ -0,0 +1,96 @@
+"""
+Benchmark command line.
+
+    python -m benchmarks run --sizes 256 1024 --output benchmarks/results.json
+    python -m benchmarks compare benchmarks/results.json benchmarks/baseline.json --tolerance 0.1
+
+compare exits with status 1 when any case regressed beyond the tolerance.
+"""
+from benchmarks.benchmark_suite import BenchmarkSuite
+from benchmarks.synthetic_images import SyntheticImages
+import argparse
+import json
+import os
+import sys
+
+
+def run(args: argparse.Namespace) -> int:
+    def progress(result):
+        print(
+            f"{result['layer']:<5} {result['case']:<16} {result['image']:<9} {result['size']:>5}  "
+            f"median {result['median'] * 1000:10.2f} ms  ({result['runs']} runs)",
+            file=sys.stderr
+        )
+
+    report = BenchmarkSuite.run(
+        cases=args.cases,
+        sizes=args.sizes,
+        kinds=args.images,
+        layers=args.layers,
+        repeat=args.repeat,
+        max_seconds=args.max_seconds,
+        warmup=args.warmup,
+        seed=args.seed,
+        progress=progress,
+    )
+    with open(args.output, "w") as output_file:
+        json.dump(report, output_file, indent=2)
+    print(f"Wrote {len(report['results'])} results to {args.output}", file=sys.stderr)
+    return 0
+
+
+def compare(args: argparse.Namespace) -> int:
+    for path in (args.current, args.baseline):
+        if not os.path.exists(path):
+            print(f"{path} not found; create it with 'python -m benchmarks run --output {path}'", file=sys.stderr)
+            return 2
+
+    with open(args.current) as current_file:
+        current = json.load(current_file)
+    with open(args.baseline) as baseline_file:
+        baseline = json.load(baseline_file)
+
+    rows = BenchmarkSuite.compare(current, baseline, args.tolerance, args.metric)
+    print(f"{'layer':<5} {'case':<16} {'image':<9} {'size':>5} {'baseline ms':>12} {'current ms':>12} {'ratio':>7}  status")
+    for row in rows:
+        baseline_ms = "-" if row["baseline"] is None else f"{row['baseline'] * 1000:.2f}"
+        ratio = "-" if row["ratio"] is None else f"{row['ratio']:.2f}"
+        print(
+            f"{row['layer']:<5} {row['case']:<16} {row['image']:<9} {row['size']:>5} "
+            f"{baseline_ms:>12} {row['current'] * 1000:>12.2f} {ratio:>7}  {row['status']}"
+        )
+
+    regressions = [row for row in rows if row["status"] == "regression"]
+    print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%} ({args.metric})")
+    return 1 if regressions else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Service benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run the benchmarks and write the results as JSON")
+    run_parser.add_argument("--cases", nargs="+", choices=list(BenchmarkSuite.CORE_CASES), help="Cases to run (default: all)")
+    run_parser.add_argument("--sizes", nargs="+", type=int, default=list(BenchmarkSuite.SIZES), help="Image side lengths")
+    run_parser.add_argument("--images", nargs="+", choices=SyntheticImages.KINDS, default=list(SyntheticImages.KINDS), help="Synthetic image kinds")
+    run_parser.add_argument("--layers", nargs="+", choices=BenchmarkSuite.LAYERS, default=list(BenchmarkSuite.LAYERS), help="core (algorithm only) and/or http (full request)")
+    run_parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case")
+    run_parser.add_argument("--max-seconds", type=float, default=10.0, help="Stop repeating a case after this long")
+    run_parser.add_argument("--warmup", type=int, default=1, help="Untimed runs before timing")
+    run_parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic images")
+    run_parser.add_argument("--output", default="benchmarks/results.json", help="Results file")
+    run_parser.set_defaults(handler=run)
+
+    compare_parser = commands.add_parser("compare", help="Compare results against a baseline")
+    compare_parser.add_argument("current", help="Results file of the run to check")
+    compare_parser.add_argument("baseline", help="Stored baseline results file")
+    compare_parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed slowdown as a fraction (0.10 = 10%%)")
+    compare_parser.add_argument("--metric", choices=BenchmarkSuite.METRICS, default="median", help="Statistic to compare")
+    compare_parser.set_defaults(handler=compare)
+
+    args = parser.parse_args()
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
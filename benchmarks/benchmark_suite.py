@@ -0,0 +1,269 @@
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from io import BytesIO
+from PIL import Image
+from benchmarks.synthetic_images import SyntheticImages
+from services.box_filter_service import BoxFilterService
+from services.canny_service import CannyService
+from services.freeman_chain_service import FreemanChainService
+from services.marr_hildreth_service import MarrHildrethService
+from services.object_count_service import ObjectCountService
+from services.otsu_method_service import OtsuMethodService
+from services.segmentation_filter_service import SegmentationFilterService
+from services.watershed_service import Watershed
+import numpy as np
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+
+class BenchmarkSuite:
+    """
+    Times every service on synthetic images, at two layers:
+
+    - "core": the service's algorithm on an already decoded array
+    - "http": the full request through the FastAPI app (upload parsing,
+      decoding, executor, algorithm and response encoding), with the
+      result cache disabled
+
+    Each case runs a warmup, then repeats until it has `repeat` timings or
+    has spent `max_seconds`, whichever comes first (always at least once).
+    Results are plain JSON so a run can be stored as a baseline and later
+    runs compared against it with compare().
+    """
+
+    SIZES = (256, 512, 1024, 2048, 4096)
+    LAYERS = ("core", "http")
+    METRICS = ("min", "median", "mean")
+
+    CORE_CASES: Dict[str, Callable[[np.ndarray], Any]] = {
+        "box_filter": lambda image: BoxFilterService.box_filter(image, 5),
+        "canny": lambda image: CannyService.hysteresis(*CannyService.canny_edge_detection(image, 1.0, 0.1, 0.3)),
+        "marr_hildreth": lambda image: MarrHildrethService.marr_hildreth_edge_detection(image, 1.0, 0.1),
+        "otsu": lambda image: OtsuMethodService.otsu_thresholding(image, 1),
+        "otsu_multilevel": lambda image: OtsuMethodService.otsu_thresholding(image, 3),
+        "segmentation": lambda image: SegmentationFilterService.segment_by_intensity(image),
+        "watershed": lambda image: Watershed.segment(image, 1.0, 256),
+        "object_count": lambda image: ObjectCountService.process_image(image, 128, "ccl", 4),
+        "freeman_chain": lambda image: FreemanChainService.process_image(image, 128),
+    }
+
+    # Endpoint and form fields of each case, matching the core parameters
+    HTTP_CASES: Dict[str, Tuple[str, Dict[str, str]]] = {
+        "box_filter": ("/box-filter/process", {"box_size": "5"}),
+        "canny": ("/canny/process", {}),
+        "marr_hildreth": ("/marr-hildreth/process", {}),
+        "otsu": ("/otsu-method/process", {}),
+        "otsu_multilevel": ("/otsu-method/process", {"num_thresholds": "3"}),
+        "segmentation": ("/segmentation/process", {}),
+        "watershed": ("/watershed/process", {}),
+        "object_count": ("/object-count/process", {}),
+        "freeman_chain": ("/freeman-chain/process", {}),
+    }
+
+    @staticmethod
+    def time_call(func: Callable[[], Any], repeat: int = 5, max_seconds: float = 10.0, warmup: int = 1) -> Dict[str, Any]:
+        """Time func() and summarize the runs in seconds."""
+        for _ in range(warmup):
+            func()
+
+        timings: List[float] = []
+        started = time.perf_counter()
+        while len(timings) < max(1, repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+            if time.perf_counter() - started >= max_seconds:
+                break
+
+        return {
+            "runs": len(timings),
+            "min": min(timings),
+            "median": statistics.median(timings),
+            "mean": statistics.fmean(timings),
+        }
+
+    @staticmethod
+    def run(
+        cases: Optional[Iterable[str]] = None,
+        sizes: Iterable[int] = SIZES,
+        kinds: Iterable[str] = SyntheticImages.KINDS,
+        layers: Iterable[str] = LAYERS,
+        repeat: int = 5,
+        max_seconds: float = 10.0,
+        warmup: int = 1,
+        seed: int = 0,
+        progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Run the selected benchmarks.
+
+        Args:
+            cases: Case names (default: all of CORE_CASES)
+            sizes: Image side lengths
+            kinds: Synthetic image kinds, see SyntheticImages
+            layers: "core" and/or "http"
+            repeat: Timed runs per case
+            max_seconds: Stop repeating a case after this long
+            warmup: Untimed runs before timing
+            seed: Seed of the synthetic images
+            progress: Called with each result as soon as it is measured
+
+        Returns:
+            {"meta": {...}, "results": [{"layer", "case", "image", "size", "runs", "min", "median", "mean"}, ...]}
+        """
+        cases = list(cases or BenchmarkSuite.CORE_CASES)
+        layers = list(layers)
+        for case in cases:
+            if case not in BenchmarkSuite.CORE_CASES:
+                raise ValueError(f"Invalid case: {case}. Choose from {tuple(BenchmarkSuite.CORE_CASES)}")
+        for layer in layers:
+            if layer not in BenchmarkSuite.LAYERS:
+                raise ValueError(f"Invalid layer: {layer}. Choose from {BenchmarkSuite.LAYERS}")
+
+        client = BenchmarkSuite.http_client() if "http" in layers else None
+        results: List[Dict[str, Any]] = []
+        try:
+            for size in sizes:
+                for kind in kinds:
+                    image = SyntheticImages.generate(kind, size, seed)
+                    upload = BenchmarkSuite.encode_png(image) if client is not None else b""
+                    for case in cases:
+                        for layer in layers:
+                            if layer == "core":
+                                func = BenchmarkSuite.core_call(case, image)
+                            else:
+                                func = BenchmarkSuite.http_call(client, case, upload)
+                            result = {
+                                "layer": layer,
+                                "case": case,
+                                "image": kind,
+                                "size": size,
+                                **BenchmarkSuite.time_call(func, repeat, max_seconds, warmup),
+                            }
+                            results.append(result)
+                            if progress is not None:
+                                progress(result)
+        finally:
+            if client is not None:
+                client.__exit__(None, None, None)
+
+        return {"meta": BenchmarkSuite.metadata(seed), "results": results}
+
+    @staticmethod
+    def core_call(case: str, image: np.ndarray) -> Callable[[], Any]:
+        func = BenchmarkSuite.CORE_CASES[case]
+        # Services never modify their input, so every run can share the same array
+        return lambda: func(image)
+
+    @staticmethod
+    def http_call(client, case: str, upload: bytes) -> Callable[[], Any]:
+        path, form = BenchmarkSuite.HTTP_CASES[case]
+
+        def call():
+            response = client.post(path, files={"file": ("benchmark.png", upload, "image/png")}, data=form)
+            if response.status_code != 200:
+                raise RuntimeError(f"{path} returned {response.status_code}: {response.text[:200]}")
+            return response.content
+
+        return call
+
+    @staticmethod
+    def http_client():
+        """A TestClient with the app's lifespan started and the result cache off, so every request computes."""
+        from fastapi.testclient import TestClient
+        from config import Settings
+        Settings.RESULT_CACHE_MEMORY_BYTES = 0
+        Settings.RESULT_CACHE_DIR = ""
+
+        from main import app
+        client = TestClient(app)
+        client.__enter__()
+        return client
+
+    @staticmethod
+    def encode_png(image: np.ndarray) -> bytes:
+        byte_io = BytesIO()
+        Image.fromarray(image).save(byte_io, format="PNG")
+        return byte_io.getvalue()
+
+    @staticmethod
+    def metadata(seed: int) -> Dict[str, Any]:
+        """Environment of a run, to tell apart results from different machines or commits."""
+        from config import Settings
+        try:
+            commit = subprocess.run(
+                ["git", "rev-parse", "HEAD"], capture_output=True, text=True, timeout=5,
+                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            ).stdout.strip() or None
+        except (OSError, subprocess.SubprocessError):
+            commit = None
+
+        return {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "commit": commit,
+            "python": sys.version.split()[0],
+            "numpy": np.__version__,
+            "pillow": Image.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "seed": seed,
+            "settings": {
+                key: value for key, value in Settings.get_info().items()
+                if key.startswith(("EXECUTOR_", "TILE_", "CCL_", "STREAM_"))
+            },
+        }
+
+    @staticmethod
+    def compare(
+        current: Dict[str, Any],
+        baseline: Dict[str, Any],
+        tolerance: float = 0.10,
+        metric: str = "median",
+    ) -> List[Dict[str, Any]]:
+        """
+        Compare a run against a baseline, case by case.
+
+        A case regresses when its metric is more than `tolerance` (a
+        fraction, 0.10 = 10%) slower than in the baseline, and improves
+        when it is more than `tolerance` faster.
+
+        Returns:
+            One row per current result with "status": "regression",
+            "improvement", "ok" or "new" (not in the baseline)
+        """
+        if metric not in BenchmarkSuite.METRICS:
+            raise ValueError(f"Invalid metric: {metric}. Choose from {BenchmarkSuite.METRICS}")
+        if tolerance < 0:
+            raise ValueError("tolerance must be non-negative")
+
+        key = lambda result: (result["layer"], result["case"], result["image"], result["size"])
+        baseline_results = {key(result): result for result in baseline["results"]}
+
+        rows = []
+        for result in current["results"]:
+            row = {
+                "layer": result["layer"],
+                "case": result["case"],
+                "image": result["image"],
+                "size": result["size"],
+                "current": result[metric],
+                "baseline": None,
+                "ratio": None,
+                "status": "new",
+            }
+            reference = baseline_results.get(key(result))
+            if reference is not None:
+                row["baseline"] = reference[metric]
+                row["ratio"] = result[metric] / reference[metric] if reference[metric] > 0 else float("inf")
+                if row["ratio"] > 1 + tolerance:
+                    row["status"] = "regression"
+                elif row["ratio"] < 1 - tolerance:
+                    row["status"] = "improvement"
+                else:
+                    row["status"] = "ok"
+            rows.append(row)
+
+        return rows
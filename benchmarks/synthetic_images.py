@@ -0,0 +1,86 @@
+from PIL import Image, ImageDraw
+import numpy as np
+
+
+class SyntheticImages:
+    """
+    Deterministic grayscale test images for benchmarks.
+
+    Every generator takes a side length and a seed and returns a square
+    uint8 array; the same (kind, size, seed) always gives the same pixels,
+    so timings from different runs and machines measure the same work.
+
+    - "noise": Gaussian noise around mid-gray, the worst case for edge
+      detectors and contour tracing
+    - "blobs": filled discs of random size and intensity on a dark
+      background, with light noise; many separate objects
+    - "strokes": dark text-like strokes on a light page, in lines of
+      short "words"
+    - "gradient": smooth linear and radial ramps, with almost no edges
+    """
+
+    KINDS = ("noise", "blobs", "strokes", "gradient")
+
+    @staticmethod
+    def generate(kind: str, size: int, seed: int = 0) -> np.ndarray:
+        """Generate a size x size image of the given kind."""
+        if kind not in SyntheticImages.KINDS:
+            raise ValueError(f"Invalid image kind: {kind}. Choose one of {SyntheticImages.KINDS}")
+        if size < 16:
+            raise ValueError("size must be at least 16")
+
+        return getattr(SyntheticImages, kind)(size, np.random.default_rng(seed))
+
+    @staticmethod
+    def noise(size: int, rng: np.random.Generator) -> np.ndarray:
+        return np.clip(rng.normal(128.0, 40.0, (size, size)), 0, 255).astype(np.uint8)
+
+    @staticmethod
+    def blobs(size: int, rng: np.random.Generator) -> np.ndarray:
+        image = Image.new("L", (size, size), 20)
+        draw = ImageDraw.Draw(image)
+
+        # About one blob per 64x64 pixels, whatever the image size
+        count = max(4, size * size // 4096)
+        centers = rng.integers(0, size, (count, 2))
+        radii = rng.integers(2, max(3, size // 64), count)
+        intensities = rng.integers(140, 256, count)
+        for (x, y), radius, intensity in zip(centers, radii, intensities):
+            draw.ellipse((x - radius, y - radius, x + radius, y + radius), fill=int(intensity))
+
+        array = np.asarray(image, dtype=np.int16) + rng.integers(-8, 9, (size, size), dtype=np.int16)
+        return np.clip(array, 0, 255).astype(np.uint8)
+
+    @staticmethod
+    def strokes(size: int, rng: np.random.Generator) -> np.ndarray:
+        image = Image.new("L", (size, size), 235)
+        draw = ImageDraw.Draw(image)
+
+        glyph = max(6, size // 64)
+        width = max(1, glyph // 5)
+        margin = glyph
+        for baseline in range(margin + glyph, size - margin, 2 * glyph):
+            x = margin
+            while x < size - margin - glyph:
+                # A "word" of 2 to 7 glyphs, each a few connected strokes
+                for _ in range(int(rng.integers(2, 8))):
+                    if x >= size - margin - glyph:
+                        break
+                    points = [(x + int(rng.integers(0, glyph)), baseline - int(rng.integers(0, glyph)))
+                              for _ in range(int(rng.integers(2, 5)))]
+                    draw.line(points, fill=int(rng.integers(0, 60)), width=width)
+                    x += glyph
+                x += glyph
+
+        return np.asarray(image, dtype=np.uint8).copy()
+
+    @staticmethod
+    def gradient(size: int, rng: np.random.Generator) -> np.ndarray:
+        rows, cols = np.mgrid[0:size, 0:size].astype(np.float64) / max(1, size - 1)
+        angle = rng.uniform(0, 2 * np.pi)
+        center_row, center_col = rng.uniform(0.25, 0.75, 2)
+
+        linear = np.cos(angle) * cols + np.sin(angle) * rows
+        radial = np.hypot(rows - center_row, cols - center_col)
+        ramp = 0.6 * (linear - linear.min()) / max(np.ptp(linear), 1e-9) + 0.4 * radial / radial.max()
+        return np.round(ramp * 255).astype(np.uint8)
@@ -20,6 +20,35 @@ class Settings:
 
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
 
+    # Connected component labeling: images larger than one tile are labeled tile by tile
+    CCL_TILE_SIZE: int = int(os.getenv("CCL_TILE_SIZE", 4096))
+    CCL_WORKERS: int = int(os.getenv("CCL_WORKERS", os.cpu_count() or 1))
+
+    # Service executor: CPU-bound work runs in a pool, extra requests wait in a bounded queue
+    EXECUTOR_KIND: str = os.getenv("EXECUTOR_KIND", "thread")
+    EXECUTOR_WORKERS: int = int(os.getenv("EXECUTOR_WORKERS", os.cpu_count() or 1))
+    EXECUTOR_QUEUE_SIZE: int = int(os.getenv("EXECUTOR_QUEUE_SIZE", 16))
+    EXECUTOR_RETRY_AFTER: int = int(os.getenv("EXECUTOR_RETRY_AFTER", 5))
+
+    # Tiled filters: convolutions, box filter and zero-crossings run in row bands across a pool
+    TILE_EXECUTOR_KIND: str = os.getenv("TILE_EXECUTOR_KIND", "thread")
+    # Split the CPUs between the service workers, so nested pools do not oversubscribe them
+    TILE_WORKERS: int = int(os.getenv("TILE_WORKERS", max(1, (os.cpu_count() or 1) // max(1, EXECUTOR_WORKERS))))
+    TILE_MIN_ROWS: int = int(os.getenv("TILE_MIN_ROWS", 256))
+
+    # Batch endpoints: maximum number of files per request
+    BATCH_MAX_FILES: int = int(os.getenv("BATCH_MAX_FILES", 1000))
+
+    # Result cache: byte-bounded memory LRU, plus a disk tier when RESULT_CACHE_DIR is set
+    RESULT_CACHE_MEMORY_BYTES: int = int(os.getenv("RESULT_CACHE_MEMORY_BYTES", 64 * 1024 * 1024))
+    RESULT_CACHE_DIR: str = os.getenv("RESULT_CACHE_DIR", "")
+    RESULT_CACHE_DISK_BYTES: int = int(os.getenv("RESULT_CACHE_DISK_BYTES", 1024 * 1024 * 1024))
+    RESULT_CACHE_TTL: int = int(os.getenv("RESULT_CACHE_TTL", 24 * 60 * 60))
+
+    # Large results: images with at least this many pixels are encoded and sent in chunks (0 disables)
+    STREAM_MIN_PIXELS: int = int(os.getenv("STREAM_MIN_PIXELS", 16 * 1024 * 1024))
+    STREAM_CHUNK_BYTES: int = int(os.getenv("STREAM_CHUNK_BYTES", 1024 * 1024))
+
     @classmethod
     def validate(cls):
         """Valida as configurações."""
@@ -31,6 +60,34 @@ class Settings:
             raise ValueError("DEBUG must be a boolean value.")
         if cls.LOG_LEVEL not in ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]:
             raise ValueError("LOG_LEVEL must be one of: DEBUG, INFO, WARNING, ERROR, CRITICAL.")
+        if cls.CCL_TILE_SIZE < 1:
+            raise ValueError("CCL_TILE_SIZE must be a positive integer.")
+        if cls.CCL_WORKERS < 1:
+            raise ValueError("CCL_WORKERS must be a positive integer.")
+        if cls.EXECUTOR_KIND not in ["thread", "process"]:
+            raise ValueError("EXECUTOR_KIND must be one of: thread, process.")
+        if cls.EXECUTOR_WORKERS < 1:
+            raise ValueError("EXECUTOR_WORKERS must be a positive integer.")
+        if cls.EXECUTOR_QUEUE_SIZE < 0:
+            raise ValueError("EXECUTOR_QUEUE_SIZE must be a non-negative integer.")
+        if cls.EXECUTOR_RETRY_AFTER < 0:
+            raise ValueError("EXECUTOR_RETRY_AFTER must be a non-negative integer.")
+        if cls.TILE_EXECUTOR_KIND not in ["thread", "process"]:
+            raise ValueError("TILE_EXECUTOR_KIND must be one of: thread, process.")
+        if cls.EXECUTOR_KIND == "process" and cls.TILE_EXECUTOR_KIND == "process":
+            raise ValueError("TILE_EXECUTOR_KIND cannot be process when EXECUTOR_KIND is process.")
+        if cls.TILE_WORKERS < 1 or cls.TILE_MIN_ROWS < 1:
+            raise ValueError("TILE_WORKERS and TILE_MIN_ROWS must be positive integers.")
+        if cls.BATCH_MAX_FILES < 1:
+            raise ValueError("BATCH_MAX_FILES must be a positive integer.")
+        if cls.RESULT_CACHE_MEMORY_BYTES < 0 or cls.RESULT_CACHE_DISK_BYTES < 0:
+            raise ValueError("RESULT_CACHE_MEMORY_BYTES and RESULT_CACHE_DISK_BYTES must be non-negative integers.")
+        if cls.RESULT_CACHE_TTL < 0:
+            raise ValueError("RESULT_CACHE_TTL must be a non-negative integer.")
+        if cls.STREAM_MIN_PIXELS < 0:
+            raise ValueError("STREAM_MIN_PIXELS must be a non-negative integer.")
+        if cls.STREAM_CHUNK_BYTES < 1:
+            raise ValueError("STREAM_CHUNK_BYTES must be a positive integer.")
         
     @classmethod
     def get_info(cls) -> str:
@@ -41,4 +98,20 @@ class Settings:
             "DEBUG": cls.DEBUG,
             "ALLOWED_HOSTS": cls.ALLOWED_HOSTS,
             "LOG_LEVEL": cls.LOG_LEVEL,
+            "CCL_TILE_SIZE": cls.CCL_TILE_SIZE,
+            "CCL_WORKERS": cls.CCL_WORKERS,
+            "EXECUTOR_KIND": cls.EXECUTOR_KIND,
+            "EXECUTOR_WORKERS": cls.EXECUTOR_WORKERS,
+            "EXECUTOR_QUEUE_SIZE": cls.EXECUTOR_QUEUE_SIZE,
+            "EXECUTOR_RETRY_AFTER": cls.EXECUTOR_RETRY_AFTER,
+            "TILE_EXECUTOR_KIND": cls.TILE_EXECUTOR_KIND,
+            "TILE_WORKERS": cls.TILE_WORKERS,
+            "TILE_MIN_ROWS": cls.TILE_MIN_ROWS,
+            "BATCH_MAX_FILES": cls.BATCH_MAX_FILES,
+            "RESULT_CACHE_MEMORY_BYTES": cls.RESULT_CACHE_MEMORY_BYTES,
+            "RESULT_CACHE_DIR": cls.RESULT_CACHE_DIR,
+            "RESULT_CACHE_DISK_BYTES": cls.RESULT_CACHE_DISK_BYTES,
+            "RESULT_CACHE_TTL": cls.RESULT_CACHE_TTL,
+            "STREAM_MIN_PIXELS": cls.STREAM_MIN_PIXELS,
+            "STREAM_CHUNK_BYTES": cls.STREAM_CHUNK_BYTES,
         }
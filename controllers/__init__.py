@@ -6,6 +6,8 @@ from .freeman_chain_controller import FreemanChainController
 from .object_count_controller import ObjectCountController
 from .box_filter_controller import BoxFilterController
 from .segmentation_filter_controller import SegmentationFilterController
+from .pipeline_controller import PipelineController
+from .batch_controller import BatchController
 
 
 __all__ = [
@@ -16,5 +18,7 @@ __all__ = [
     "FreemanChainController",
     "ObjectCountController",
     "BoxFilterController",
-    "SegmentationFilterController"
+    "SegmentationFilterController",
+    "PipelineController",
+    "BatchController"
 ]
\ No newline at end of file
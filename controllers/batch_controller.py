@@ -0,0 +1,191 @@
+from fastapi import UploadFile
+from fastapi.exceptions import HTTPException
+from fastapi.responses import Response, StreamingResponse
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Tuple
+from utils.image_utils import ImageSource
+from config import Settings
+import asyncio
+import io
+import json
+import mimetypes
+import os
+import re
+import uuid
+import zipfile
+
+
+class _ChunkWriter(io.RawIOBase):
+    """Unseekable sink that hands zipfile output back in chunks."""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+class BatchController:
+    """
+    Runs a single-image controller over many uploads.
+
+    Items are processed concurrently, bounded by the executor size, and
+    streamed back in completion order as a zip archive or a multipart/mixed
+    body. A failed item does not fail the batch: its status code and detail
+    are written in its place as JSON.
+    """
+
+    ARCHIVES = ("zip", "multipart")
+
+    # Times an item rejected with 503 (executor busy) is retried before its error is kept
+    BUSY_RETRIES = 10
+
+    @staticmethod
+    async def process_batch(
+        files: List[UploadFile],
+        handler: Callable[[ImageSource], Awaitable[Response]],
+        name: str,
+        archive: str = "zip",
+    ) -> StreamingResponse:
+        """
+        Process every upload with handler and stream the results.
+
+        Args:
+            files: Uploaded images
+            handler: Controller call for one image, e.g. a lambda around CannyController
+            name: Algorithm name, used for the archive file name
+            archive: "zip" or "multipart"
+
+        Returns:
+            Streaming zip (with a trailing manifest.json) or multipart/mixed response
+        """
+        if archive not in BatchController.ARCHIVES:
+            raise HTTPException(status_code=400, detail=f"Invalid archive: {archive}. Choose 'zip' or 'multipart'")
+        if not files:
+            raise HTTPException(status_code=400, detail="At least one file is required")
+        if len(files) > Settings.BATCH_MAX_FILES:
+            raise HTTPException(status_code=400, detail=f"A batch can have at most {Settings.BATCH_MAX_FILES} files")
+
+        results = BatchController.completed(files, handler)
+        if archive == "multipart":
+            boundary = uuid.uuid4().hex
+            return StreamingResponse(
+                BatchController.multipart_chunks(results, boundary),
+                media_type=f"multipart/mixed; boundary={boundary}"
+            )
+
+        return StreamingResponse(
+            BatchController.zip_chunks(results),
+            media_type="application/zip",
+            headers={"Content-Disposition": f'attachment; filename="{name}_batch.zip"'}
+        )
+
+    @staticmethod
+    async def completed(
+        files: List[UploadFile],
+        handler: Callable[[ImageSource], Awaitable[Response]],
+    ) -> AsyncIterator[Tuple[str, int, str, bytes]]:
+        """Yield (entry name, status code, media type, body) for each item as it finishes."""
+        # At most one item per worker in flight, so a batch alone never fills the executor's
+        # queue; concurrent requests still can, which handle() answers by retrying
+        slots = asyncio.Semaphore(Settings.EXECUTOR_WORKERS)
+
+        async def run(index: int, upload: UploadFile) -> Tuple[str, int, str, bytes]:
+            stem = os.path.splitext(os.path.basename(upload.filename or ""))[0]
+            stem = re.sub(r"[^\w.-]", "_", stem) or "image"
+            base_name = f"{index:04d}_{stem}"
+            async with slots:
+                try:
+                    response = await BatchController.handle(handler, upload)
+                    body = await BatchController.read_body(response)
+                except HTTPException as e:
+                    return base_name + ".error.json", e.status_code, "application/json", json.dumps({
+                        "status_code": e.status_code, "detail": e.detail
+                    }).encode()
+                except Exception as e:
+                    return base_name + ".error.json", 500, "application/json", json.dumps({
+                        "status_code": 500, "detail": str(e)
+                    }).encode()
+
+            return base_name + BatchController.extension(response), response.status_code, response.media_type, body
+
+        tasks = [asyncio.ensure_future(run(index, upload)) for index, upload in enumerate(files)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # The client may disconnect mid-stream; drop whatever has not started
+            for task in tasks:
+                task.cancel()
+
+    @staticmethod
+    async def handle(handler: Callable[[ImageSource], Awaitable[Response]], upload: UploadFile) -> Response:
+        """Call handler on one upload, waiting Retry-After and trying again while the executor is busy."""
+        for attempt in range(BatchController.BUSY_RETRIES + 1):
+            # A previous attempt may have read the upload
+            upload.file.seek(0)
+            try:
+                return await handler(upload.file)
+            except HTTPException as e:
+                if e.status_code != 503 or attempt == BatchController.BUSY_RETRIES:
+                    raise
+                try:
+                    retry_after = float((e.headers or {}).get("Retry-After", 1))
+                except ValueError:
+                    retry_after = 1.0
+                await asyncio.sleep(retry_after)
+
+    @staticmethod
+    async def read_body(response: Response) -> bytes:
+        """Body of a response; streamed (large) results are collected, since an entry is written whole."""
+        if isinstance(response, StreamingResponse):
+            return b"".join([chunk async for chunk in response.body_iterator])
+        return response.body
+
+    @staticmethod
+    def extension(response: Response) -> str:
+        """File extension for a response, from Content-Disposition or the media type."""
+        match = re.search(r'filename="[^"]*?(\.[^".]+)"', response.headers.get("content-disposition", ""))
+        if match:
+            return match.group(1)
+        media_type = (response.media_type or "").split(";")[0]
+        return mimetypes.guess_extension(media_type) or ".bin"
+
+    @staticmethod
+    async def zip_chunks(results: AsyncIterator[Tuple[str, int, str, bytes]]) -> AsyncIterator[bytes]:
+        """Stream a zip archive, one entry per result, followed by manifest.json."""
+        sink = _ChunkWriter()
+        manifest: List[Dict] = []
+
+        # Outputs are PNG or small JSON documents, so entries are stored without recompression
+        with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED) as archive:
+            async for entry_name, status_code, media_type, body in results:
+                archive.writestr(entry_name, body)
+                manifest.append({"name": entry_name, "status_code": status_code, "media_type": media_type})
+                yield sink.drain()
+
+            archive.writestr("manifest.json", json.dumps(manifest, indent=2))
+        yield sink.drain()
+
+    @staticmethod
+    async def multipart_chunks(results: AsyncIterator[Tuple[str, int, str, bytes]], boundary: str) -> AsyncIterator[bytes]:
+        """Stream a multipart/mixed body, one part per result; X-Status-Code carries the item status."""
+        async for entry_name, status_code, media_type, body in results:
+            headers = (
+                f"--{boundary}\r\n"
+                f"Content-Type: {media_type}\r\n"
+                f'Content-Disposition: attachment; filename="{entry_name}"\r\n'
+                f"X-Status-Code: {status_code}\r\n"
+                "\r\n"
+            )
+            yield headers.encode() + body + b"\r\n"
+
+        yield f"--{boundary}--\r\n".encode()
@@ -1,24 +1,48 @@
 from fastapi.responses import Response
 from services.box_filter_service import BoxFilterService
-from utils.image_utils import ImageUtils
+from utils.image_utils import ImageSource
+from utils.service_executor import ServiceExecutor
+from utils.result_cache import ResultCache
+from utils.image_encoding import ImageEncoder
 from typing import Optional
+import asyncio
 
 class BoxFilterController:
     @staticmethod
     async def process_image(
-        image_path: str,
+        image_source: ImageSource,
         box_size: Optional[int] = 3,
+        box_width: Optional[int] = None,
+        box_height: Optional[int] = None,
+        max_side: Optional[int] = None,
+        output_format: str = "png",
+        compression_level: Optional[int] = None,
     ) -> Response:
         """
         Process image with box filter.
         
         Args:
-            image_path: Path to input image
+            image_source: Input image (path, encoded bytes, file object or array)
             box_size: Size of the box kernel (default: 3)
+            box_width: Box width, defaults to box_size
+            box_height: Box height, defaults to box_size
+            max_side: Downscale while decoding so the longest side fits this many pixels
+            output_format: Output encoding, see ImageEncoder
+            compression_level: zlib level 0-9 for PNG and WebP, None for the default
         
         Returns:
-            Filtered image as PNG response
+            Filtered image in the requested output format
         """
-        result_image = BoxFilterService.process_image(image_path, box_size)
-        image_bytes = ImageUtils.image_to_bytes(result_image)
-        return Response(content=image_bytes, media_type="image/png")
\ No newline at end of file
+        ImageEncoder.validate(output_format, compression_level)
+        cache_key = await asyncio.to_thread(
+            ResultCache.make_key, image_source, "box_filter", box_size=box_size, box_width=box_width, box_height=box_height, max_side=max_side,
+            output_format=output_format, compression_level=compression_level
+        )
+        cached = await asyncio.to_thread(ResultCache.get, cache_key)
+        if cached is None:
+            result_image = await ServiceExecutor.run(BoxFilterService.process_image, image_source, box_size, box_width, box_height, max_side)
+            if ImageEncoder.should_stream(result_image):
+                return ImageEncoder.streaming_response(result_image, output_format, compression_level, "box_filter")
+            encoded = await asyncio.to_thread(ImageEncoder.encode, result_image, output_format, compression_level, "box_filter")
+            cached = await asyncio.to_thread(ResultCache.put, cache_key, *encoded)
+        return cached.to_response()
\ No newline at end of file
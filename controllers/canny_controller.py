@@ -1,31 +1,54 @@
 from fastapi.responses import Response
 from services.canny_service import CannyService
-from utils.image_utils import ImageUtils
+from utils.image_utils import ImageSource
+from utils.service_executor import ServiceExecutor
+from utils.result_cache import ResultCache
+from utils.image_encoding import ImageEncoder
 from typing import Optional
+import asyncio
 
 
 class CannyController:
     @staticmethod
     async def process_image_controller(
-        image_path: str,
+        image_source: ImageSource,
         sigma: float,
         low_threshold: float,
-        high_threshold: float
+        high_threshold: float,
+        interpolate_nms: bool = False,
+        max_side: Optional[int] = None,
+        output_format: str = "png",
+        compression_level: Optional[int] = None
     ) -> Response:
         """
         Process image with Canny edge detection.
         
         Args:
-            image_path: Path to input image
+            image_source: Input image (path, encoded bytes, file object or array)
             sigma: Standard deviation for Gaussian smoothing
             low_threshold: Lower threshold for hysteresis (0-1)
             high_threshold: Upper threshold for hysteresis (0-1)
+            interpolate_nms: Use subpixel (interpolated) non-maximum suppression
+            max_side: Downscale while decoding so the longest side fits this many pixels
+            output_format: Output encoding, see ImageEncoder
+            compression_level: zlib level 0-9 for PNG and WebP, None for the default
         
         Returns:
-            Edge detected image as PNG response
+            Edge detected image in the requested output format
         """
-        result_image = CannyService.process_image(
-            image_path, sigma, low_threshold, high_threshold
+        ImageEncoder.validate(output_format, compression_level)
+        cache_key = await asyncio.to_thread(
+            ResultCache.make_key, image_source, "canny", sigma=sigma, low_threshold=low_threshold,
+            high_threshold=high_threshold, interpolate_nms=interpolate_nms, max_side=max_side,
+            output_format=output_format, compression_level=compression_level
         )
-        image_bytes = ImageUtils.image_to_bytes(result_image)
-        return Response(content=image_bytes, media_type="image/png")
\ No newline at end of file
+        cached = await asyncio.to_thread(ResultCache.get, cache_key)
+        if cached is None:
+            result_image = await ServiceExecutor.run(
+                CannyService.process_image, image_source, sigma, low_threshold, high_threshold, interpolate_nms, max_side
+            )
+            if ImageEncoder.should_stream(result_image):
+                return ImageEncoder.streaming_response(result_image, output_format, compression_level, "canny")
+            encoded = await asyncio.to_thread(ImageEncoder.encode, result_image, output_format, compression_level, "canny")
+            cached = await asyncio.to_thread(ResultCache.put, cache_key, *encoded)
+        return cached.to_response()
\ No newline at end of file
@@ -1,34 +1,91 @@
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from services.freeman_chain_service import FreemanChainService
+from typing import Dict, Iterator, Optional, Union
+import json
+from utils.image_utils import ImageSource
+from utils.service_executor import ServiceExecutor
+from utils.result_cache import ResultCache
+import asyncio
 
 
 class FreemanChainController:
     @staticmethod
     async def process_image(
-        image_path: str,
-        threshold: int = 128
-    ) -> JSONResponse:
+        image_source: ImageSource,
+        threshold: int = 128,
+        chain_format: str = "json",
+        compress: bool = False,
+        stream: bool = False,
+        max_side: Optional[int] = None
+    ) -> Union[Response, StreamingResponse]:
         """
         Process image and return Freeman Chain Code.
         
         Args:
-            image_path: Path to input image
+            image_source: Input image (path, encoded bytes, file object or array)
             threshold: Threshold for binarization (0-255)
+            chain_format: Chain code format: "json", "packed", "rle" or "diff"
+            compress: zlib-compress "diff" chain codes
+            stream: Stream contours as NDJSON while they are traced
+            max_side: Downscale while decoding; start points are mapped back to original coordinates
         
         Returns:
-            JSON with chain codes for each contour
+            JSON with chain codes for each contour, or an NDJSON stream with
+            one contour per line and a final {"total_contours", "format"} line
         """
-        result = FreemanChainService.process_image(image_path, threshold)
+        if stream:
+            binary, scale = await ServiceExecutor.run(
+                FreemanChainService.prepare_stream, image_source, threshold, chain_format, max_side
+            )
+            # StreamingResponse iterates sync generators in a worker thread, off the event loop;
+            # the tracing happens there, so the stream holds an admission slot until it ends
+            contours = FreemanChainService.iter_contours(binary, chain_format, compress, scale)
+            return StreamingResponse(
+                ServiceExecutor.hold(FreemanChainController.ndjson_lines(contours, chain_format)),
+                media_type="application/x-ndjson"
+            )
+
+        cache_key = await asyncio.to_thread(
+            ResultCache.make_key, image_source, "freeman_chain", threshold=threshold, chain_format=chain_format, compress=compress,
+            max_side=max_side
+        )
+        cached = await asyncio.to_thread(ResultCache.get, cache_key)
+        if cached is not None:
+            return cached.to_response()
+
+        result = await ServiceExecutor.run(FreemanChainService.process_image, image_source, threshold, chain_format, compress, max_side)
         
-        return JSONResponse(content={
+        content = {
             "total_contours": result["total_contours"],
+            "format": result["format"],
             "contours": [
-                {
-                    "id": idx + 1,
-                    "start_point": contour["start_point"],
-                    "chain_code": contour["chain_code"],
-                    "length": contour["length"]
-                }
+                FreemanChainController.contour_entry(idx + 1, contour)
                 for idx, contour in enumerate(result["contours"])
             ]
-        })
\ No newline at end of file
+        }
+        if "scale" in result:
+            content["scale"] = result["scale"]
+        response = JSONResponse(content=content)
+        await asyncio.to_thread(ResultCache.put, cache_key, response.body, "application/json")
+        return response
+
+    @staticmethod
+    def contour_entry(contour_id: int, contour: Dict) -> Dict:
+        """Shape a contour for the response."""
+        return {
+            "id": contour_id,
+            "start_point": contour["start_point"],
+            "chain_code": contour["chain_code"],
+            "length": contour["length"],
+            "is_hole": contour["is_hole"]
+        }
+
+    @staticmethod
+    def ndjson_lines(contours: Iterator[Dict], chain_format: str) -> Iterator[str]:
+        """Serialize contours as NDJSON lines, followed by a trailer with the total."""
+        total_contours = 0
+        for contour in contours:
+            total_contours += 1
+            yield json.dumps(FreemanChainController.contour_entry(total_contours, contour), separators=(",", ":")) + "\n"
+
+        yield json.dumps({"total_contours": total_contours, "format": chain_format}) + "\n"
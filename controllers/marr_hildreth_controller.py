@@ -1,29 +1,52 @@
 from fastapi.responses import Response
 from services.marr_hildreth_service import MarrHildrethService
-from utils.image_utils import ImageUtils
+from utils.image_utils import ImageSource
+from utils.service_executor import ServiceExecutor
+from utils.result_cache import ResultCache
+from utils.image_encoding import ImageEncoder
 from typing import Optional
+import asyncio
 
 
 class MarrHildrethController:
     @staticmethod
     async def process_image_controller(
-        image_path: str,
+        image_source: ImageSource,
         sigma: float,
-        threshold: Optional[float]
+        threshold: Optional[float],
+        zero_crossing_mode: str = "window",
+        max_side: Optional[int] = None,
+        output_format: str = "png",
+        compression_level: Optional[int] = None
     ) -> Response:
         """
         Process image with Marr-Hildreth edge detection.
         
         Args:
-            image_path: Path to input image
+            image_source: Input image (path, encoded bytes, file object or array)
             sigma: Standard deviation for Laplacian of Gaussian
             threshold: Threshold for zero-crossing detection
+            zero_crossing_mode: "window" (3x3 min/max) or "opposing" (opposing neighbor pairs)
+            max_side: Downscale while decoding so the longest side fits this many pixels
+            output_format: Output encoding, see ImageEncoder
+            compression_level: zlib level 0-9 for PNG and WebP, None for the default
         
         Returns:
-            Edge detected image as PNG response
+            Edge detected image in the requested output format
         """
-        result_image = MarrHildrethService.process_image(
-            image_path, sigma, threshold
+        ImageEncoder.validate(output_format, compression_level)
+        cache_key = await asyncio.to_thread(
+            ResultCache.make_key, image_source, "marr_hildreth", sigma=sigma, threshold=threshold, zero_crossing_mode=zero_crossing_mode,
+            max_side=max_side,
+            output_format=output_format, compression_level=compression_level
         )
-        image_bytes = ImageUtils.image_to_bytes(result_image)
-        return Response(content=image_bytes, media_type="image/png")
+        cached = await asyncio.to_thread(ResultCache.get, cache_key)
+        if cached is None:
+            result_image = await ServiceExecutor.run(
+                MarrHildrethService.process_image, image_source, sigma, threshold, zero_crossing_mode, max_side
+            )
+            if ImageEncoder.should_stream(result_image):
+                return ImageEncoder.streaming_response(result_image, output_format, compression_level, "marr_hildreth")
+            encoded = await asyncio.to_thread(ImageEncoder.encode, result_image, output_format, compression_level, "marr_hildreth")
+            cached = await asyncio.to_thread(ResultCache.put, cache_key, *encoded)
+        return cached.to_response()
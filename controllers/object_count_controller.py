@@ -1,23 +1,44 @@
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from services.object_count_service import ObjectCountService
+from utils.image_utils import ImageSource
+from utils.service_executor import ServiceExecutor
+from utils.result_cache import ResultCache
+from typing import Optional
+import asyncio
 
 
 class ObjectCountController:
     @staticmethod
     async def process_image(
-        image_path: str,
+        image_source: ImageSource,
         threshold: int = 128,
-        method: str = "ccl"
-    ) -> JSONResponse:
+        method: str = "ccl",
+        connectivity: int = 4,
+        chain_format: str = "json",
+        compress: bool = False,
+        max_side: Optional[int] = None
+    ) -> Response:
         """
         Count objects in image.
         
         Args:
-            image_path: Path to input image
+            image_source: Input image (path, encoded bytes, file object or array)
             threshold: Threshold for binarization (0-255)
+            method: "ccl" or "freeman"
+            connectivity: Pixel connectivity for CCL (4 or 8)
+            chain_format: Chain code format for "freeman"
+            compress: zlib-compress "diff" chain codes
+            max_side: Downscale while decoding; results are mapped back to original coordinates
         
         Returns:
             JSON with object count
         """
-        result = ObjectCountService.process_image(image_path, threshold, method)
-        return JSONResponse(content=result)
\ No newline at end of file
+        cache_key = await asyncio.to_thread(
+            ResultCache.make_key, image_source, "object_count", threshold=threshold, method=method,
+            connectivity=connectivity, chain_format=chain_format, compress=compress, max_side=max_side
+        )
+        cached = await asyncio.to_thread(ResultCache.get, cache_key)
+        if cached is None:
+            result = await ServiceExecutor.run(ObjectCountService.process_image, image_source, threshold, method, connectivity, chain_format, compress, max_side)
+            cached = await asyncio.to_thread(ResultCache.put, cache_key, JSONResponse(content=result).body, "application/json")
+        return cached.to_response()
\ No newline at end of file
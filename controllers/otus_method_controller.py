@@ -1,22 +1,46 @@
 from fastapi.responses import Response
 from services.otsu_method_service import OtsuMethodService
-from utils.image_utils import ImageUtils
+from utils.image_utils import ImageSource
+from utils.service_executor import ServiceExecutor
+from utils.result_cache import ResultCache
+from utils.image_encoding import ImageEncoder
+from typing import Optional
+import asyncio
 
 
 class OtusMethodController:
     @staticmethod
     async def process_image(
-        image_path: str,
+        image_source: ImageSource,
+        num_thresholds: int = 1,
+        max_side: Optional[int] = None,
+        output_format: str = "png",
+        compression_level: Optional[int] = None,
     ) -> Response:
         """
         Process image with Otsu's automatic thresholding.
         
         Args:
-            image_path: Path to input image
+            image_source: Input image (path, encoded bytes, file object or array)
+            num_thresholds: Number of thresholds (1 for binary, 2-4 for multi-level)
+            max_side: Downscale while decoding so the longest side fits this many pixels
+            output_format: Output encoding, see ImageEncoder
+            compression_level: zlib level 0-9 for PNG and WebP, None for the default
         
         Returns:
-            Binary image as PNG response
+            Thresholded image in the requested output format, thresholds in the X-Otsu-Thresholds header
         """
-        result_image = OtsuMethodService.process_image(image_path)
-        image_bytes = ImageUtils.image_to_bytes(result_image)
-        return Response(content=image_bytes, media_type="image/png")
+        ImageEncoder.validate(output_format, compression_level)
+        cache_key = await asyncio.to_thread(
+            ResultCache.make_key, image_source, "otsu", num_thresholds=num_thresholds, max_side=max_side,
+            output_format=output_format, compression_level=compression_level
+        )
+        cached = await asyncio.to_thread(ResultCache.get, cache_key)
+        if cached is None:
+            result_image, thresholds = await ServiceExecutor.run(OtsuMethodService.process_image, image_source, num_thresholds, max_side)
+            headers = {"X-Otsu-Thresholds": ",".join(str(threshold) for threshold in thresholds)}
+            if ImageEncoder.should_stream(result_image):
+                return ImageEncoder.streaming_response(result_image, output_format, compression_level, "otsu", headers)
+            encoded = await asyncio.to_thread(ImageEncoder.encode, result_image, output_format, compression_level, "otsu")
+            cached = await asyncio.to_thread(ResultCache.put, cache_key, encoded.content, encoded.media_type, {**(encoded.headers or {}), **headers})
+        return cached.to_response()
@@ -0,0 +1,52 @@
+from fastapi.responses import JSONResponse, Response
+from services.pipeline_service import PipelineService
+from utils.image_utils import ImageSource
+from utils.service_executor import ServiceExecutor
+from utils.result_cache import ResultCache
+from utils.image_encoding import ImageEncoder
+from typing import Optional
+import asyncio
+
+
+class PipelineController:
+    @staticmethod
+    async def process_image(
+        image_source: ImageSource,
+        steps: str,
+        max_side: Optional[int] = None,
+        output_format: str = "png",
+        compression_level: Optional[int] = None,
+    ) -> Response:
+        """
+        Run a chain of filters on an image.
+        
+        Args:
+            image_source: Input image (path, encoded bytes, file object or array)
+            steps: JSON list of steps, see PipelineService
+            max_side: Downscale while decoding so the longest side fits this many pixels
+            output_format: Encoding of a final image, see ImageEncoder
+            compression_level: zlib level 0-9 for PNG and WebP, None for the default
+        
+        Returns:
+            Final image in the requested output format, or JSON when the last step is
+            "object_count" or "freeman_chain"
+        """
+        ImageEncoder.validate(output_format, compression_level)
+        cache_key = await asyncio.to_thread(
+            ResultCache.make_key, image_source, "pipeline", steps=steps, max_side=max_side,
+            output_format=output_format, compression_level=compression_level
+        )
+        cached = await asyncio.to_thread(ResultCache.get, cache_key)
+        if cached is not None:
+            return cached.to_response()
+
+        result = await ServiceExecutor.run(PipelineService.process_image, image_source, steps, max_side)
+        if isinstance(result, dict):
+            cached = await asyncio.to_thread(ResultCache.put, cache_key, JSONResponse(content=result).body, "application/json")
+            return cached.to_response()
+
+        if ImageEncoder.should_stream(result):
+            return ImageEncoder.streaming_response(result, output_format, compression_level, "pipeline")
+        encoded = await asyncio.to_thread(ImageEncoder.encode, result, output_format, compression_level, "pipeline")
+        cached = await asyncio.to_thread(ResultCache.put, cache_key, *encoded)
+        return cached.to_response()
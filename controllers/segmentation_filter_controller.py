@@ -1,20 +1,45 @@
 from fastapi.responses import Response
 from services.segmentation_filter_service import SegmentationFilterService
-from utils.image_utils import ImageUtils
+from utils.image_utils import ImageSource
+from utils.service_executor import ServiceExecutor
+from utils.result_cache import ResultCache
+from utils.image_encoding import ImageEncoder
+from typing import Optional
+import asyncio
 
 
 class SegmentationFilterController:
     @staticmethod
-    async def process_image(image_path: str) -> Response:
+    async def process_image(
+        image_source: ImageSource,
+        intensity_map: Optional[str] = None,
+        max_side: Optional[int] = None,
+        output_format: str = "png",
+        compression_level: Optional[int] = None,
+    ) -> Response:
         """
         Process image with intensity-based segmentation.
         
         Args:
-            image_path: Path to input image
+            image_source: Input image (path, encoded bytes, file object or array)
+            intensity_map: Optional JSON mapping table, see SegmentationFilterService
+            max_side: Downscale while decoding so the longest side fits this many pixels
+            output_format: Output encoding, see ImageEncoder
+            compression_level: zlib level 0-9 for PNG and WebP, None for the default
         
         Returns:
-            Segmented image as PNG
+            Segmented image in the requested output format
         """
-        result_image = SegmentationFilterService.process_image(image_path)
-        image_bytes = ImageUtils.image_to_bytes(result_image)
-        return Response(content=image_bytes, media_type="image/png")
\ No newline at end of file
+        ImageEncoder.validate(output_format, compression_level)
+        cache_key = await asyncio.to_thread(
+            ResultCache.make_key, image_source, "segmentation", intensity_map=intensity_map, max_side=max_side,
+            output_format=output_format, compression_level=compression_level
+        )
+        cached = await asyncio.to_thread(ResultCache.get, cache_key)
+        if cached is None:
+            result_image = await ServiceExecutor.run(SegmentationFilterService.process_image, image_source, intensity_map, max_side)
+            if ImageEncoder.should_stream(result_image):
+                return ImageEncoder.streaming_response(result_image, output_format, compression_level, "segmentation")
+            encoded = await asyncio.to_thread(ImageEncoder.encode, result_image, output_format, compression_level, "segmentation")
+            cached = await asyncio.to_thread(ResultCache.put, cache_key, *encoded)
+        return cached.to_response()
\ No newline at end of file
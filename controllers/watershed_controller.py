@@ -1,24 +1,63 @@
 from fastapi.responses import Response
 from services.watershed_service import Watershed
-from utils.image_utils import ImageUtils
+from utils.image_utils import ImageSource
+from utils.service_executor import ServiceExecutor
+from utils.result_cache import ResultCache
+from utils.image_encoding import ImageEncoder
+from typing import Optional
+import asyncio
 
 
 class WatershedController:
     @staticmethod
     async def process_image(
-        image_path: str,
+        image_source: ImageSource,
         gaussian_sigma: float = 1.0,
+        quantization_levels: int = 256,
+        output: str = "png",
+        max_side: Optional[int] = None,
+        output_format: str = "png",
+        compression_level: Optional[int] = None,
     ) -> Response:
         """
         Process image with Watershed segmentation.
         
         Args:
-            image_path: Path to input image
+            image_source: Input image (path, encoded bytes, file object or array)
             gaussian_sigma: Gaussian smoothing parameter (default: 1.0)
+            quantization_levels: Gradient levels used by the flooding, 256 or 65536
+            output: "png" for the visualization, "npz" for the raw label map
+            max_side: Downscale while decoding so the longest side fits this many pixels
+            output_format: Encoding of the "png" visualization, see ImageEncoder
+            compression_level: zlib level 0-9 for PNG and WebP, None for the default
         
         Returns:
-            Segmented image as PNG response
+            Segmented image in the requested output format, or the label map as an .npz attachment
         """
-        result_image = Watershed.process_image(image_path, gaussian_sigma)
-        image_bytes = ImageUtils.image_to_bytes(result_image)
-        return Response(content=image_bytes, media_type="image/png")
\ No newline at end of file
+        ImageEncoder.validate(output_format, compression_level)
+        cache_key = await asyncio.to_thread(
+            ResultCache.make_key, image_source, "watershed", gaussian_sigma=gaussian_sigma,
+            quantization_levels=quantization_levels, output=output, max_side=max_side,
+            output_format=output_format, compression_level=compression_level
+        )
+        cached = await asyncio.to_thread(ResultCache.get, cache_key)
+        if cached is not None:
+            return cached.to_response()
+
+        result = await ServiceExecutor.run(Watershed.process_image, image_source, gaussian_sigma, quantization_levels, output, max_side)
+        if output == "npz":
+            cached = await asyncio.to_thread(
+                ResultCache.put,
+                cache_key,
+                result,
+                "application/octet-stream",
+                {"Content-Disposition": 'attachment; filename="watershed_labels.npz"'}
+            )
+            return cached.to_response()
+
+        result_image = result
+        if ImageEncoder.should_stream(result_image):
+            return ImageEncoder.streaming_response(result_image, output_format, compression_level, "watershed")
+        encoded = await asyncio.to_thread(ImageEncoder.encode, result_image, output_format, compression_level, "watershed")
+        cached = await asyncio.to_thread(ResultCache.put, cache_key, *encoded)
+        return cached.to_response()
\ No newline at end of file
@@ -8,10 +8,16 @@ from api.routes import (
     freeman_chain_routes,
     object_count_routes,
     box_filter_routes,
-    segmentation_filter_routes
+    segmentation_filter_routes,
+    pipeline_routes
 )
 import uvicorn
 from config import Settings
+from contextlib import asynccontextmanager
+from utils.service_executor import ServiceExecutor
+from utils.result_cache import ResultCache
+from utils.tiling import TiledExecutor
+from utils.connected_components import ConnectedComponents
 import os
 
 
@@ -26,6 +32,31 @@ if os.getenv("ENV") != "production":
     from dotenv import load_dotenv
     load_dotenv()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    ServiceExecutor.configure(
+        settings.EXECUTOR_KIND,
+        settings.EXECUTOR_WORKERS,
+        settings.EXECUTOR_QUEUE_SIZE,
+        settings.EXECUTOR_RETRY_AFTER,
+    )
+    TiledExecutor.configure(
+        settings.TILE_EXECUTOR_KIND,
+        settings.TILE_WORKERS,
+        settings.TILE_MIN_ROWS,
+    )
+    ConnectedComponents.configure(settings.CCL_WORKERS)
+    ResultCache.configure(
+        settings.RESULT_CACHE_MEMORY_BYTES,
+        settings.RESULT_CACHE_DIR,
+        settings.RESULT_CACHE_DISK_BYTES,
+        settings.RESULT_CACHE_TTL,
+    )
+    yield
+    ServiceExecutor.shutdown()
+    TiledExecutor.shutdown()
+    ConnectedComponents.shutdown()
+
 app = FastAPI(
     title="filter-applyer-api",
     description="API para aplicar filtros em imagens",
@@ -34,6 +65,7 @@ app = FastAPI(
     docs_url="/docs" if settings.DEBUG else None,
     redoc_url="/redoc" if settings.DEBUG else None,
     openapi_url="/openapi.json" if settings.DEBUG else None,
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -42,6 +74,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Otsu-Thresholds", "Content-Disposition", "Retry-After"],
 )
 
 app.include_router(marr_hildreth_routes.router)
@@ -52,6 +85,7 @@ app.include_router(freeman_chain_routes.router)
 app.include_router(object_count_routes.router)
 app.include_router(box_filter_routes.router)
 app.include_router(segmentation_filter_routes.router)
+app.include_router(pipeline_routes.router)
 
 # Enquanto o detector de Canny otimiza a localização e a supressão de ruído via gradientes direcionais,
 # o algoritmo de Marr-Hildreth oferece contornos intrinsecamente fechados através de cruzamentos por zero no Laplaciano.
@@ -75,6 +109,10 @@ async def health_check():
 async def get_config():
     return settings.get_info()
 
+@app.get("/cache/stats")
+async def get_cache_stats():
+    return ResultCache.stats()
+
 if __name__ == "__main__":
     uvicorn.run(
         "main:app",
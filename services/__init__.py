@@ -6,6 +6,7 @@ from .freeman_chain_service import FreemanChainService
 from .object_count_service import ObjectCountService
 from .box_filter_service import BoxFilterService
 from .segmentation_filter_service import SegmentationFilterService
+from .pipeline_service import PipelineService
 
 
 __all__ = [
@@ -16,5 +17,6 @@ __all__ = [
     "FreemanChainService",
     "ObjectCountService",
     "BoxFilterService",
-    "SegmentationFilterService"
+    "SegmentationFilterService",
+    "PipelineService"
 ]
\ No newline at end of file
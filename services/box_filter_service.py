@@ -1,53 +1,100 @@
 from typing import Optional
 from fastapi.exceptions import HTTPException
-from utils.image_utils import ImageUtils
+from utils.image_utils import ImageUtils, ImageSource
+from utils.tiling import TiledExecutor
+from functools import partial
 from PIL import Image
 import numpy as np
 
 class BoxFilterService:
     @staticmethod
     def process_image(
-        image_path: str,
+        image_source: ImageSource,
         box_size: Optional[int] = 3,
+        box_width: Optional[int] = None,
+        box_height: Optional[int] = None,
+        max_side: Optional[int] = None,
     ) -> Image.Image:
         try:
             # Load image
-            image = ImageUtils.load_image(image_path)            
-            image_array = ImageUtils.pil_to_numpy(image)
+            image_array = ImageUtils.load_array(image_source, max_side)
 
             # Convert to grayscale if necessary
             if len(image_array.shape) == 3:
                 image_array = np.array(ImageUtils.convert_to_grayscale(ImageUtils.numpy_to_pil(image_array)))
 
             # Apply box filter
-            filtered_image_array = BoxFilterService.box_filter(image_array, box_size)
+            filtered_image_array = BoxFilterService.box_filter(image_array, box_size, box_width, box_height)
 
             result_image = ImageUtils.numpy_to_pil(filtered_image_array)
             
             return result_image
         
+        except ValueError as ve:
+            raise HTTPException(status_code=400, detail=str(ve))
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
         
     @staticmethod
-    def box_filter(image_array: np.ndarray, box_size: int) -> np.ndarray:
+    def box_filter(
+        image_array: np.ndarray,
+        box_size: int,
+        box_width: Optional[int] = None,
+        box_height: Optional[int] = None
+    ) -> np.ndarray:
         """
-        Apply box filter (mean filter) to image.
+        Apply box filter (mean filter) to image using a summed-area table.
+
+        Every box sum takes four lookups in the integral image, so the cost
+        per pixel does not depend on the box size.
         
         Args:
             image_array: Input grayscale image
             box_size: Size of the box kernel (must be odd)
+            box_width: Box width, overrides box_size horizontally
+            box_height: Box height, overrides box_size vertically
         
         Returns:
             Filtered image with reduced noise
         """
-        pad_size = box_size // 2
-        padded_image = np.pad(image_array, pad_size, mode='edge')
-        filtered_image = np.zeros_like(image_array)
+        box_width = box_size if box_width is None else box_width
+        box_height = box_size if box_height is None else box_height
+        if box_width < 1 or box_height < 1:
+            raise ValueError("Box dimensions must be positive integers")
+
+        # Same window placement as a centered box: box // 2 pixels before each pixel
+        pad_top, pad_left = box_height // 2, box_width // 2
+        padded_image = np.pad(
+            image_array,
+            ((pad_top, box_height - 1 - pad_top), (pad_left, box_width - 1 - pad_left)),
+            mode='edge'
+        )
+
+        # Output rows only need box_height padded rows each, so bands run in parallel
+        return TiledExecutor.map_bands(
+            partial(BoxFilterService.box_mean_rows, box_width=box_width, box_height=box_height),
+            padded_image,
+            image_array.shape[0],
+            halo_before=0,
+            halo_after=box_height - 1,
+        ).astype(image_array.dtype)
+
+    @staticmethod
+    def box_mean_rows(padded_rows: np.ndarray, top: int, rows: int, box_width: int, box_height: int) -> np.ndarray:
+        """Band function for TiledExecutor: box means of rows output rows, from edge-padded rows starting at top."""
+        padded_rows = padded_rows[top:top + rows + box_height - 1]
+
+        integral = np.zeros((padded_rows.shape[0] + 1, padded_rows.shape[1] + 1), dtype=np.int64)
+        np.cumsum(padded_rows, axis=0, dtype=np.int64, out=integral[1:, 1:])
+        np.cumsum(integral[1:, 1:], axis=1, out=integral[1:, 1:])
 
-        for i in range(image_array.shape[0]):
-            for j in range(image_array.shape[1]):
-                region = padded_image[i:i + box_size, j:j + box_size]
-                filtered_image[i, j] = np.mean(region)
+        box_sums = (
+            integral[box_height:, box_width:]
+            - integral[:-box_height, box_width:]
+            - integral[box_height:, :-box_width]
+            + integral[:-box_height, :-box_width]
+        )
 
-        return filtered_image
\ No newline at end of file
+        # Round half up in integer arithmetic
+        area = box_width * box_height
+        return (2 * box_sums + area) // (2 * area)
@@ -1,6 +1,6 @@
 from typing import Optional
 from fastapi.exceptions import HTTPException
-from utils.image_utils import ImageUtils
+from utils.image_utils import ImageUtils, ImageSource
 from PIL import Image
 import numpy as np
 
@@ -8,19 +8,20 @@ import numpy as np
 class CannyService:
     @staticmethod
     def process_image(
-        image_path: str,
+        image_source: ImageSource,
         sigma: float,
         low_threshold: float,
-        high_threshold: float
+        high_threshold: float,
+        interpolate_nms: bool = False,
+        max_side: Optional[int] = None
     ) -> Image.Image:
         try:
             # Load image
-            image = ImageUtils.load_image(image_path)            
-            image_array = ImageUtils.pil_to_numpy(image)
+            image_array = ImageUtils.load_array(image_source, max_side)
 
             # Apply Canny edge detection
             threshold, weak, strong = CannyService.canny_edge_detection(
-                image_array, sigma, low_threshold, high_threshold
+                image_array, sigma, low_threshold, high_threshold, interpolate_nms
             )
 
             histerysis_image = CannyService.hysteresis(threshold, weak, strong)
@@ -29,6 +30,8 @@ class CannyService:
             
             return result_image
         
+        except ValueError as ve:
+            raise HTTPException(status_code=400, detail=str(ve))
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
         
@@ -38,6 +41,7 @@ class CannyService:
         sigma: float,
         low_threshold: float,
         high_threshold: float,
+        interpolate_nms: bool = False,
         ) -> np.ndarray:
         """
         Detect edges using Canny algorithm.
@@ -47,6 +51,7 @@ class CannyService:
             sigma: Standard deviation for Gaussian smoothing
             low_threshold: Lower threshold for hysteresis (0-1)
             high_threshold: Upper threshold for hysteresis (0-1)
+            interpolate_nms: Use subpixel (interpolated) non-maximum suppression
         
         Returns:
             Binary edge map
@@ -68,7 +73,7 @@ class CannyService:
 
         gradient_magnitude, angle = ImageUtils.sobel_filters(smoothed_image)
 
-        non_max_suppressed = ImageUtils.non_maximum_suppression(gradient_magnitude, angle)
+        non_max_suppressed = ImageUtils.non_maximum_suppression(gradient_magnitude, angle, interpolate_nms)
 
         high_threshold_value = image_array.max() * high_threshold
         low_threshold_value = high_threshold_value * low_threshold
@@ -93,16 +98,18 @@ class CannyService:
     
     @staticmethod
     def hysteresis(image: np.ndarray, weak: int, strong: int) -> np.ndarray:
-        """Applies hysteresis to track edges."""
-        rows, cols = image.shape
-        for i in range(1, rows - 1):
-            for j in range(1, cols - 1):
-                if image[i, j] == weak:
-                    # Check 8-connected neighbors for strong edge
-                    if ((image[i + 1, j - 1] == strong) or (image[i + 1, j] == strong) or (image[i + 1, j + 1] == strong)
-                        or (image[i, j - 1] == strong) or (image[i, j + 1] == strong)
-                        or (image[i - 1, j - 1] == strong) or (image[i - 1, j] == strong) or (image[i - 1, j + 1] == strong)):
-                        image[i, j] = strong
-                    else:
-                        image[i, j] = 0
-        return image
\ No newline at end of file
+        """
+        Applies hysteresis to track edges.
+
+        Weak and strong pixels are labeled together as 8-connected regions;
+        a region is kept entirely when it contains at least one strong pixel.
+        The result does not depend on scan order.
+        """
+        candidates = ((image == weak) | (image == strong)).astype(np.uint8)
+        labels = ImageUtils.label_connected_components(candidates, connectivity=8)
+
+        keep = np.zeros(labels.max() + 1, dtype=bool)
+        keep[labels[image == strong]] = True
+        keep[0] = False
+
+        return np.where(keep[labels], strong, 0).astype(np.uint8)
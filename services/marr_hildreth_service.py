@@ -1,6 +1,6 @@
 from typing import Optional
 from fastapi.exceptions import HTTPException
-from utils.image_utils import ImageUtils
+from utils.image_utils import ImageUtils, ImageSource
 from PIL import Image
 import numpy as np
 
@@ -8,28 +8,36 @@ import numpy as np
 class MarrHildrethService:
     @staticmethod
     def process_image(
-        image_path: str,
+        image_source: ImageSource,
         sigma: float,
-        threshold: Optional[float]
+        threshold: Optional[float],
+        zero_crossing_mode: str = "window",
+        max_side: Optional[int] = None
     ) -> Image.Image:
         try:
             # Load image
-            image = ImageUtils.load_image(image_path)            
-            image_array = ImageUtils.pil_to_numpy(image)
+            image_array = ImageUtils.load_array(image_source, max_side)
 
             # Apply Marr-Hildreth edge detection
             edges = MarrHildrethService.marr_hildreth_edge_detection(
-                image_array, sigma, threshold
+                image_array, sigma, threshold, zero_crossing_mode
             )
             result_image = ImageUtils.numpy_to_pil(edges)
             
             return result_image
         
+        except ValueError as ve:
+            raise HTTPException(status_code=400, detail=str(ve))
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
         
     @staticmethod
-    def marr_hildreth_edge_detection(image_array: np.ndarray, sigma: float, threshold: float = None) -> np.ndarray:
+    def marr_hildreth_edge_detection(
+        image_array: np.ndarray,
+        sigma: float,
+        threshold: float = None,
+        zero_crossing_mode: str = "window"
+    ) -> np.ndarray:
         if image_array is None:
             raise ValueError("Input image array cannot be None")
         
@@ -48,22 +56,7 @@ class MarrHildrethService:
         filter_2d = ImageUtils.convolve2d(image_array, gaussian)
 
         # Zero-crossing detection
-        rows, cols = filter_2d.shape
-        zero_crossing_image = np.zeros((rows, cols), dtype=np.uint8)
-
-        # Apply threshold if provided
-        if threshold is not None:
-            for i in range(1, rows - 1):
-                for j in range(1, cols - 1):
-                    patch = filter_2d[i-1:i+2, j-1:j+2]
-                    min_val = patch.min()  # Minimum value in the patch
-                    max_val = patch.max()  # Maximum value in the patch
-
-                    # Check for zero-crossing with threshold
-                    if min_val < 0 and max_val > 0 and (max_val - min_val) > threshold:
-                        zero_crossing_image[i, j] = 255
-
-        else:
+        if threshold is None:
             raise ValueError("Threshold must be provided for zero-crossing detection.")
-        
-        return zero_crossing_image
+
+        return ImageUtils.zero_crossings(filter_2d, threshold, zero_crossing_mode)
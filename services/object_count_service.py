@@ -1,43 +1,59 @@
 from fastapi.exceptions import HTTPException
-from utils.image_utils import ImageUtils
+from utils.image_utils import ImageUtils, ImageSource
 from services.freeman_chain_service import FreemanChainService
+from config import Settings
+from typing import Optional, Tuple
 import numpy as np
 
 
 class ObjectCountService:
     @staticmethod
     def process_image(
-        image_path: str,
+        image_source: ImageSource,
         threshold: int = 128,
-        method: str = "ccl"
+        method: str = "ccl",
+        connectivity: int = 4,
+        chain_format: str = "json",
+        compress: bool = False,
+        max_side: Optional[int] = None
     ) -> dict:
         """
         Count objects in image using CCL or Freeman Chain Code.
         
         Args:
-            image_path: Path to input image
+            image_source: Input image (path, encoded bytes, file object or array)
             threshold: Binarization threshold (0-255)
             method: "ccl" (Connected Component Labeling) or "freeman" (Freeman Chain Code)
+            connectivity: Pixel connectivity for CCL (4 or 8)
+            chain_format: Chain code format for "freeman", see ChainCodeEncoder
+            compress: zlib-compress "diff" chain codes
+            max_side: Downscale while decoding so the longest side fits this many
+                pixels; areas, boxes, centroids and start points are mapped back
+                to original coordinates
         
         Returns:
             Dictionary with object count and method-specific information
         """
         try:
             if method == "freeman":
-                # Use Freeman Chain Code to count contours
-                result = FreemanChainService.process_image(image_path, threshold)
+                # Use Freeman Chain Code: every object has exactly one outer contour
+                result = FreemanChainService.process_image(image_source, threshold, chain_format, compress, max_side)
+                object_count = sum(1 for contour in result["contours"] if not contour["is_hole"])
                 
-                return {
-                    "object_count": result["total_contours"],
+                response = {
+                    "object_count": object_count,
                     "threshold_used": threshold,
                     "method": "freeman_chain_code",
+                    "format": result["format"],
                     "contours": result["contours"]  # Include detailed contour data
                 }
+                if "scale" in result:
+                    response["scale"] = result["scale"]
+                return response
             
             elif method == "ccl":
                 # Use Connected Component Labeling (faster and simpler)
-                image = ImageUtils.load_image(image_path)            
-                image_array = ImageUtils.pil_to_numpy(image)
+                image_array, scale = ImageUtils.load_array_with_scale(image_source, max_side)
 
                 # Convert to grayscale if necessary
                 if len(image_array.shape) == 3:
@@ -46,18 +62,31 @@ class ObjectCountService:
                 # Binarize image
                 binary = (image_array > threshold).astype(np.uint8)
 
-                # Apply Connected Component Labeling
-                labeled_image = ImageUtils.label_connected_components(binary)
+                # Apply Connected Component Labeling, measuring each component in the same pass.
+                # Images larger than one tile are labeled tile by tile across the CCL worker pool.
+                if max(binary.shape) > Settings.CCL_TILE_SIZE:
+                    stats = ImageUtils.connected_component_stats_tiled(binary, connectivity, Settings.CCL_TILE_SIZE)
+                else:
+                    _, stats = ImageUtils.label_connected_components_with_stats(binary, connectivity)
+                object_count = stats["area"].size
 
-                # Count unique labels (objects)
-                unique_labels = np.unique(labeled_image)
-                object_count = len(unique_labels) - 1 if 0 in unique_labels else len(unique_labels)
+                objects = [
+                    ObjectCountService.scale_object(label, area, bbox, centroid, scale)
+                    for label, (area, bbox, centroid) in enumerate(
+                        zip(stats["area"], stats["bbox"], stats["centroid"]), start=1
+                    )
+                ]
                 
-                return {
+                response = {
                     "object_count": int(object_count),
                     "threshold_used": threshold,
-                    "method": "connected_component_labeling"
+                    "method": "connected_component_labeling",
+                    "connectivity": connectivity,
+                    "objects": objects
                 }
+                if scale != (1.0, 1.0):
+                    response["scale"] = list(scale)
+                return response
             
             else:
                 raise ValueError(f"Invalid method: {method}. Choose 'ccl' or 'freeman'")
@@ -65,4 +94,31 @@ class ObjectCountService:
         except ValueError as ve:
             raise HTTPException(status_code=400, detail=str(ve))
         except Exception as e:
-            raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+            raise HTTPException(status_code=500, detail=str(e))
+
+    @staticmethod
+    def scale_object(label: int, area, bbox, centroid, scale: Tuple[float, float]) -> dict:
+        """
+        Describe one component, mapping its measurements from the decoded
+        resolution back to the original image.
+
+        Each decoded pixel covers scale[0] x scale[1] original pixels, so the
+        area grows by their product, the box spans the footprints of its edge
+        pixels and the centroid moves with the pixel centers.
+        """
+        row_scale, col_scale = scale
+        min_row, min_col, max_row, max_col = (int(value) for value in bbox)
+        return {
+            "label": label,
+            "area": int(round(int(area) * row_scale * col_scale)),
+            "bbox": [
+                int(min_row * row_scale),
+                int(min_col * col_scale),
+                int((max_row + 1) * row_scale) - 1,
+                int((max_col + 1) * col_scale) - 1,
+            ],
+            "centroid": [
+                round((float(centroid[0]) + 0.5) * row_scale - 0.5, 2),
+                round((float(centroid[1]) + 0.5) * col_scale - 0.5, 2),
+            ]
+        }
\ No newline at end of file
@@ -1,36 +1,57 @@
-from typing import Optional
+from typing import List, Optional, Tuple
 from fastapi.exceptions import HTTPException
-from utils.image_utils import ImageUtils
+from utils.image_utils import ImageUtils, ImageSource
 from PIL import Image
 import numpy as np
 
 
 class OtsuMethodService:
+    # Multi-level Otsu supports up to this many thresholds
+    MAX_THRESHOLDS = 4
+
     @staticmethod
     def process_image(
-        image_path: str,
-    ) -> Image.Image:
+        image_source: ImageSource,
+        num_thresholds: int = 1,
+        max_side: Optional[int] = None,
+    ) -> Tuple[Image.Image, List[int]]:
         try:
             # Load image
-            image = ImageUtils.load_image(image_path)            
-            image_array = ImageUtils.pil_to_numpy(image)
+            image_array = ImageUtils.load_array(image_source, max_side)
 
             # Apply Otsu's method
-            thresholded_image = OtsuMethodService.otsu_thresholding(image_array)
+            thresholded_image, thresholds = OtsuMethodService.otsu_thresholding(image_array, num_thresholds)
 
             result_image = ImageUtils.numpy_to_pil(thresholded_image)
             
-            return result_image
+            return result_image, thresholds
         
+        except ValueError as ve:
+            raise HTTPException(status_code=400, detail=str(ve))
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
         
     @staticmethod
     def otsu_thresholding(
         image_array: np.ndarray,
-        ) -> np.ndarray:
+        num_thresholds: int = 1,
+        ) -> Tuple[np.ndarray, List[int]]:
+        """
+        Threshold an image with Otsu's method.
+
+        Args:
+            image_array: Input image
+            num_thresholds: 1 for a binary image, 2-4 for multi-level Otsu
+
+        Returns:
+            Image with num_thresholds + 1 evenly spaced gray levels (0 and 255
+            for a single threshold) and the thresholds found. Pixels greater
+            than or equal to a threshold go to the class above it.
+        """
         if image_array is None:
             raise ValueError("Input image array cannot be None")
+        if not 1 <= num_thresholds <= OtsuMethodService.MAX_THRESHOLDS:
+            raise ValueError(f"num_thresholds must be between 1 and {OtsuMethodService.MAX_THRESHOLDS}")
         
         # Convert to grayscale if necessary
         if len(image_array.shape) == 3:
@@ -41,40 +62,117 @@ class OtsuMethodService:
             image_array = image_array.astype(np.uint8)
 
         # Compute histogram
-        hist, bin_edges = np.histogram(image_array.flatten(), bins=256, range=(0, 256))
-
-        total_pixels = image_array.size
-        current_max, threshold = 0, 0
-        sum_total, sum_foreground = 0, 0
-        weight_background, weight_foreground = 0, 0
-
-        # Calculate sum of all intensity values
-        for i in range(256):
-            sum_total += i * hist[i]
-
-        # Find optimal threshold
-        for i in range(256):
-            weight_background += hist[i]
-            if weight_background == 0:
-                continue
-            
-            weight_foreground = total_pixels - weight_background
-            if weight_foreground == 0:
-                break
+        hist = np.bincount(image_array.ravel(), minlength=256)
+
+        if num_thresholds == 1:
+            thresholds = [OtsuMethodService.otsu_threshold(hist)]
+        else:
+            thresholds = OtsuMethodService.multi_otsu_thresholds(hist, num_thresholds)
+
+        # Map every class to an evenly spaced gray level with a lookup table
+        levels = np.round(np.linspace(0, 255, num_thresholds + 1)).astype(np.uint8)
+        lut = levels[np.digitize(np.arange(256), thresholds)]
 
-            sum_foreground += i * hist[i]
+        return lut[image_array], thresholds
 
-            mean_background = sum_foreground / weight_background
-            mean_foreground = (sum_total - sum_foreground) / weight_foreground
+    @staticmethod
+    def otsu_threshold(hist: np.ndarray) -> int:
+        """
+        Find the single Otsu threshold of a 256-bin histogram.
+
+        The between-class variance is evaluated for every candidate at once
+        from cumulative sums; the first maximum wins.
+
+        Returns:
+            The first intensity of the foreground class, like
+            multi_otsu_thresholds, so pixels >= threshold are foreground
+        """
+        intensities = np.arange(hist.size, dtype=np.float64)
+        weight_background = np.cumsum(hist, dtype=np.float64)
+        sum_background = np.cumsum(hist * intensities)
+        total_pixels = weight_background[-1]
+        weight_foreground = total_pixels - weight_background
 
-            # Calculate between-class variance
+        valid = (weight_background > 0) & (weight_foreground > 0)
+        if not valid.any():
+            return 0
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean_background = sum_background / weight_background
+            mean_foreground = (sum_background[-1] - sum_background) / weight_foreground
             between_class_variance = weight_background * weight_foreground * (mean_background - mean_foreground) ** 2
 
-            if between_class_variance > current_max:
-                current_max = between_class_variance
-                threshold = i
+        between_class_variance = np.where(valid, between_class_variance, 0)
+        last_background = int(np.argmax(between_class_variance))
+        return last_background + 1 if between_class_variance[last_background] > 0 else 0
+
+    @staticmethod
+    def class_variance_table(hist: np.ndarray) -> np.ndarray:
+        """
+        Lookup table of S(u, v)^2 / P(u, v) for every class spanning bins u..v.
+
+        P and S are the pixel count and intensity sum of the class, taken
+        from cumulative sums. Entries with u > v or empty classes are 0.
+        """
+        intensities = np.arange(hist.size, dtype=np.float64)
+        cumulative_count = np.concatenate(([0.0], np.cumsum(hist, dtype=np.float64)))
+        cumulative_sum = np.concatenate(([0.0], np.cumsum(hist * intensities)))
+
+        count = cumulative_count[None, 1:] - cumulative_count[:-1, None]
+        intensity_sum = cumulative_sum[None, 1:] - cumulative_sum[:-1, None]
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            table = np.where(count > 0, intensity_sum ** 2 / count, 0.0)
+        return np.triu(table)
+
+    @staticmethod
+    def multi_otsu_thresholds(hist: np.ndarray, num_thresholds: int) -> List[int]:
+        """
+        Find num_thresholds Otsu thresholds maximizing the between-class variance.
+
+        Maximizing the variance is equivalent to maximizing the sum of
+        S^2 / P over the classes, which is solved by dynamic programming
+        over the lookup table: O(num_thresholds * 256^2) instead of
+        enumerating every combination of thresholds.
+
+        Returns:
+            Thresholds in increasing order; each is the first intensity of the class above it
+
+        Raises:
+            ValueError: If the histogram has fewer occupied levels than classes,
+                since some classes would be empty and their thresholds arbitrary
+        """
+        levels = int(np.count_nonzero(hist))
+        if levels <= num_thresholds:
+            raise ValueError(
+                f"Image has {levels} distinct gray level(s); num_thresholds must be at most "
+                f"{max(1, levels - 1)} for multi-level Otsu"
+            )
+
+        bins = hist.size
+        table = OtsuMethodService.class_variance_table(hist)
+        upper = np.triu(np.ones((bins, bins), dtype=bool))
+
+        # best[v]: best score splitting bins 0..v into the classes placed so far
+        best = table[0].copy()
+        starts = []
+        for _ in range(num_thresholds):
+            # candidates[u, v]: previous classes cover 0..u-1, the new class covers u..v
+            candidates = np.full((bins, bins), -np.inf)
+            candidates[1:] = best[:-1, None] + table[1:]
+            candidates[~upper] = -np.inf
+            candidates[0] = -np.inf
+
+            start = np.argmax(candidates, axis=0)
+            best = candidates[start, np.arange(bins)]
+            starts.append(start)
 
-        # Apply threshold to create binary image (0 or 255)
-        binary_image = np.where(image_array >= threshold, 255, 0).astype(np.uint8)
+        # Walk back from the last bin to recover where each class starts
+        thresholds = []
+        end = bins - 1
+        for start in reversed(starts):
+            first_bin = int(start[end])
+            thresholds.append(first_bin)
+            end = first_bin - 1
 
-        return binary_image
\ No newline at end of file
+        return sorted(thresholds)
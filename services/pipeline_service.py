@@ -0,0 +1,246 @@
+from typing import Any, Dict, List, Optional, Tuple, Union, get_args, get_origin
+from fastapi.exceptions import HTTPException
+from utils.image_utils import ImageUtils, ImageSource
+from services.box_filter_service import BoxFilterService
+from services.canny_service import CannyService
+from services.freeman_chain_service import FreemanChainService
+from services.marr_hildreth_service import MarrHildrethService
+from services.object_count_service import ObjectCountService
+from services.otsu_method_service import OtsuMethodService
+from services.segmentation_filter_service import SegmentationFilterService
+from services.watershed_service import Watershed
+from PIL import Image
+import numpy as np
+import inspect
+import json
+
+
+class PipelineService:
+    """
+    Chains filters on a single decoded array.
+
+    The image is decoded once, converted to grayscale, and every step hands
+    its NumPy array straight to the next one; only the final result is
+    encoded. Each step is a step_<op> method taking the array followed by
+    the same parameters as the corresponding endpoint.
+    """
+
+    STEPS = (
+        "box_filter",
+        "otsu",
+        "canny",
+        "marr_hildreth",
+        "segmentation",
+        "watershed",
+        "object_count",
+        "freeman_chain",
+    )
+
+    # These steps return JSON instead of an image, so they can only come last
+    TERMINAL_STEPS = ("object_count", "freeman_chain")
+
+    MAX_STEPS = 16
+
+    @staticmethod
+    def process_image(image_source: ImageSource, steps: str, max_side: Optional[int] = None) -> Union[Image.Image, Dict]:
+        """
+        Run a pipeline of steps on an image.
+
+        Args:
+            image_source: Input image (path, encoded bytes, file object or array)
+            steps: JSON list of steps, e.g.
+                [{"op": "box_filter", "box_size": 5}, {"op": "otsu"}, {"op": "object_count"}]
+            max_side: Downscale while decoding so the longest side fits this many
+                pixels; coordinates in a terminal step's JSON are mapped back to
+                the original image
+
+        Returns:
+            Final image, or the JSON result of a terminal step
+        """
+        try:
+            pipeline = PipelineService.parse_steps(steps)
+
+            # Load image
+            image_array, scale = ImageUtils.load_array_with_scale(image_source, max_side)
+
+            # Convert to grayscale once, every step works on a single channel
+            if len(image_array.shape) == 3:
+                image_array = np.array(ImageUtils.convert_to_grayscale(ImageUtils.numpy_to_pil(image_array)))
+
+            result = image_array
+            for op, params in pipeline:
+                result = getattr(PipelineService, f"step_{op}")(result, **params)
+
+            if isinstance(result, dict):
+                return PipelineService.rescale_result(result, scale)
+            return ImageUtils.numpy_to_pil(result)
+
+        except HTTPException:
+            raise
+        except ValueError as ve:
+            raise HTTPException(status_code=400, detail=str(ve))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+    @staticmethod
+    def parse_steps(steps: str) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Parse and validate a pipeline given as JSON.
+
+        Returns:
+            List of (op, parameters), with parameters checked against the step
+            signature and coerced to its annotated types
+        """
+        try:
+            entries = json.loads(steps)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid steps JSON: {e}")
+
+        if not isinstance(entries, list) or not entries:
+            raise ValueError('steps must be a non-empty list of {"op": ..., <parameters>} objects')
+        if len(entries) > PipelineService.MAX_STEPS:
+            raise ValueError(f"A pipeline can have at most {PipelineService.MAX_STEPS} steps")
+
+        pipeline = []
+        for index, entry in enumerate(entries):
+            if not isinstance(entry, dict) or entry.get("op") not in PipelineService.STEPS:
+                raise ValueError(f"Invalid step {index}: {entry}. 'op' must be one of {PipelineService.STEPS}")
+
+            params = {key: value for key, value in entry.items() if key != "op"}
+            op = entry["op"]
+            if op in PipelineService.TERMINAL_STEPS and index != len(entries) - 1:
+                raise ValueError(f"Step '{op}' returns JSON and must be the last step")
+
+            signature = inspect.signature(getattr(PipelineService, f"step_{op}"))
+            try:
+                signature.bind(None, **params)
+            except TypeError as e:
+                raise ValueError(f"Invalid parameters for step '{op}': {e}")
+
+            params = {
+                name: PipelineService.coerce_param(op, name, value, signature.parameters[name].annotation)
+                for name, value in params.items()
+            }
+            pipeline.append((op, params))
+
+        return pipeline
+
+    @staticmethod
+    def coerce_param(op: str, name: str, value: Any, annotation: Any) -> Any:
+        """
+        Check a step parameter against its annotation.
+
+        int, float, bool and str (optionally Optional) are checked, with
+        integral floats accepted as int and ints as float; other annotations
+        are left to the step's own validation.
+        """
+        allowed = get_args(annotation) if get_origin(annotation) is Union else (annotation,)
+        if value is None and type(None) in allowed:
+            return None
+
+        for expected in allowed:
+            # bool is a subclass of int, but true/false is never a valid number here
+            if expected is bool and isinstance(value, bool):
+                return value
+            if expected is int and isinstance(value, int) and not isinstance(value, bool):
+                return value
+            if expected is int and isinstance(value, float) and value.is_integer():
+                return int(value)
+            if expected is float and isinstance(value, (int, float)) and not isinstance(value, bool):
+                return float(value)
+            if expected is str and isinstance(value, str):
+                return value
+            if expected not in (bool, int, float, str, type(None)):
+                return value
+
+        expected_names = " or ".join(getattr(expected, "__name__", str(expected)) for expected in allowed)
+        raise ValueError(f"Invalid parameter '{name}' for step '{op}': expected {expected_names}, got {value!r}")
+
+    @staticmethod
+    def rescale_result(result: Dict, scale: Tuple[float, float]) -> Dict:
+        """Map the objects or contour start points of a terminal step back to original coordinates."""
+        if scale == (1.0, 1.0):
+            return result
+
+        if "objects" in result:
+            result["objects"] = [
+                ObjectCountService.scale_object(obj["label"], obj["area"], obj["bbox"], obj["centroid"], scale)
+                for obj in result["objects"]
+            ]
+        for contour in result.get("contours", []):
+            contour["start_point"] = ImageUtils.to_original_point(contour["start_point"], scale)
+        result["scale"] = list(scale)
+        return result
+
+    @staticmethod
+    def step_box_filter(
+        image_array: np.ndarray,
+        box_size: int = 3,
+        box_width: Optional[int] = None,
+        box_height: Optional[int] = None,
+    ) -> np.ndarray:
+        return BoxFilterService.box_filter(image_array, box_size, box_width, box_height)
+
+    @staticmethod
+    def step_otsu(image_array: np.ndarray, num_thresholds: int = 1) -> np.ndarray:
+        thresholded_image, _ = OtsuMethodService.otsu_thresholding(image_array, num_thresholds)
+        return thresholded_image
+
+    @staticmethod
+    def step_canny(
+        image_array: np.ndarray,
+        sigma: float = 1.0,
+        low_threshold: float = 0.1,
+        high_threshold: float = 0.3,
+        interpolate_nms: bool = False,
+    ) -> np.ndarray:
+        threshold, weak, strong = CannyService.canny_edge_detection(
+            image_array, sigma, low_threshold, high_threshold, interpolate_nms
+        )
+        return CannyService.hysteresis(threshold, weak, strong)
+
+    @staticmethod
+    def step_marr_hildreth(
+        image_array: np.ndarray,
+        sigma: float = 1.0,
+        threshold: Optional[float] = 0.1,
+        zero_crossing_mode: str = "window",
+    ) -> np.ndarray:
+        return MarrHildrethService.marr_hildreth_edge_detection(image_array, sigma, threshold, zero_crossing_mode)
+
+    @staticmethod
+    def step_segmentation(image_array: np.ndarray, intensity_map: Optional[List[List[int]]] = None) -> np.ndarray:
+        # Reuse the endpoint's validation, which reads the table as JSON
+        table = SegmentationFilterService.parse_intensity_map(
+            None if intensity_map is None else json.dumps(intensity_map)
+        )
+        return SegmentationFilterService.segment_by_intensity(image_array, table)
+
+    @staticmethod
+    def step_watershed(
+        image_array: np.ndarray,
+        gaussian_sigma: float = 1.0,
+        quantization_levels: int = 256,
+    ) -> np.ndarray:
+        labels = Watershed.segment(image_array, gaussian_sigma, quantization_levels)
+        return Watershed.visualize_segments(labels)
+
+    @staticmethod
+    def step_object_count(
+        image_array: np.ndarray,
+        threshold: int = 128,
+        method: str = "ccl",
+        connectivity: int = 4,
+        chain_format: str = "json",
+        compress: bool = False,
+    ) -> Dict:
+        return ObjectCountService.process_image(image_array, threshold, method, connectivity, chain_format, compress)
+
+    @staticmethod
+    def step_freeman_chain(
+        image_array: np.ndarray,
+        threshold: int = 128,
+        chain_format: str = "json",
+        compress: bool = False,
+    ) -> Dict:
+        return FreemanChainService.process_image(image_array, threshold, chain_format, compress)
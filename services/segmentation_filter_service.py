@@ -1,17 +1,34 @@
+from functools import lru_cache
+from typing import Optional, Sequence, Tuple
 from fastapi.exceptions import HTTPException
-from utils.image_utils import ImageUtils
+from utils.image_utils import ImageUtils, ImageSource
 from PIL import Image
 import numpy as np
+import json
 
 
 class SegmentationFilterService:
+    # Default intensity mapping table
+    # Format: (min_value, max_value, new_value)
+    DEFAULT_INTENSITY_MAP = (
+        (0, 50, 25),
+        (51, 100, 75),
+        (101, 150, 125),
+        (151, 200, 175),
+        (201, 255, 255)
+    )
+
     @staticmethod
-    def process_image(image_path: str) -> Image.Image:
+    def process_image(
+        image_source: ImageSource,
+        intensity_map: Optional[str] = None,
+        max_side: Optional[int] = None
+    ) -> Image.Image:
         """
         Apply intensity-based segmentation to image.
-        Maps intensity ranges to specific values according to predefined table.
+        Maps intensity ranges to specific values according to a mapping table.
         
-        Mapping table:
+        Default mapping table:
         - [0, 50]     -> 25
         - [51, 100]   -> 75
         - [101, 150]  -> 125
@@ -19,15 +36,18 @@ class SegmentationFilterService:
         - [201, 255]  -> 255
         
         Args:
-            image_path: Path to input image
+            image_source: Input image (path, encoded bytes, file object or array)
+            intensity_map: Optional JSON list of [min_value, max_value, new_value] entries
+            max_side: Downscale while decoding so the longest side fits this many pixels
         
         Returns:
             Segmented image
         """
         try:
+            table = SegmentationFilterService.parse_intensity_map(intensity_map)
+
             # Load image
-            image = ImageUtils.load_image(image_path)
-            image_array = ImageUtils.pil_to_numpy(image)
+            image_array = ImageUtils.load_array(image_source, max_side)
 
             # Convert to grayscale if necessary
             if len(image_array.shape) == 3:
@@ -36,43 +56,95 @@ class SegmentationFilterService:
                 )
 
             # Apply segmentation
-            segmented = SegmentationFilterService.segment_by_intensity(image_array)
+            segmented = SegmentationFilterService.segment_by_intensity(image_array, table)
             
             # Convert back to PIL Image
             result_image = ImageUtils.numpy_to_pil(segmented)
             
             return result_image
         
+        except ValueError as ve:
+            raise HTTPException(status_code=400, detail=str(ve))
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
+
+    @staticmethod
+    def parse_intensity_map(intensity_map: Optional[str]) -> Tuple[Tuple[int, int, int], ...]:
+        """
+        Parse and validate a mapping table given as JSON.
+
+        Args:
+            intensity_map: JSON list of [min_value, max_value, new_value] entries, or None for the default table
+
+        Returns:
+            Mapping table as a tuple of (min_value, max_value, new_value)
+        """
+        if intensity_map is None or not intensity_map.strip():
+            return SegmentationFilterService.DEFAULT_INTENSITY_MAP
+
+        try:
+            entries = json.loads(intensity_map)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid intensity_map JSON: {e}")
+
+        if not isinstance(entries, list) or not entries:
+            raise ValueError("intensity_map must be a non-empty list of [min_value, max_value, new_value] entries")
+
+        table = []
+        for entry in entries:
+            if (not isinstance(entry, list) or len(entry) != 3
+                    or not all(isinstance(value, int) and not isinstance(value, bool) for value in entry)):
+                raise ValueError(f"Invalid intensity_map entry: {entry}. Expected [min_value, max_value, new_value]")
+
+            min_val, max_val, new_val = entry
+            if not (0 <= min_val <= max_val <= 255 and 0 <= new_val <= 255):
+                raise ValueError(f"Invalid intensity_map entry: {entry}. Values must satisfy 0 <= min <= max <= 255 and 0 <= new <= 255")
+            table.append((min_val, max_val, new_val))
+
+        return tuple(table)
+
+    @staticmethod
+    @lru_cache(maxsize=64)
+    def compile_lut(intensity_map: Tuple[Tuple[int, int, int], ...]) -> np.ndarray:
+        """
+        Compile a mapping table into a 256-entry lookup table.
+
+        LUTs are cached by table contents. Later entries win where ranges
+        overlap and unmapped intensities become 0.
+        """
+        lut = np.zeros(256, dtype=np.uint8)
+        for min_val, max_val, new_val in intensity_map:
+            lut[min_val:max_val + 1] = new_val
+        lut.flags.writeable = False
+        return lut
     
     @staticmethod
-    def segment_by_intensity(image_array: np.ndarray) -> np.ndarray:
+    def segment_by_intensity(
+        image_array: np.ndarray,
+        intensity_map: Sequence[Tuple[int, int, int]] = DEFAULT_INTENSITY_MAP
+    ) -> np.ndarray:
         """
         Segment image by intensity ranges.
         
+        uint8 images go through a 256-entry lookup table. Other depths keep
+        the range semantics of the table: values outside every range (such
+        as those above 255 in a 16-bit image) become 0.
+
         Args:
-            image_array: Grayscale image array (0-255)
+            image_array: Grayscale image array
+            intensity_map: Sequence of (min_value, max_value, new_value)
         
         Returns:
             Segmented image with discrete intensity levels
         """
-        # Create output array
-        segmented = np.zeros_like(image_array, dtype=np.uint8)
-        
-        # Define intensity mapping table
-        # Format: (min_value, max_value, new_value)
-        intensity_map = [
-            (0, 50, 25),
-            (51, 100, 75),
-            (101, 150, 125),
-            (151, 200, 175),
-            (201, 255, 255)
-        ]
-        
-        # Apply segmentation based on ranges
-        for min_val, max_val, new_val in intensity_map:
-            mask = (image_array >= min_val) & (image_array <= max_val)
-            segmented[mask] = new_val
-        
-        return segmented
\ No newline at end of file
+        if image_array.dtype != np.uint8:
+            segmented = np.zeros(image_array.shape, dtype=np.uint8)
+            # Later entries win where ranges overlap, as in the LUT
+            for min_val, max_val, new_val in intensity_map:
+                segmented[(image_array >= min_val) & (image_array <= max_val)] = new_val
+            return segmented
+
+        lut = SegmentationFilterService.compile_lut(tuple(tuple(entry) for entry in intensity_map))
+
+        # Single lookup pass, independent of the number of levels
+        return np.take(lut, image_array)
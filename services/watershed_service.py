@@ -1,52 +1,87 @@
-from typing import Optional
+from typing import Optional, Union
 from fastapi.exceptions import HTTPException
-from utils.image_utils import ImageUtils
+from utils.image_utils import ImageUtils, ImageSource
 from PIL import Image
 import numpy as np
 import heapq
+import io
 
 
 class Watershed:
+    # Supported gradient quantization levels for the bucket-queue flooding
+    QUANTIZATION_LEVELS = (256, 65536)
+    # "png": grayscale visualization, "npz": raw int32 label map with per-basin pixel counts
+    OUTPUT_FORMATS = ("png", "npz")
+
     @staticmethod
     def process_image(
-        image_path: str,
+        image_source: ImageSource,
         gaussian_sigma: Optional[float] = 1.0,
-    ) -> Image.Image:
+        quantization_levels: int = 256,
+        output: str = "png",
+        max_side: Optional[int] = None,
+    ) -> Union[Image.Image, bytes]:
         try:
-            # Load image
-            image = ImageUtils.load_image(image_path)            
-            image_array = ImageUtils.pil_to_numpy(image)
-
-            # Convert to grayscale if necessary
-            if len(image_array.shape) == 3:
-                image_array = np.array(ImageUtils.convert_to_grayscale(ImageUtils.numpy_to_pil(image_array)))
-
-            # Apply Gaussian smoothing to reduce noise
-            if gaussian_sigma > 0:
-                gaussian_kernel = ImageUtils.generate_gaussian_kernel(size=5, sigma=gaussian_sigma)
-                image_array = ImageUtils.convolve2d(image_array, gaussian_kernel)
+            if output not in Watershed.OUTPUT_FORMATS:
+                raise ValueError(f"Invalid output: {output}. Choose 'png' or 'npz'")
 
-            # Compute gradient magnitude using Sobel operator
-            sobel_x = np.array([[-1, 0, 1], [-2, 0, 2], [-1, 0, 1]], dtype=np.float32)
-            sobel_y = np.array([[1, 2, 1], [0, 0, 0], [-1, -2, -1]], dtype=np.float32)
-
-            gradient_x = ImageUtils.convolve2d(image_array.astype(np.float32), sobel_x)
-            gradient_y = ImageUtils.convolve2d(image_array.astype(np.float32), sobel_y)
-
-            gradient_magnitude = np.hypot(gradient_x, gradient_y)
+            # Load image
+            image_array = ImageUtils.load_array(image_source, max_side)
+            labels = Watershed.segment(image_array, gaussian_sigma, quantization_levels)
 
-            # Create markers and apply watershed
-            markers = Watershed.create_markers(gradient_magnitude)
-            labels = Watershed.watershed(gradient_magnitude, markers)
+            if output == "npz":
+                return Watershed.export_label_map(labels)
 
             # Create visualization
             result_array = Watershed.visualize_segments(labels)
             result_image = ImageUtils.numpy_to_pil(result_array)
             
             return result_image
+        except ValueError as ve:
+            raise HTTPException(status_code=400, detail=str(ve))
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
         
+    @staticmethod
+    def segment(
+        image_array: np.ndarray,
+        gaussian_sigma: Optional[float] = 1.0,
+        quantization_levels: int = 256,
+    ) -> np.ndarray:
+        """
+        Segment an image into watershed basins.
+
+        Args:
+            image_array: Input image
+            gaussian_sigma: Gaussian smoothing parameter, 0 disables smoothing
+            quantization_levels: Gradient levels used by the flooding, 256 or 65536
+
+        Returns:
+            int32 label map, one label per basin
+        """
+        # Convert to grayscale if necessary
+        if len(image_array.shape) == 3:
+            image_array = np.array(ImageUtils.convert_to_grayscale(ImageUtils.numpy_to_pil(image_array)))
+
+        # Apply Gaussian smoothing to reduce noise
+        if gaussian_sigma > 0:
+            gaussian_kernel = ImageUtils.generate_gaussian_kernel(size=5, sigma=gaussian_sigma)
+            image_array = ImageUtils.convolve2d(image_array, gaussian_kernel)
+
+        # Compute gradient magnitude using Sobel operator
+        sobel_x = np.array([[-1, 0, 1], [-2, 0, 2], [-1, 0, 1]], dtype=np.float32)
+        sobel_y = np.array([[1, 2, 1], [0, 0, 0], [-1, -2, -1]], dtype=np.float32)
+
+        gradient_x = ImageUtils.convolve2d(image_array.astype(np.float32), sobel_x)
+        gradient_y = ImageUtils.convolve2d(image_array.astype(np.float32), sobel_y)
+
+        gradient_magnitude = np.hypot(gradient_x, gradient_y)
+
+        # Create markers and apply watershed
+        markers = Watershed.create_markers(gradient_magnitude)
+        levels = Watershed.quantize(gradient_magnitude, quantization_levels)
+        return Watershed.watershed_bucket_queue(levels, markers, quantization_levels)
+
     @staticmethod
     def create_markers(gradient_magnitude: np.ndarray) -> np.ndarray:
         """
@@ -60,111 +95,144 @@ class Watershed:
         # Threshold: pixels with gradient < 20 are considered markers
         markers_mask = (grad_norm < 20).astype(np.uint8)
         
-        rows, cols = markers_mask.shape
-        labels = np.zeros((rows, cols), dtype=np.int32)
-        visited = np.zeros((rows, cols), dtype=bool)
-        current_label = 1
-        
-        # Label connected components of markers using flood-fill
-        for i in range(rows):
-            for j in range(cols):
-                if markers_mask[i, j] == 1 and not visited[i, j]:
-                    # Start flood-fill for this component
-                    stack = [(i, j)]
-                    while stack:
-                        ci, cj = stack.pop()
-                        if 0 <= ci < rows and 0 <= cj < cols and markers_mask[ci, cj] == 1 and not visited[ci, cj]:
-                            visited[ci, cj] = True
-                            labels[ci, cj] = current_label
-                            
-                            # Add 4-connected neighbors
-                            for di, dj in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                                ni, nj = ci + di, cj + dj
-                                if 0 <= ni < rows and 0 <= nj < cols and not visited[ni, nj]:
-                                    stack.append((ni, nj))
-                    
-                    current_label += 1
-        
-        return labels
+        # Label connected components of markers (4-connected, raster order)
+        return ImageUtils.label_connected_components(markers_mask, connectivity=4)
     
     @staticmethod
-    def watershed(gradient_magnitude: np.ndarray, markers: np.ndarray) -> np.ndarray:
+    def quantize(gradient_magnitude: np.ndarray, quantization_levels: int = 256) -> np.ndarray:
         """
-        Watershed algorithm using immersion simulation with priority queue.
-        Based on Meyer's flooding algorithm.
+        Quantize the gradient to integer levels 0..quantization_levels - 1.
+
+        Args:
+            gradient_magnitude: Gradient magnitude (float)
+            quantization_levels: 256 or 65536
+        """
+        if quantization_levels not in Watershed.QUANTIZATION_LEVELS:
+            raise ValueError(f"Invalid quantization_levels: {quantization_levels}. Choose 256 or 65536")
+
+        low, high = float(gradient_magnitude.min()), float(gradient_magnitude.max())
+        scale = (quantization_levels - 1) / (high - low) if high > low else 0.0
+        levels = np.floor((gradient_magnitude - low) * scale)
+        return np.clip(levels, 0, quantization_levels - 1).astype(np.uint8 if quantization_levels == 256 else np.uint16)
+
+    @staticmethod
+    def watershed_bucket_queue(levels: np.ndarray, markers: np.ndarray, quantization_levels: int = 256) -> np.ndarray:
+        """
+        Meyer's flooding over a bucket queue (hierarchical queue).
+
+        Pixels are addressed by flat index and kept in one bucket per
+        quantized level. Inside a bucket the smallest index is served first,
+        the same (level, row, column) order as the classic per-pixel
+        priority-queue flooding, so both give the same labels for the same
+        quantized input.
         """
-        rows, cols = gradient_magnitude.shape
-        labels = markers.copy()
-        in_queue = np.zeros((rows, cols), dtype=bool)
-        priority_queue = []
+        rows, cols = levels.shape
+        size = rows * cols
         WATERSHED_LINE = -1
-        
-        # Helper function to get 4-connected neighbors
-        def get_neighbors(i, j):
-            for di, dj in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                ni, nj = i + di, j + dj
-                if 0 <= ni < rows and 0 <= nj < cols:
-                    yield ni, nj
-        
-        # Initialize priority queue with neighbors of marked pixels (seeds)
-        for i in range(rows):
-            for j in range(cols):
-                if labels[i, j] > 0:  # If pixel is a seed
-                    for ni, nj in get_neighbors(i, j):
-                        if labels[ni, nj] == 0 and not in_queue[ni, nj]:
-                            # Enqueue unlabeled neighbors with gradient as priority
-                            heapq.heappush(priority_queue, (float(gradient_magnitude[ni, nj]), ni, nj, labels[i, j]))
-                            in_queue[ni, nj] = True
-        
-        # Process queue in order of increasing gradient (altitude)
-        while priority_queue:
-            _, i, j, source_label = heapq.heappop(priority_queue)
-            
-            # Skip if already labeled
-            if labels[i, j] != 0:
-                continue
-            
-            # Check labels of neighbors
-            neighbor_labels = set()
-            for ni, nj in get_neighbors(i, j):
-                label = labels[ni, nj]
-                if label > 0:  # Positive labels only (ignore watershed lines)
-                    neighbor_labels.add(label)
-            
-            if len(neighbor_labels) == 0:
-                # No labeled neighbors yet: assign source label
-                labels[i, j] = source_label
-            elif len(neighbor_labels) == 1:
-                # All labeled neighbors belong to the same basin
-                labels[i, j] = neighbor_labels.pop()
-            else:
-                # Conflict: neighbors from different basins -> watershed line
-                labels[i, j] = WATERSHED_LINE
-            
-            # Enqueue unlabeled neighbors of this pixel
-            if labels[i, j] > 0:  # Only propagate if not a watershed line
-                for ni, nj in get_neighbors(i, j):
-                    if labels[ni, nj] == 0 and not in_queue[ni, nj]:
-                        heapq.heappush(priority_queue, (float(gradient_magnitude[ni, nj]), ni, nj, labels[i, j]))
-                        in_queue[ni, nj] = True
-        
-        return labels
+
+        # Unlabeled pixels touching a seed form the initial queue
+        seeded = markers > 0
+        touches_seed = np.zeros((rows, cols), dtype=bool)
+        touches_seed[1:] |= seeded[:-1]
+        touches_seed[:-1] |= seeded[1:]
+        touches_seed[:, 1:] |= seeded[:, :-1]
+        touches_seed[:, :-1] |= seeded[:, 1:]
+        initial = np.flatnonzero(touches_seed & (markers == 0))
+
+        # Sorted lists are valid heaps, so every bucket starts ordered by flat index
+        initial_levels = levels.ravel()[initial]
+        order = np.argsort(initial_levels, kind='stable')
+        ordered, ordered_levels = initial[order], initial_levels[order]
+        bounds = np.searchsorted(ordered_levels, np.arange(quantization_levels + 1)).tolist()
+        buckets = [ordered[bounds[k]:bounds[k + 1]].tolist() for k in range(quantization_levels)]
+
+        queued = np.zeros(size, dtype=np.uint8)
+        queued[initial] = 1
+        in_queue = bytearray(queued.tobytes())
+
+        # Python lists and ints are much faster than numpy scalars in the flooding loop
+        labels = markers.astype(np.int32).ravel().tolist()
+        level = levels.ravel().tolist()
+
+        heappush, heappop = heapq.heappush, heapq.heappop
+        current = 0
+        last_row = size - cols
+        while True:
+            while current < quantization_levels and not buckets[current]:
+                current += 1
+            if current == quantization_levels:
+                break
+
+            index = heappop(buckets[current])
+            column = index % cols
+            neighbors = []
+            if index >= cols:
+                neighbors.append(index - cols)
+            if index < last_row:
+                neighbors.append(index + cols)
+            if column > 0:
+                neighbors.append(index - 1)
+            if column < cols - 1:
+                neighbors.append(index + 1)
+
+            # Queued pixels always have a labeled neighbor: the one that queued them
+            basin = 0
+            for neighbor in neighbors:
+                label = labels[neighbor]
+                if label > 0:
+                    if basin == 0:
+                        basin = label
+                    elif label != basin:
+                        basin = WATERSHED_LINE
+                        break
+            labels[index] = basin
+
+            # Enqueue unlabeled neighbors of this pixel, unless it is a watershed line
+            if basin > 0:
+                for neighbor in neighbors:
+                    if labels[neighbor] == 0 and not in_queue[neighbor]:
+                        in_queue[neighbor] = 1
+                        neighbor_level = level[neighbor]
+                        heappush(buckets[neighbor_level], neighbor)
+                        if neighbor_level < current:
+                            current = neighbor_level
+
+        return np.array(labels, dtype=np.int32).reshape(rows, cols)
     
     @staticmethod
     def visualize_segments(labels: np.ndarray) -> np.ndarray:
         """
         Create visualization: map positive labels to grayscale, watershed lines to black.
         """
-        rows, cols = labels.shape
-        output = np.zeros((rows, cols), dtype=np.uint8)
-        
-        max_label = labels.max()
-        if max_label > 0:
-            # Map labels 1..max_label to intensities 1..255
-            for label in range(1, max_label + 1):
-                intensity = int((label / max_label) * 255)
-                output[labels == label] = intensity
-        
+        max_label = int(labels.max())
+        if max_label <= 0:
+            return np.zeros(labels.shape, dtype=np.uint8)
+
+        # Map labels 1..max_label to intensities 1..255 with a single lookup
+        lut = ((np.arange(max_label + 1) / max_label) * 255).astype(np.uint8)
+        lut[0] = 0
+
         # Watershed lines (label == -1) remain black (0)
-        
-        return output
+        return lut[np.maximum(labels, 0)]
+
+    @staticmethod
+    def export_label_map(labels: np.ndarray) -> bytes:
+        """
+        Serialize the label map as a compressed .npz archive.
+
+        Arrays:
+        - labels: int32 label map (-1 for watershed lines)
+        - basin_labels: label of every basin
+        - basin_pixel_counts: pixel count of every basin, aligned with basin_labels
+        """
+        counts = np.bincount(labels[labels > 0].ravel())
+        basin_labels = np.flatnonzero(counts).astype(np.int32)
+
+        buffer = io.BytesIO()
+        np.savez_compressed(
+            buffer,
+            labels=labels.astype(np.int32, copy=False),
+            basin_labels=basin_labels,
+            basin_pixel_counts=counts[basin_labels].astype(np.int64)
+        )
+        return buffer.getvalue()
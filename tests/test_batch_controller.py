@@ -0,0 +1,42 @@
+import asyncio
+import io
+
+from fastapi import UploadFile
+from fastapi.exceptions import HTTPException
+from fastapi.responses import Response
+
+from controllers.batch_controller import BatchController
+
+
+def collect(files, handler):
+    async def run():
+        return [item async for item in BatchController.completed(files, handler)]
+    return asyncio.run(run())
+
+
+def busy():
+    return HTTPException(status_code=503, detail="Server busy, try again later", headers={"Retry-After": "0"})
+
+
+def test_busy_item_is_retried_from_the_start_of_the_upload():
+    attempts = []
+
+    async def handler(image_source):
+        attempts.append(image_source.read())
+        if len(attempts) < 3:
+            raise busy()
+        return Response(content=attempts[-1], media_type="image/png")
+
+    [(name, status_code, media_type, body)] = collect([UploadFile(io.BytesIO(b"data"), filename="a.png")], handler)
+
+    assert attempts == [b"data"] * 3
+    assert (name, status_code, media_type, body) == ("0000_a.png", 200, "image/png", b"data")
+
+
+def test_item_still_busy_after_the_retries_keeps_its_error():
+    async def handler(image_source):
+        raise busy()
+
+    [(name, status_code, _, _)] = collect([UploadFile(io.BytesIO(b"data"), filename="a.png")], handler)
+
+    assert (name, status_code) == ("0000_a.error.json", 503)
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from utils.chain_code_encoding import ChainCodeEncoder
+
+
+def chain_codes():
+    rng = np.random.default_rng(0)
+    codes = [np.zeros(0, dtype=np.uint8), np.array([7], dtype=np.uint8), np.array([0, 0, 0], dtype=np.uint8)]
+    # Lengths 1-17 cover every amount of padding in the last packed byte
+    codes += [rng.integers(0, 8, length).astype(np.uint8) for length in range(1, 18)]
+    codes.append(np.repeat(np.arange(8, dtype=np.uint8), 50))
+    codes.append(rng.integers(0, 8, 1001).astype(np.uint8))
+    return codes
+
+
+@pytest.mark.parametrize("chain_code", chain_codes(), ids=lambda code: f"length{code.size}")
+@pytest.mark.parametrize("chain_format, compress", [
+    ("json", False),
+    ("packed", False),
+    ("rle", False),
+    ("diff", False),
+    ("diff", True),
+])
+def test_round_trip(chain_code, chain_format, compress):
+    payload = ChainCodeEncoder.encode(chain_code, chain_format, compress)
+
+    decoded = ChainCodeEncoder.decode(payload, chain_format, chain_code.size, compress)
+
+    assert decoded.dtype == np.uint8
+    np.testing.assert_array_equal(decoded, chain_code)
+
+
+def test_known_encodings():
+    chain_code = np.array([2, 2, 4, 6, 6, 0], dtype=np.uint8)
+
+    assert ChainCodeEncoder.encode(chain_code, "rle") == [2, 2, 4, 1, 6, 2, 0, 1]
+    assert ChainCodeEncoder.encode(chain_code, "diff") == "202202"
+    # 010 010 100 110 110 000 + 6 bits of padding
+    assert ChainCodeEncoder.encode(chain_code, "packed") == "SmwA"
+
+
+def test_packed_needs_the_length():
+    payload = ChainCodeEncoder.encode(np.array([1, 2, 3], dtype=np.uint8), "packed")
+
+    with pytest.raises(ValueError):
+        ChainCodeEncoder.decode(payload, "packed")
+    with pytest.raises(ValueError):
+        ChainCodeEncoder.decode(payload, "packed", 6)
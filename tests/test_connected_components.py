@@ -0,0 +1,187 @@
+from collections import deque
+
+import numpy as np
+import pytest
+
+from utils.connected_components import ConnectedComponents
+
+
+NEIGHBORS = {
+    4: [(-1, 0), (1, 0), (0, -1), (0, 1)],
+    8: [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)],
+}
+
+
+def flood_fill_labels(binary, connectivity):
+    """Reference labeling: breadth-first flood fill, labels in raster order of each component's first pixel."""
+    height, width = binary.shape
+    labels = np.zeros(binary.shape, dtype=np.int32)
+    count = 0
+    for row in range(height):
+        for col in range(width):
+            if not binary[row, col] or labels[row, col]:
+                continue
+            count += 1
+            labels[row, col] = count
+            queue = deque([(row, col)])
+            while queue:
+                r, c = queue.popleft()
+                for dr, dc in NEIGHBORS[connectivity]:
+                    nr, nc = r + dr, c + dc
+                    if 0 <= nr < height and 0 <= nc < width and binary[nr, nc] and not labels[nr, nc]:
+                        labels[nr, nc] = count
+                        queue.append((nr, nc))
+    return labels
+
+
+def comb(height=40, teeth=15):
+    """Vertical teeth joined only by the last row: every tooth starts as its own provisional label."""
+    binary = np.zeros((height, 2 * teeth - 1), dtype=np.uint8)
+    binary[:, ::2] = 1
+    binary[-1] = 1
+    return binary
+
+
+def spiral(size=41):
+    """A one-pixel square spiral with one-pixel gaps, a single long winding component."""
+    binary = np.zeros((size, size), dtype=np.uint8)
+    directions = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+    row, col, direction, turns = 0, 0, 0, 0
+    binary[row, col] = 1
+    while turns < 2:
+        dr, dc = directions[direction]
+        next_row, next_col = row + dr, col + dc
+        # Stop one pixel short of the previous lap, leaving the gap
+        after_row, after_col = row + 2 * dr, col + 2 * dc
+        inside = 0 <= next_row < size and 0 <= next_col < size
+        gap_kept = not (0 <= after_row < size and 0 <= after_col < size) or not binary[after_row, after_col]
+        if inside and not binary[next_row, next_col] and gap_kept:
+            row, col, turns = next_row, next_col, 0
+            binary[row, col] = 1
+        else:
+            direction, turns = (direction + 1) % 4, turns + 1
+    return binary
+
+
+def shapes():
+    rng = np.random.default_rng(0)
+    cases = [rng.random((31, 47)) < density for density in (0.2, 0.45, 0.6, 0.8)]
+    cases.append(np.indices((20, 20)).sum(axis=0) % 2 == 0)  # Checkerboard: only diagonal neighbors
+    cases += [comb(), comb().T, spiral(), np.zeros((5, 7)), np.ones((5, 7))]
+    return [case.astype(np.uint8) for case in cases]
+
+
+@pytest.mark.parametrize("connectivity", [4, 8])
+@pytest.mark.parametrize("binary", shapes())
+def test_label_matches_flood_fill(binary, connectivity):
+    labels = ConnectedComponents.label(binary, connectivity)
+
+    np.testing.assert_array_equal(labels, flood_fill_labels(binary, connectivity))
+
+
+def test_shapes_have_the_expected_component_counts():
+    checkerboard = (np.indices((20, 20)).sum(axis=0) % 2 == 0).astype(np.uint8)
+
+    assert ConnectedComponents.label(checkerboard, 4).max() == 200
+    assert ConnectedComponents.label(checkerboard, 8).max() == 1
+    assert ConnectedComponents.label(comb(), 4).max() == 1
+    assert ConnectedComponents.label(spiral(), 4).max() == 1
+
+
+@pytest.mark.parametrize("connectivity", [4, 8])
+@pytest.mark.parametrize("binary", shapes())
+def test_stats_match_flood_fill(binary, connectivity):
+    reference = flood_fill_labels(binary, connectivity)
+    _, stats = ConnectedComponents.label_with_stats(binary, connectivity)
+
+    for label in range(1, reference.max() + 1):
+        rows, cols = np.nonzero(reference == label)
+        assert stats["area"][label - 1] == rows.size
+        assert list(stats["bbox"][label - 1]) == [rows.min(), cols.min(), rows.max(), cols.max()]
+        np.testing.assert_allclose(stats["centroid"][label - 1], [rows.mean(), cols.mean()])
+
+
+def test_run_adjacency_links_touching_runs_only():
+    binary = np.array([
+        [1, 1, 0, 0, 1],
+        [0, 0, 1, 0, 1],
+    ], dtype=np.uint8)
+    rows, starts, ends = ConnectedComponents.find_runs(binary)
+
+    four = set(zip(*ConnectedComponents.run_adjacency(rows, starts, ends, binary.shape[1], 4)))
+    eight = set(zip(*ConnectedComponents.run_adjacency(rows, starts, ends, binary.shape[1], 8)))
+
+    # Runs: 0 = row 0 [0, 1], 1 = row 0 [4], 2 = row 1 [2], 3 = row 1 [4]
+    assert four == {(3, 1)}
+    assert eight == {(2, 0), (3, 1)}
+
+
+def test_resolve_equivalences_matches_sequential_union_find():
+    rng = np.random.default_rng(1)
+    count = 200
+    first = rng.integers(0, count, 150)
+    second = rng.integers(0, count, 150)
+
+    parent = list(range(count))
+
+    def find(index):
+        while parent[index] != index:
+            index = parent[index]
+        return index
+
+    for a, b in zip(first, second):
+        root_a, root_b = find(a), find(b)
+        parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    roots = ConnectedComponents.resolve_equivalences(count, first, second)
+
+    assert list(roots) == [find(index) for index in range(count)]
+
+
+def test_resolve_equivalences_collapses_a_long_chain():
+    count = 1000
+    roots = ConnectedComponents.resolve_equivalences(count, np.arange(count - 1, 0, -1), np.arange(count - 2, -1, -1))
+
+    assert (roots == 0).all()
+
+
+@pytest.fixture(params=[1, 3])
+def tile_workers(request):
+    ConnectedComponents.configure(request.param, "thread")
+    yield
+    ConnectedComponents.shutdown()
+
+
+@pytest.mark.parametrize("connectivity", [4, 8])
+@pytest.mark.parametrize("tile_size", [1, 7, 16, 1000])
+@pytest.mark.parametrize("binary", shapes())
+def test_tiled_statistics_match_whole_image(binary, connectivity, tile_size, tile_workers):
+    rows, starts, ends = ConnectedComponents.find_runs(binary)
+    run_labels, count = ConnectedComponents.label_runs(rows, starts, ends, binary.shape[1], connectivity)
+    expected = ConnectedComponents.run_statistics(rows, starts, ends, run_labels, count)
+
+    tiled = ConnectedComponents.tiled_statistics(binary, connectivity, tile_size)
+
+    np.testing.assert_array_equal(tiled["area"], expected["area"])
+    np.testing.assert_array_equal(tiled["bbox"], expected["bbox"])
+    np.testing.assert_allclose(tiled["centroid"], expected["centroid"])
+
+
+@pytest.fixture(params=["thread", "process"])
+def ccl_pool(request):
+    ConnectedComponents.configure(3, request.param)
+    yield
+    ConnectedComponents.shutdown()
+
+
+@pytest.mark.parametrize("connectivity", [4, 8])
+def test_tiled_statistics_on_a_multi_worker_pool(ccl_pool, connectivity):
+    binary = (np.random.default_rng(2).random((97, 130)) < 0.5).astype(np.uint8)
+    _, expected = ConnectedComponents.label_with_stats(binary, connectivity)
+
+    tiled = ConnectedComponents.tiled_statistics(binary, connectivity, 16)
+
+    assert ConnectedComponents._pool is not None
+    np.testing.assert_array_equal(tiled["area"], expected["area"])
+    np.testing.assert_array_equal(tiled["bbox"], expected["bbox"])
+    np.testing.assert_allclose(tiled["centroid"], expected["centroid"])
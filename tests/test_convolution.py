@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+from utils.convolution import ConvolutionEngine
+from utils.image_utils import ImageUtils
+
+
+def reference_convolve2d(image, kernel):
+    """The original pixel loop: edge-replicated correlation, output in the input dtype."""
+    image_height, image_width = image.shape
+    kernel_height, kernel_width = kernel.shape
+    padded_image = np.pad(image, ((kernel_height // 2, kernel_height // 2), (kernel_width // 2, kernel_width // 2)), mode='edge')
+    convolved_image = np.zeros_like(image)
+    for i in range(image_height):
+        for j in range(image_width):
+            convolved_image[i, j] = np.sum(padded_image[i:i + kernel_height, j:j + kernel_width] * kernel)
+    return convolved_image
+
+
+def separable_kernel(height, width):
+    rng = np.random.default_rng(height * 100 + width)
+    return np.outer(rng.random(height), rng.random(width))
+
+
+def general_kernel(height, width):
+    return np.random.default_rng(height * 100 + width + 1).normal(size=(height, width))
+
+
+# Shapes just below, at and just above FFT_AREA_THRESHOLD (49 taps)
+THRESHOLD_SHAPES = [(6, 8), (7, 7), (5, 10)]
+SHAPES = [(1, 3), (3, 1), (2, 2), (3, 3), (4, 6), (5, 5), (6, 3), (9, 9)] + THRESHOLD_SHAPES
+IMAGES = {
+    "square": np.random.default_rng(0).random((32, 32)) * 255,
+    "wide": np.random.default_rng(1).random((13, 41)) * 255,
+    "tiny": np.random.default_rng(2).random((2, 3)) * 255,
+}
+
+
+def assert_close(result, expected):
+    assert result.dtype == expected.dtype
+    np.testing.assert_allclose(result, expected, rtol=1e-9, atol=1e-9)
+
+
+def test_threshold_shapes_straddle_the_fft_threshold():
+    areas = [height * width for height, width in THRESHOLD_SHAPES]
+    assert areas[0] < ConvolutionEngine.FFT_AREA_THRESHOLD <= areas[1] < areas[2]
+
+
+@pytest.mark.parametrize("image_name", IMAGES)
+@pytest.mark.parametrize("shape", SHAPES)
+@pytest.mark.parametrize("method", ["auto", "direct", "fft"])
+def test_general_kernel_matches_pixel_loop(image_name, shape, method):
+    image, kernel = IMAGES[image_name], general_kernel(*shape)
+
+    assert_close(ImageUtils.convolve2d(image, kernel, method), reference_convolve2d(image, kernel))
+
+
+@pytest.mark.parametrize("image_name", IMAGES)
+@pytest.mark.parametrize("shape", [shape for shape in SHAPES if min(shape) > 1])
+@pytest.mark.parametrize("method", ["auto", "separable", "direct", "fft"])
+def test_separable_kernel_matches_pixel_loop(image_name, shape, method):
+    image, kernel = IMAGES[image_name], separable_kernel(*shape)
+
+    assert_close(ImageUtils.convolve2d(image, kernel, method), reference_convolve2d(image, kernel))
+
+
+@pytest.mark.parametrize("sigma", [0.5, 1.0, 1.4])
+def test_log_kernel_matches_pixel_loop(sigma):
+    image = IMAGES["square"]
+    kernel = ImageUtils.generate_gaussian_kernel(0, sigma)
+
+    assert_close(ImageUtils.convolve2d(image, kernel), reference_convolve2d(image, kernel))
+
+
+@pytest.mark.parametrize("shape", [(3, 3), (4, 4), (7, 7)])
+@pytest.mark.parametrize("method", ["separable", "direct"])
+def test_integer_image_keeps_its_dtype_exactly(shape, method):
+    image = np.random.default_rng(3).integers(0, 20, (17, 19)).astype(np.uint8)
+    kernel = np.ones(shape)
+
+    result = ImageUtils.convolve2d(image, kernel, method)
+
+    np.testing.assert_array_equal(result, reference_convolve2d(image, kernel))
+    assert result.dtype == np.uint8
+
+
+def test_non_separable_kernel_is_rejected_by_the_separable_method():
+    with pytest.raises(ValueError):
+        ImageUtils.convolve2d(IMAGES["square"], general_kernel(3, 3), "separable")
@@ -0,0 +1,22 @@
+import asyncio
+import io
+
+import numpy as np
+from PIL import Image
+
+from utils.image_encoding import ImageEncoder
+from utils.service_executor import ServiceExecutor
+
+
+def test_streamed_image_holds_an_admission_slot_until_sent():
+    image = Image.fromarray(np.arange(256 * 64, dtype=np.uint16).reshape(64, 256).astype(np.uint8))
+
+    response = ImageEncoder.streaming_response(image, "png")
+    assert ServiceExecutor.in_flight() == 1
+
+    async def body():
+        return b"".join([chunk async for chunk in response.body_iterator])
+
+    content = asyncio.run(body())
+    assert ServiceExecutor.in_flight() == 0
+    np.testing.assert_array_equal(np.asarray(Image.open(io.BytesIO(content))), np.asarray(image))
@@ -0,0 +1,273 @@
+import io
+import tempfile
+
+import numpy as np
+import pytest
+from fastapi import HTTPException
+from PIL import Image
+
+from services.box_filter_service import BoxFilterService
+from services.canny_service import CannyService
+from services.freeman_chain_service import FreemanChainService
+from services.marr_hildreth_service import MarrHildrethService
+from services.object_count_service import ObjectCountService
+from services.otsu_method_service import OtsuMethodService
+from services.pipeline_service import PipelineService
+from services.segmentation_filter_service import SegmentationFilterService
+from services.watershed_service import Watershed
+from utils.image_utils import ImageUtils
+from utils.tiling import TiledExecutor
+
+
+def encode(image, image_format="PNG", **options):
+    byte_io = io.BytesIO()
+    image.save(byte_io, format=image_format, **options)
+    return byte_io.getvalue()
+
+
+def gradient(width=300, height=200):
+    return np.tile(np.linspace(0, 255, width).astype(np.uint8), (height, 1))
+
+
+@pytest.mark.parametrize("mode, image_format", [
+    ("P", "PNG"),
+    ("P", "GIF"),
+    ("1", "PNG"),
+    ("I;16", "PNG"),
+    ("I", "TIFF"),
+])
+def test_max_side_downscales_every_mode(mode, image_format):
+    image = Image.fromarray(gradient()).convert(mode)
+
+    array, scale = ImageUtils.load_array_with_scale(encode(image, image_format), max_side=100)
+
+    assert max(array.shape[:2]) <= 100
+    assert array.shape[:2] == (67, 100)
+    assert scale == (200 / 67, 3.0)
+
+
+def test_palette_with_transparency_keeps_alpha():
+    image = Image.fromarray(gradient()).convert("P")
+    image.info["transparency"] = 0
+
+    array, _ = ImageUtils.load_array_with_scale(encode(image, transparency=0), max_side=100)
+
+    assert array.shape == (67, 100, 4)
+
+
+@pytest.mark.parametrize("side, max_side, expected", [
+    (300, 149, 100),
+    (300, 150, 150),
+    (300, 75, 75),
+    (1000, 130, 125),
+    (1000, 999, 500),
+])
+def test_jpeg_draft_stays_close_to_max_side(side, max_side, expected):
+    image = Image.fromarray(np.tile(gradient(side, 1), (side, 1)))
+
+    array, _ = ImageUtils.load_array_with_scale(encode(image, "JPEG"), max_side)
+
+    assert max(array.shape) == expected
+
+
+def test_small_image_is_not_resized():
+    array, scale = ImageUtils.load_array_with_scale(encode(Image.fromarray(gradient())), max_side=300)
+
+    assert array.shape == (200, 300)
+    assert scale == (1.0, 1.0)
+
+
+def reference_non_maximum_suppression(gradient_magnitude, gradient_direction):
+    """The original per-pixel loop over four direction sectors."""
+    image_height, image_width = gradient_magnitude.shape
+    suppressed_image = np.zeros((image_height, image_width), dtype=np.float32)
+    angle = gradient_direction * (180.0 / np.pi)
+    angle[angle < 0] += 180
+
+    for i in range(1, image_height - 1):
+        for j in range(1, image_width - 1):
+            q = r = 255
+            if (0 <= angle[i, j] < 22.5) or (157.5 <= angle[i, j] <= 180):
+                q, r = gradient_magnitude[i, j + 1], gradient_magnitude[i, j - 1]
+            elif 22.5 <= angle[i, j] < 67.5:
+                q, r = gradient_magnitude[i + 1, j - 1], gradient_magnitude[i - 1, j + 1]
+            elif 67.5 <= angle[i, j] < 112.5:
+                q, r = gradient_magnitude[i + 1, j], gradient_magnitude[i - 1, j]
+            elif 112.5 <= angle[i, j] < 157.5:
+                q, r = gradient_magnitude[i - 1, j - 1], gradient_magnitude[i + 1, j + 1]
+            if gradient_magnitude[i, j] >= q and gradient_magnitude[i, j] >= r:
+                suppressed_image[i, j] = gradient_magnitude[i, j]
+    return suppressed_image
+
+
+def reference_interpolated_non_maximum_suppression(gradient_magnitude, gradient_direction):
+    """Per-pixel subpixel NMS: bilinear samples one pixel ahead and behind along the gradient."""
+    image_height, image_width = gradient_magnitude.shape
+    suppressed_image = np.zeros((image_height, image_width), dtype=np.float32)
+
+    def sample(row, col):
+        row0 = min(max(int(np.floor(row)), 0), image_height - 2)
+        col0 = min(max(int(np.floor(col)), 0), image_width - 2)
+        row_fraction, col_fraction = row - row0, col - col0
+        top = gradient_magnitude[row0, col0] * (1 - col_fraction) + gradient_magnitude[row0, col0 + 1] * col_fraction
+        bottom = gradient_magnitude[row0 + 1, col0] * (1 - col_fraction) + gradient_magnitude[row0 + 1, col0 + 1] * col_fraction
+        return top * (1 - row_fraction) + bottom * row_fraction
+
+    for i in range(1, image_height - 1):
+        for j in range(1, image_width - 1):
+            # Image rows grow downwards while the Sobel y kernel points up
+            step_row, step_col = -np.sin(gradient_direction[i, j]), np.cos(gradient_direction[i, j])
+            ahead, behind = sample(i + step_row, j + step_col), sample(i - step_row, j - step_col)
+            if gradient_magnitude[i, j] >= ahead and gradient_magnitude[i, j] >= behind:
+                suppressed_image[i, j] = gradient_magnitude[i, j]
+    return suppressed_image
+
+
+def sobel_gradients(shape, seed):
+    image = np.random.default_rng(seed).random(shape) * 255
+    return ImageUtils.sobel_filters(image)
+
+
+def sector_boundary_gradients(shape=(9, 11)):
+    """Directions exactly on and around the sector limits, on a magnitude full of ties."""
+    rng = np.random.default_rng(5)
+    degrees = np.array([-180, -157.5, -112.5, -67.5, -22.5, 0, 22.5, 45, 67.5, 90, 112.5, 157.5, 180])
+    direction = np.deg2rad(rng.choice(degrees, shape))
+    magnitude = rng.integers(0, 3, shape).astype(np.float64)
+    return magnitude, direction
+
+
+NMS_SHAPES = [(1, 1), (1, 12), (12, 1), (2, 7), (3, 3), (16, 23)]
+
+
+@pytest.mark.parametrize("shape", NMS_SHAPES)
+def test_non_maximum_suppression_matches_pixel_loop(shape):
+    magnitude, direction = sobel_gradients(shape, seed=sum(shape))
+
+    result = ImageUtils.non_maximum_suppression(magnitude, direction)
+
+    np.testing.assert_array_equal(result, reference_non_maximum_suppression(magnitude, direction))
+    assert result.dtype == np.float32
+
+
+def test_non_maximum_suppression_matches_pixel_loop_on_sector_limits():
+    magnitude, direction = sector_boundary_gradients()
+
+    np.testing.assert_array_equal(
+        ImageUtils.non_maximum_suppression(magnitude, direction),
+        reference_non_maximum_suppression(magnitude, direction)
+    )
+
+
+@pytest.mark.parametrize("shape", NMS_SHAPES)
+def test_interpolated_non_maximum_suppression_matches_pixel_loop(shape):
+    magnitude, direction = sobel_gradients(shape, seed=sum(shape))
+
+    result = ImageUtils.non_maximum_suppression(magnitude, direction, interpolate=True)
+
+    np.testing.assert_array_equal(result, reference_interpolated_non_maximum_suppression(magnitude, direction))
+    assert result.dtype == np.float32
+
+
+def test_interpolated_non_maximum_suppression_matches_pixel_loop_on_sector_limits():
+    magnitude, direction = sector_boundary_gradients()
+
+    np.testing.assert_array_equal(
+        ImageUtils.non_maximum_suppression(magnitude, direction, interpolate=True),
+        reference_interpolated_non_maximum_suppression(magnitude, direction)
+    )
+
+
+def reference_zero_crossings(laplacian, threshold, mode):
+    """The original 3x3 min/max loop ("window") and its opposing-pairs variant."""
+    rows, cols = laplacian.shape
+    zero_crossing_image = np.zeros((rows, cols), dtype=np.uint8)
+    for i in range(1, rows - 1):
+        for j in range(1, cols - 1):
+            if mode == "window":
+                patch = laplacian[i - 1:i + 2, j - 1:j + 2]
+                min_val, max_val = patch.min(), patch.max()
+                crossing = min_val < 0 and max_val > 0 and (max_val - min_val) > threshold
+            else:
+                pairs = [((i - 1, j), (i + 1, j)), ((i, j - 1), (i, j + 1)),
+                         ((i - 1, j + 1), (i + 1, j - 1)), ((i - 1, j - 1), (i + 1, j + 1))]
+                crossing = any(
+                    np.sign(laplacian[a]) * np.sign(laplacian[b]) < 0 and abs(laplacian[a] - laplacian[b]) > threshold
+                    for a, b in pairs
+                )
+            if crossing:
+                zero_crossing_image[i, j] = 255
+    return zero_crossing_image
+
+
+@pytest.fixture(params=[1, 3])
+def band_workers(request):
+    """Runs zero_crossings whole, or in 2-row bands so most rows sit next to a seam."""
+    TiledExecutor.configure("thread", request.param, min_rows=2)
+    yield request.param
+    TiledExecutor.shutdown()
+
+
+ZERO_CROSSING_SHAPES = [(1, 1), (1, 12), (12, 1), (2, 7), (3, 3), (4, 5), (7, 9), (19, 13)]
+
+
+@pytest.mark.parametrize("mode", ["window", "opposing"])
+@pytest.mark.parametrize("threshold", [0, 1.5, 4])
+@pytest.mark.parametrize("shape", ZERO_CROSSING_SHAPES)
+def test_zero_crossings_match_pixel_loop(shape, threshold, mode, band_workers):
+    # Small integers give exact zeros and differences equal to the threshold
+    laplacian = np.random.default_rng(sum(shape)).integers(-3, 4, shape).astype(np.float64)
+
+    result = ImageUtils.zero_crossings(laplacian, threshold, mode)
+
+    np.testing.assert_array_equal(result, reference_zero_crossings(laplacian, threshold, mode))
+    assert result.dtype == np.uint8
+
+
+@pytest.mark.parametrize("mode", ["window", "opposing"])
+def test_zero_crossings_match_pixel_loop_on_a_log_response(mode, band_workers):
+    image = np.random.default_rng(6).random((23, 17)) * 255
+    laplacian = ImageUtils.convolve2d(image, ImageUtils.generate_gaussian_kernel(0, 1.0))
+
+    np.testing.assert_array_equal(
+        ImageUtils.zero_crossings(laplacian, 0.5, mode),
+        reference_zero_crossings(laplacian, 0.5, mode)
+    )
+
+
+def test_zero_crossings_reject_unknown_mode():
+    with pytest.raises(ValueError):
+        ImageUtils.zero_crossings(np.zeros((5, 5)), 0.1, "diagonal")
+
+
+def undecodable_upload():
+    upload = tempfile.SpooledTemporaryFile()
+    upload.write(b"this is not an image")
+    upload.seek(0)
+    return upload
+
+
+def test_undecodable_source_raises_value_error():
+    with pytest.raises(ValueError, match="Could not decode the uploaded image"):
+        ImageUtils.load_array(undecodable_upload())
+
+
+@pytest.mark.parametrize("process", [
+    lambda source: BoxFilterService.process_image(source),
+    lambda source: CannyService.process_image(source, 1.0, 0.1, 0.2),
+    lambda source: FreemanChainService.process_image(source),
+    lambda source: FreemanChainService.prepare_stream(source),
+    lambda source: MarrHildrethService.process_image(source, 1.0, 0.1),
+    lambda source: ObjectCountService.process_image(source),
+    lambda source: OtsuMethodService.process_image(source),
+    lambda source: PipelineService.process_image(source, '[{"op": "otsu"}]'),
+    lambda source: SegmentationFilterService.process_image(source),
+    lambda source: Watershed.process_image(source),
+], ids=["box_filter", "canny", "freeman", "freeman_stream", "marr_hildreth", "object_count", "otsu",
+        "pipeline", "segmentation", "watershed"])
+def test_undecodable_upload_is_a_bad_request(process):
+    with pytest.raises(HTTPException) as exc_info:
+        process(undecodable_upload())
+
+    assert exc_info.value.status_code == 400
+    assert exc_info.value.detail == "Could not decode the uploaded image"
@@ -0,0 +1,71 @@
+import io
+
+import numpy as np
+import pytest
+from fastapi import HTTPException
+from PIL import Image
+
+from services.otsu_method_service import OtsuMethodService
+
+
+def two_level_image():
+    image = np.full((10, 10), 10, dtype=np.uint8)
+    image[5:] = 200
+    return image
+
+
+def test_two_level_image_is_split_between_the_levels():
+    result, thresholds = OtsuMethodService.otsu_thresholding(two_level_image(), 1)
+
+    assert thresholds == [11]
+    assert (result[:5] == 0).all()
+    assert (result[5:] == 255).all()
+
+
+def test_threshold_is_first_foreground_bin_like_multi_otsu():
+    rng = np.random.default_rng(0)
+    for _ in range(20):
+        hist = np.bincount(rng.integers(0, 256, 500), minlength=256)
+        assert [OtsuMethodService.otsu_threshold(hist)] == OtsuMethodService.multi_otsu_thresholds(hist, 1)
+
+
+def test_multi_level_thresholds_separate_each_level():
+    image = np.repeat(np.array([10, 80, 160, 240], dtype=np.uint8), 25).reshape(10, 10)
+
+    result, thresholds = OtsuMethodService.otsu_thresholding(image, 3)
+
+    assert thresholds == [11, 81, 161]
+    assert sorted(np.unique(result)) == [0, 85, 170, 255]
+
+
+def test_uniform_image_has_no_threshold():
+    result, thresholds = OtsuMethodService.otsu_thresholding(np.full((4, 4), 7, dtype=np.uint8), 1)
+
+    assert thresholds == [0]
+    assert (result == 255).all()
+
+
+@pytest.mark.parametrize("levels, num_thresholds", [([7], 2), ([7], 4), ([0, 255], 2), ([10, 80, 160], 3)])
+def test_multi_level_on_too_few_gray_levels_is_rejected(levels, num_thresholds):
+    image = np.resize(np.array(levels, dtype=np.uint8), (8, 8))
+
+    with pytest.raises(ValueError, match="distinct gray level"):
+        OtsuMethodService.otsu_thresholding(image, num_thresholds)
+
+
+def test_multi_level_on_a_uniform_upload_is_a_bad_request():
+    byte_io = io.BytesIO()
+    Image.fromarray(np.full((8, 8), 7, dtype=np.uint8)).save(byte_io, format="PNG")
+
+    with pytest.raises(HTTPException) as exc_info:
+        OtsuMethodService.process_image(byte_io.getvalue(), num_thresholds=2)
+
+    assert exc_info.value.status_code == 400
+
+
+def test_multi_level_with_exactly_one_level_per_class_is_accepted():
+    image = np.resize(np.array([10, 80, 160], dtype=np.uint8), (8, 8))
+
+    _, thresholds = OtsuMethodService.otsu_thresholding(image, 2)
+
+    assert thresholds == [11, 81]
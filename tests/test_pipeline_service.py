@@ -0,0 +1,47 @@
+import json
+
+import numpy as np
+import pytest
+from fastapi.exceptions import HTTPException
+
+from services.pipeline_service import PipelineService
+
+
+def parse(*steps):
+    return PipelineService.parse_steps(json.dumps(list(steps)))
+
+
+def test_parameters_are_coerced_to_the_step_annotations():
+    pipeline = parse(
+        {"op": "box_filter", "box_size": 5.0, "box_width": None},
+        {"op": "canny", "sigma": 2, "interpolate_nms": True},
+        {"op": "object_count", "method": "ccl", "compress": False},
+    )
+
+    assert pipeline == [
+        ("box_filter", {"box_size": 5, "box_width": None}),
+        ("canny", {"sigma": 2.0, "interpolate_nms": True}),
+        ("object_count", {"method": "ccl", "compress": False}),
+    ]
+    assert isinstance(pipeline[0][1]["box_size"], int)
+    assert isinstance(pipeline[1][1]["sigma"], float)
+
+
+@pytest.mark.parametrize("step", [
+    {"op": "box_filter", "box_size": "abc"},
+    {"op": "box_filter", "box_size": 2.5},
+    {"op": "box_filter", "box_size": True},
+    {"op": "box_filter", "box_size": None},
+    {"op": "canny", "sigma": "1.0"},
+    {"op": "canny", "interpolate_nms": 1},
+    {"op": "object_count", "method": 4},
+])
+def test_wrongly_typed_parameters_are_rejected(step):
+    with pytest.raises(ValueError, match="Invalid parameter"):
+        parse(step)
+
+
+def test_wrongly_typed_parameter_returns_400():
+    with pytest.raises(HTTPException) as error:
+        PipelineService.process_image(np.zeros((8, 8), dtype=np.uint8), '[{"op": "box_filter", "box_size": "abc"}]')
+    assert error.value.status_code == 400
@@ -0,0 +1,34 @@
+import os
+
+from utils.result_cache import ResultCache
+
+
+def disk_size(directory):
+    return sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+
+
+def test_disk_total_tracks_puts_and_evictions(tmp_path):
+    ResultCache.configure(memory_bytes=0, disk_dir=str(tmp_path), disk_bytes=250, ttl=0)
+
+    for index in range(5):
+        ResultCache.put(f"key{index}", bytes(60), "application/octet-stream")
+        assert ResultCache.stats()["disk_bytes"] == disk_size(tmp_path) <= 250
+
+    # Overwriting an entry replaces its size instead of adding to it
+    before = ResultCache.stats()["disk_bytes"]
+    ResultCache.put("key4", bytes(60), "application/octet-stream")
+    assert ResultCache.stats()["disk_bytes"] == before == disk_size(tmp_path)
+
+    entry = ResultCache.get("key4")
+    assert entry.content == bytes(60)
+    assert entry.to_response().status_code == 200
+
+
+def test_configure_counts_existing_entries(tmp_path):
+    ResultCache.configure(memory_bytes=0, disk_dir=str(tmp_path), disk_bytes=10_000, ttl=0)
+    ResultCache.put("key", bytes(100), "application/octet-stream", {"X-Test": "1"})
+
+    ResultCache.configure(memory_bytes=0, disk_dir=str(tmp_path), disk_bytes=10_000, ttl=0)
+
+    assert ResultCache.stats()["disk_bytes"] == disk_size(tmp_path) > 100
+    assert ResultCache.get("key").headers == {"X-Test": "1"}
@@ -0,0 +1,56 @@
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from services.segmentation_filter_service import SegmentationFilterService
+
+
+def reference_segmentation(image_array, intensity_map=SegmentationFilterService.DEFAULT_INTENSITY_MAP):
+    """The original range-by-range implementation."""
+    segmented = np.zeros_like(image_array, dtype=np.uint8)
+    for min_val, max_val, new_val in intensity_map:
+        segmented[(image_array >= min_val) & (image_array <= max_val)] = new_val
+    return segmented
+
+
+def test_default_table_maps_every_range():
+    image = np.array([[0, 50, 51, 100], [101, 150, 151, 255]], dtype=np.uint8)
+
+    result = SegmentationFilterService.segment_by_intensity(image)
+
+    np.testing.assert_array_equal(result, [[25, 25, 75, 75], [125, 125, 175, 255]])
+
+
+@pytest.mark.parametrize("intensity_map", [
+    SegmentationFilterService.DEFAULT_INTENSITY_MAP,
+    ((0, 255, 10), (100, 120, 200), (30, 30, 0)),
+    ((10, 20, 99),),
+])
+@pytest.mark.parametrize("dtype, high", [
+    (np.uint8, 256),
+    (np.uint16, 65536),
+    (np.int32, 1000),
+    (np.float32, 300),
+])
+def test_matches_the_range_by_range_reference(intensity_map, dtype, high):
+    rng = np.random.default_rng(0)
+    image = rng.integers(-50 if dtype in (np.int32, np.float32) else 0, high, (32, 32)).astype(dtype)
+    if dtype == np.float32:
+        image += rng.random((32, 32)).astype(np.float32)
+
+    result = SegmentationFilterService.segment_by_intensity(image, intensity_map)
+
+    assert result.dtype == np.uint8
+    np.testing.assert_array_equal(result, reference_segmentation(image, intensity_map))
+
+
+def test_16_bit_upload_maps_in_range_values_and_zeroes_the_rest():
+    pixels = np.array([[10, 200, 255, 256], [1000, 40000, 0, 60]], dtype=np.uint16)
+    byte_io = io.BytesIO()
+    Image.fromarray(pixels).save(byte_io, format="PNG")
+
+    result = np.asarray(SegmentationFilterService.process_image(byte_io.getvalue()))
+
+    np.testing.assert_array_equal(result, [[25, 175, 255, 0], [0, 0, 25, 75]])
@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+
+from utils.service_executor import ServiceExecutor
+
+
+class FailingUpload:
+    def read(self):
+        raise OSError("upload went away")
+
+
+@pytest.fixture
+def process_executor():
+    ServiceExecutor.configure("process", 1, 0, 1)
+    yield
+    ServiceExecutor.shutdown()
+
+
+def test_failed_upload_read_releases_the_slot(process_executor):
+    for _ in range(3):
+        with pytest.raises(OSError):
+            asyncio.run(ServiceExecutor.run(len, FailingUpload()))
+        assert ServiceExecutor.in_flight() == 0
+
+    assert asyncio.run(ServiceExecutor.run(len, b"abc")) == 3
+    assert ServiceExecutor.in_flight() == 0
+
+
+def test_held_stream_counts_until_exhausted():
+    stream = ServiceExecutor.hold(iter([b"a", b"b"]))
+    assert ServiceExecutor.in_flight() == 1
+
+    assert list(stream) == [b"a", b"b"]
+    assert ServiceExecutor.in_flight() == 0
+
+
+def test_held_stream_is_released_when_closed_failed_or_dropped():
+    closed = []
+
+    def chunks():
+        try:
+            yield b"a"
+            yield b"b"
+        finally:
+            closed.append(True)
+
+    stream = ServiceExecutor.hold(chunks())
+    next(stream)
+    stream.close()
+    assert closed == [True]
+    assert ServiceExecutor.in_flight() == 0
+
+    def failing():
+        yield b"a"
+        raise RuntimeError("encoder failed")
+
+    stream = ServiceExecutor.hold(failing())
+    with pytest.raises(RuntimeError):
+        list(stream)
+    assert ServiceExecutor.in_flight() == 0
+
+    stream = ServiceExecutor.hold(chunks())
+    assert ServiceExecutor.in_flight() == 1
+    del stream
+    assert ServiceExecutor.in_flight() == 0
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from services.box_filter_service import BoxFilterService
+from utils.convolution import ConvolutionEngine
+from utils.image_utils import ImageUtils
+from utils.tiling import TiledExecutor
+
+
+WORKERS = 3
+MIN_ROWS = 4
+
+
+@pytest.fixture(scope="module", params=["thread", "process"])
+def kind(request):
+    yield request.param
+    TiledExecutor.shutdown()
+
+
+@pytest.fixture
+def small_blocks(monkeypatch):
+    """Shrinks the fft and direct row blocks so their bands split small images too."""
+    monkeypatch.setattr(ConvolutionEngine, "FFT_BLOCK_ROWS", 8)
+    monkeypatch.setattr(ConvolutionEngine, "WINDOW_CHUNK_ELEMENTS", 4096)
+
+
+def untiled_and_tiled(kind, func, monkeypatch):
+    """Runs func whole on one worker, then on WORKERS bands, and checks it really was split."""
+    TiledExecutor.configure(kind, 1, MIN_ROWS)
+    untiled = func()
+
+    TiledExecutor.configure(kind, WORKERS, MIN_ROWS)
+    submitted = []
+    submit = TiledExecutor._pool.submit
+    monkeypatch.setattr(TiledExecutor._pool, "submit", lambda *args: submitted.append(1) or submit(*args))
+    tiled = func()
+
+    assert len(submitted) > 1
+    return untiled, tiled
+
+
+IMAGE = np.random.default_rng(0).random((41, 37)) * 255
+UINT8_IMAGE = np.random.default_rng(1).integers(0, 256, (41, 37)).astype(np.uint8)
+
+
+@pytest.mark.parametrize("image", [IMAGE, UINT8_IMAGE], ids=["float", "uint8"])
+@pytest.mark.parametrize("shape", [(3, 3), (4, 4), (5, 2), (9, 9)])
+@pytest.mark.parametrize("method", ["separable", "direct", "fft"])
+def test_convolution_bands_are_bit_identical(kind, small_blocks, monkeypatch, image, shape, method):
+    kernel = np.outer(np.arange(1, shape[0] + 1), np.linspace(-1, 1, shape[1]))
+
+    untiled, tiled = untiled_and_tiled(kind, lambda: ImageUtils.convolve2d(image, kernel, method), monkeypatch)
+
+    assert tiled.dtype == untiled.dtype
+    assert np.array_equal(tiled, untiled)
+
+
+@pytest.mark.parametrize("box_size, box_width, box_height", [(3, None, None), (4, None, None), (5, 2, 7), (15, None, None)])
+def test_box_filter_bands_are_bit_identical(kind, monkeypatch, box_size, box_width, box_height):
+    untiled, tiled = untiled_and_tiled(
+        kind, lambda: BoxFilterService.box_filter(UINT8_IMAGE, box_size, box_width, box_height), monkeypatch
+    )
+
+    assert np.array_equal(tiled, untiled)
+
+
+@pytest.mark.parametrize("mode", ["window", "opposing"])
+def test_zero_crossing_bands_are_bit_identical(kind, monkeypatch, mode):
+    laplacian = ImageUtils.convolve2d(IMAGE, ImageUtils.generate_gaussian_kernel(0, 1.0))
+
+    untiled, tiled = untiled_and_tiled(kind, lambda: ImageUtils.zero_crossings(laplacian, 0.5, mode), monkeypatch)
+
+    assert np.array_equal(tiled, untiled)
@@ -0,0 +1,94 @@
+import heapq
+
+import numpy as np
+import pytest
+
+from services.watershed_service import Watershed
+
+
+def reference_watershed(levels, markers):
+    """Per-pixel Meyer flooding with a (level, row, column) heap: the original implementation."""
+    rows, cols = levels.shape
+    labels = markers.astype(np.int32).copy()
+    in_queue = np.zeros((rows, cols), dtype=bool)
+    queue = []
+
+    def neighbors(i, j):
+        for di, dj in ((-1, 0), (1, 0), (0, -1), (0, 1)):
+            ni, nj = i + di, j + dj
+            if 0 <= ni < rows and 0 <= nj < cols:
+                yield ni, nj
+
+    for i in range(rows):
+        for j in range(cols):
+            if labels[i, j] > 0:
+                for ni, nj in neighbors(i, j):
+                    if labels[ni, nj] == 0 and not in_queue[ni, nj]:
+                        heapq.heappush(queue, (float(levels[ni, nj]), ni, nj, labels[i, j]))
+                        in_queue[ni, nj] = True
+
+    while queue:
+        _, i, j, source_label = heapq.heappop(queue)
+        if labels[i, j] != 0:
+            continue
+
+        basins = {labels[ni, nj] for ni, nj in neighbors(i, j) if labels[ni, nj] > 0}
+        if not basins:
+            labels[i, j] = source_label
+        elif len(basins) == 1:
+            labels[i, j] = basins.pop()
+        else:
+            labels[i, j] = -1
+
+        if labels[i, j] > 0:
+            for ni, nj in neighbors(i, j):
+                if labels[ni, nj] == 0 and not in_queue[ni, nj]:
+                    heapq.heappush(queue, (float(levels[ni, nj]), ni, nj, labels[i, j]))
+                    in_queue[ni, nj] = True
+
+    return labels
+
+
+def random_markers(rng, shape, seeds):
+    markers = np.zeros(shape, dtype=np.int32)
+    positions = rng.choice(shape[0] * shape[1], seeds, replace=False)
+    markers.ravel()[positions] = np.arange(1, seeds + 1)
+    return markers
+
+
+def gradients(quantization_levels):
+    rng = np.random.default_rng(quantization_levels)
+    dtype = np.uint8 if quantization_levels == 256 else np.uint16
+    cases = []
+    for shape in [(1, 9), (9, 1), (17, 23), (40, 31)]:
+        # Random gradient: few ties
+        cases.append(rng.integers(0, quantization_levels, shape).astype(dtype))
+        # Plateau-heavy: only a handful of levels, so most pops are ties
+        cases.append((rng.integers(0, 3, shape) * (quantization_levels // 3)).astype(dtype))
+    cases.append(np.zeros((25, 25), dtype=dtype))
+    return cases
+
+
+@pytest.mark.parametrize("quantization_levels", Watershed.QUANTIZATION_LEVELS)
+@pytest.mark.parametrize("case", range(9))
+@pytest.mark.parametrize("seeds", [1, 2, 7])
+def test_bucket_queue_matches_heap_flooding(quantization_levels, case, seeds):
+    levels = gradients(quantization_levels)[case]
+    rng = np.random.default_rng(case * 10 + seeds)
+    markers = random_markers(rng, levels.shape, min(seeds, levels.size))
+
+    labels = Watershed.watershed_bucket_queue(levels, markers, quantization_levels)
+
+    np.testing.assert_array_equal(labels, reference_watershed(levels, markers))
+
+
+@pytest.mark.parametrize("quantization_levels", Watershed.QUANTIZATION_LEVELS)
+def test_bucket_queue_matches_heap_flooding_on_segment_markers(quantization_levels):
+    gradient = np.random.default_rng(5).random((48, 48)) * 100
+    markers = Watershed.create_markers(gradient)
+    assert markers.max() > 1
+    levels = Watershed.quantize(gradient, quantization_levels)
+
+    labels = Watershed.watershed_bucket_queue(levels, markers, quantization_levels)
+
+    np.testing.assert_array_equal(labels, reference_watershed(levels, markers))
@@ -1,4 +1,12 @@
 from .image_utils import ImageUtils
+from .convolution import ConvolutionEngine
+from .connected_components import ConnectedComponents
+from .contour_tracing import ContourTracer
+from .chain_code_encoding import ChainCodeEncoder
+from .service_executor import ServiceExecutor
+from .result_cache import ResultCache
+from .tiling import TiledExecutor
+from .image_encoding import ImageEncoder, EncodedImage
 
 
-__all__ = ["ImageUtils"]
\ No newline at end of file
+__all__ = ["ImageUtils", "ConvolutionEngine", "ConnectedComponents", "ContourTracer", "ChainCodeEncoder", "ServiceExecutor", "ResultCache", "TiledExecutor", "ImageEncoder", "EncodedImage"]
\ No newline at end of file
@@ -0,0 +1,130 @@
+from typing import List, Optional, Union
+import numpy as np
+import base64
+import zlib
+
+
+class ChainCodeEncoder:
+    """
+    Wire formats for Freeman chain codes, encoded on uint8 NumPy arrays.
+
+    - "json": list of directions, e.g. [2, 2, 4, 6, 6, 0]
+    - "packed": 3 bits per direction, most significant bit first, zero-padded
+      to a whole byte and base64 encoded; the contour "length" gives the
+      number of directions to read back
+    - "rle": flat list of [direction, run, direction, run, ...]
+    - "diff": first direction followed by the counter-clockwise turns
+      (d[k] - d[k-1]) mod 8, as a string of digits; with compress=True the
+      digit string is zlib-compressed and base64 encoded
+
+    decode() turns any of these back into the directions.
+    """
+
+    FORMATS = ("json", "packed", "rle", "diff")
+
+    @staticmethod
+    def encode(chain_code: np.ndarray, chain_format: str = "json", compress: bool = False) -> Union[List[int], str]:
+        """
+        Encode a chain code in the given wire format.
+
+        Args:
+            chain_code: Directions 0-7 (uint8 array)
+            chain_format: "json", "packed", "rle" or "diff"
+            compress: zlib-compress the "diff" payload
+
+        Returns:
+            List of ints for "json" and "rle", string for "packed" and "diff"
+        """
+        if chain_format not in ChainCodeEncoder.FORMATS:
+            raise ValueError(f"Invalid format: {chain_format}. Choose one of {ChainCodeEncoder.FORMATS}")
+
+        chain_code = np.asarray(chain_code, dtype=np.uint8)
+        if chain_format == "packed":
+            return ChainCodeEncoder.pack(chain_code)
+        if chain_format == "rle":
+            return ChainCodeEncoder.run_length(chain_code)
+        if chain_format == "diff":
+            return ChainCodeEncoder.differential(chain_code, compress)
+        return chain_code.tolist()
+
+    @staticmethod
+    def pack(chain_code: np.ndarray) -> str:
+        """Pack 3 bits per direction and encode as base64."""
+        bits = np.unpackbits(chain_code[:, None], axis=1)[:, 5:]
+        return base64.b64encode(np.packbits(bits.ravel()).tobytes()).decode("ascii")
+
+    @staticmethod
+    def run_length(chain_code: np.ndarray) -> List[int]:
+        """Encode as a flat [direction, run, ...] list."""
+        if chain_code.size == 0:
+            return []
+
+        run_starts = np.flatnonzero(np.diff(chain_code, prepend=np.int16(-1)))
+        run_lengths = np.diff(np.append(run_starts, chain_code.size))
+        return np.column_stack([chain_code[run_starts], run_lengths]).ravel().tolist()
+
+    @staticmethod
+    def differential(chain_code: np.ndarray, compress: bool = False) -> str:
+        """Encode the first direction and the following turns as digits, optionally zlib + base64."""
+        turns = chain_code.copy()
+        turns[1:] = (chain_code[1:].astype(np.int16) - chain_code[:-1]) % 8
+        digits = (turns + ord("0")).tobytes()
+
+        if compress:
+            return base64.b64encode(zlib.compress(digits, 9)).decode("ascii")
+        return digits.decode("ascii")
+
+    @staticmethod
+    def decode(
+        payload: Union[List[int], str],
+        chain_format: str = "json",
+        length: Optional[int] = None,
+        compress: bool = False,
+    ) -> np.ndarray:
+        """
+        Decode a chain code from the given wire format.
+
+        Args:
+            payload: Output of encode()
+            chain_format: "json", "packed", "rle" or "diff"
+            length: Number of directions, required for "packed"
+            compress: The "diff" payload is zlib-compressed
+
+        Returns:
+            Directions 0-7 (uint8 array)
+        """
+        if chain_format not in ChainCodeEncoder.FORMATS:
+            raise ValueError(f"Invalid format: {chain_format}. Choose one of {ChainCodeEncoder.FORMATS}")
+
+        if chain_format == "packed":
+            if length is None:
+                raise ValueError("length is required to decode a packed chain code")
+            return ChainCodeEncoder.unpack(payload, length)
+        if chain_format == "rle":
+            return ChainCodeEncoder.run_length_decode(payload)
+        if chain_format == "diff":
+            return ChainCodeEncoder.differential_decode(payload, compress)
+        return np.asarray(payload, dtype=np.uint8)
+
+    @staticmethod
+    def unpack(payload: str, length: int) -> np.ndarray:
+        """Read length 3-bit directions back from base64, dropping the zero padding."""
+        bits = np.unpackbits(np.frombuffer(base64.b64decode(payload), dtype=np.uint8))
+        if bits.size < 3 * length:
+            raise ValueError(f"Packed chain code holds fewer than {length} directions")
+
+        triples = bits[:3 * length].reshape(-1, 3)
+        return (triples[:, 0] << 2 | triples[:, 1] << 1 | triples[:, 2]).astype(np.uint8)
+
+    @staticmethod
+    def run_length_decode(runs: List[int]) -> np.ndarray:
+        """Expand a flat [direction, run, ...] list."""
+        pairs = np.asarray(runs, dtype=np.int64).reshape(-1, 2)
+        return np.repeat(pairs[:, 0], pairs[:, 1]).astype(np.uint8)
+
+    @staticmethod
+    def differential_decode(payload: str, compress: bool = False) -> np.ndarray:
+        """Sum the turns back into directions, mod 8."""
+        digits = zlib.decompress(base64.b64decode(payload)) if compress else payload.encode("ascii")
+        turns = np.frombuffer(digits, dtype=np.uint8).astype(np.int64) - ord("0")
+        return (np.cumsum(turns) % 8).astype(np.uint8)
@@ -0,0 +1,298 @@
+from numpy.lib.stride_tricks import sliding_window_view
+from collections import OrderedDict
+from functools import partial
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import hashlib
+import threading
+from utils.tiling import TiledExecutor
+
+
+class ConvolutionEngine:
+    """
+    Vectorized 2D convolution used by ImageUtils.convolve2d.
+
+    Keeps the semantics of the original pixel loop: the kernel is applied
+    without flipping (correlation), borders are replicated (mode='edge')
+    and the result has the same dtype as the input image.
+    """
+
+    # Singular values below this fraction of the largest one are treated as zero
+    RANK_TOLERANCE = 1e-10
+    # Upper bound on window elements materialized per tensordot chunk
+    WINDOW_CHUNK_ELEMENTS = 1 << 22
+    # Kernels with at least this many taps go through the FFT path in "auto" mode
+    FFT_AREA_THRESHOLD = 7 * 7
+    # Output rows per FFT block; bands of tiled runs are aligned to it
+    FFT_BLOCK_ROWS = 256
+    # Number of kernel spectra kept in the LRU cache
+    SPECTRUM_CACHE_SIZE = 32
+
+    METHODS = ("auto", "separable", "direct", "fft")
+
+    _spectrum_cache: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+    _spectrum_cache_lock = threading.Lock()
+    _spectrum_cache_stats: Dict[str, int] = {"hits": 0, "misses": 0}
+
+    @staticmethod
+    def convolve2d(image: np.ndarray, kernel: np.ndarray, method: str = "auto") -> np.ndarray:
+        """
+        Convolve a 2D image with a 2D kernel.
+
+        Args:
+            image: 2D input array
+            kernel: 2D kernel
+            method: "auto", "separable" (sum of 1-D passes), "direct" (sliding windows)
+                or "fft" (frequency domain, best for large kernels)
+
+        Returns:
+            Convolved image with the same shape and dtype as the input
+        """
+        if method not in ConvolutionEngine.METHODS:
+            raise ValueError(f"Invalid convolution method: {method}. Choose one of {ConvolutionEngine.METHODS}")
+
+        image_height, image_width = image.shape
+        kernel = np.asarray(kernel)
+        work_dtype = np.result_type(image.dtype, kernel.dtype, np.float32)
+
+        padded_image = ConvolutionEngine.pad_image(image, kernel.shape).astype(work_dtype, copy=False)
+        kernel = kernel.astype(work_dtype, copy=False)
+
+        terms = None
+        if method == "fft" or (method == "auto" and kernel.size >= ConvolutionEngine.FFT_AREA_THRESHOLD):
+            method = "fft"
+            # Blocks are anchored at row 0, so bands aligned to them see the same FFTs
+            block_rows = min(ConvolutionEngine.FFT_BLOCK_ROWS, image_height)
+        else:
+            if method != "direct":
+                terms = ConvolutionEngine.separate_kernel(kernel)
+                if terms is None and method == "separable":
+                    raise ValueError("Kernel is not separable")
+            method = "separable" if terms is not None else "direct"
+            block_rows = 1 if terms is not None else ConvolutionEngine.direct_chunk_rows(kernel.shape, image_width)
+
+        # Rows are independent given the padded input, so bands run in parallel
+        result = TiledExecutor.map_bands(
+            partial(ConvolutionEngine.correlate_rows, method=method, kernel=kernel, terms=terms,
+                    output_width=image_width, block_rows=block_rows),
+            padded_image,
+            image_height,
+            halo_before=0,
+            halo_after=padded_image.shape[0] - image_height,
+            row_multiple=block_rows,
+        )
+        return result.astype(image.dtype, copy=False)
+
+    @staticmethod
+    def correlate_rows(
+        padded_rows: np.ndarray,
+        top: int,
+        rows: int,
+        method: str,
+        kernel: np.ndarray,
+        terms: Optional[List[Tuple[np.ndarray, np.ndarray]]],
+        output_width: int,
+        block_rows: int,
+    ) -> np.ndarray:
+        """Band function for TiledExecutor: correlate rows output rows from padded rows starting at top."""
+        padded_rows = padded_rows[top:]
+        output_shape = (rows, output_width)
+        if method == "fft":
+            return ConvolutionEngine._correlate_fft(padded_rows, kernel, output_shape, block_rows)
+        if method == "separable":
+            return ConvolutionEngine._correlate_separable(padded_rows, terms, output_shape)
+        return ConvolutionEngine._correlate_direct(padded_rows, kernel, output_shape)
+
+    @staticmethod
+    def direct_chunk_rows(kernel_shape: Tuple[int, int], image_width: int) -> int:
+        """Rows per tensordot chunk in the direct path."""
+        kernel_height, kernel_width = kernel_shape
+        return max(1, ConvolutionEngine.WINDOW_CHUNK_ELEMENTS // (image_width * kernel_height * kernel_width))
+
+    @staticmethod
+    def pad_image(image: np.ndarray, kernel_shape: Tuple[int, int]) -> np.ndarray:
+        """Replicate borders by half the kernel size on every side."""
+        pad_height = kernel_shape[0] // 2
+        pad_width = kernel_shape[1] // 2
+        return np.pad(image, ((pad_height, pad_height), (pad_width, pad_width)), mode='edge')
+
+    @staticmethod
+    def separate_kernel(kernel: np.ndarray) -> Optional[List[Tuple[np.ndarray, np.ndarray]]]:
+        """
+        Decompose a kernel into a sum of (column, row) outer products.
+
+        Rank-1 kernels (Gaussian, Sobel, box) are split exactly using the
+        largest entry as pivot. Higher ranks (e.g. the LoG kernel, rank 2-3)
+        use the SVD and are only returned when the 1-D passes are cheaper
+        than the full 2D kernel.
+
+        Returns:
+            List of (column, row) vectors, or None if the kernel is not worth separating
+        """
+        kernel_height, kernel_width = kernel.shape
+        if kernel_height == 1 or kernel_width == 1:
+            return None
+
+        pivot = np.unravel_index(np.argmax(np.abs(kernel)), kernel.shape)
+        pivot_value = kernel[pivot]
+        if pivot_value == 0:
+            return [(np.zeros(kernel_height, dtype=kernel.dtype), np.zeros(kernel_width, dtype=kernel.dtype))]
+
+        # Exact rank-1 split: column scaled by the pivot, row taken as is
+        column = kernel[:, pivot[1]] / pivot_value
+        row = kernel[pivot[0], :]
+        if np.allclose(np.outer(column, row), kernel, rtol=0, atol=ConvolutionEngine.RANK_TOLERANCE * abs(pivot_value)):
+            return [(column, row)]
+
+        u, s, vt = np.linalg.svd(kernel.astype(np.float64))
+        rank = int(np.sum(s > ConvolutionEngine.RANK_TOLERANCE * s[0]))
+        if rank * (kernel_height + kernel_width) >= kernel_height * kernel_width:
+            return None
+
+        return [
+            ((u[:, k] * s[k]).astype(kernel.dtype), vt[k].astype(kernel.dtype))
+            for k in range(rank)
+        ]
+
+    @staticmethod
+    def _correlate_axis(array: np.ndarray, weights: np.ndarray, axis: int, length: int) -> np.ndarray:
+        """Correlate along one axis by accumulating shifted views, one per tap."""
+        def shifted(offset):
+            return array[offset:offset + length] if axis == 0 else array[:, offset:offset + length]
+
+        result = shifted(0) * weights[0]
+        product = np.empty_like(result)
+        for offset in range(1, len(weights)):
+            if weights[offset] == 0:
+                continue
+            np.multiply(shifted(offset), weights[offset], out=product)
+            result += product
+        return result
+
+    @staticmethod
+    def _correlate_separable(
+        padded_image: np.ndarray,
+        terms: List[Tuple[np.ndarray, np.ndarray]],
+        output_shape: Tuple[int, int]
+    ) -> np.ndarray:
+        """Run each separable term as a vertical pass followed by a horizontal pass."""
+        image_height, image_width = output_shape
+        result = None
+        for column, row in terms:
+            vertical = ConvolutionEngine._correlate_axis(padded_image, column, 0, image_height)
+            term = ConvolutionEngine._correlate_axis(vertical, row, 1, image_width)
+            if result is None:
+                result = term
+            else:
+                result += term
+        return result
+
+    @staticmethod
+    def _correlate_direct(padded_image: np.ndarray, kernel: np.ndarray, output_shape: Tuple[int, int]) -> np.ndarray:
+        """Correlate with strided windows, in row chunks to bound memory."""
+        image_height, image_width = output_shape
+        kernel_height, kernel_width = kernel.shape
+        windows = sliding_window_view(padded_image, kernel.shape)
+        result = np.empty(output_shape, dtype=padded_image.dtype)
+
+        rows_per_chunk = ConvolutionEngine.direct_chunk_rows(kernel.shape, image_width)
+        for start in range(0, image_height, rows_per_chunk):
+            stop = min(start + rows_per_chunk, image_height)
+            result[start:stop] = np.tensordot(
+                windows[start:stop, :image_width], kernel, axes=((2, 3), (0, 1))
+            )
+        return result
+
+    @staticmethod
+    def _correlate_fft(
+        padded_image: np.ndarray,
+        kernel: np.ndarray,
+        output_shape: Tuple[int, int],
+        block_rows: Optional[int] = None
+    ) -> np.ndarray:
+        """
+        Correlate in the frequency domain, block_rows output rows at a time.
+
+        Each block is transformed with its kernel_height - 1 rows of overlap
+        (overlap-save). The circular correlation of a block only wraps around
+        for output positions beyond the block, so its top-left part is exact.
+        """
+        image_height, image_width = output_shape
+        kernel_height = kernel.shape[0]
+        block_rows = block_rows or image_height
+        fft_shape = (
+            ConvolutionEngine.next_fast_length(block_rows + kernel_height - 1),
+            ConvolutionEngine.next_fast_length(padded_image.shape[1]),
+        )
+
+        kernel_spectrum = ConvolutionEngine.kernel_spectrum(kernel, fft_shape)
+        result = np.empty(output_shape, dtype=padded_image.dtype)
+        for start in range(0, image_height, block_rows):
+            stop = min(start + block_rows, image_height)
+            image_spectrum = np.fft.rfft2(padded_image[start:stop + kernel_height - 1], s=fft_shape)
+            image_spectrum *= kernel_spectrum
+            result[start:stop] = np.fft.irfft2(image_spectrum, s=fft_shape)[:stop - start, :image_width]
+        return result
+
+    @staticmethod
+    def kernel_spectrum(kernel: np.ndarray, fft_shape: Tuple[int, int]) -> np.ndarray:
+        """
+        Return the conjugated spectrum of a kernel zero-padded to fft_shape.
+
+        Spectra are cached (LRU) by kernel contents and padded shape, so
+        repeated requests with the same sigma and resolution skip the kernel FFT.
+        """
+        digest = hashlib.blake2b(np.ascontiguousarray(kernel).tobytes(), digest_size=16).hexdigest()
+        key = (digest, kernel.shape, kernel.dtype.str, tuple(fft_shape))
+
+        cache = ConvolutionEngine._spectrum_cache
+        with ConvolutionEngine._spectrum_cache_lock:
+            spectrum = cache.get(key)
+            if spectrum is not None:
+                cache.move_to_end(key)
+                ConvolutionEngine._spectrum_cache_stats["hits"] += 1
+                return spectrum
+            ConvolutionEngine._spectrum_cache_stats["misses"] += 1
+
+        spectrum = np.conj(np.fft.rfft2(kernel, s=fft_shape))
+        spectrum.flags.writeable = False
+
+        with ConvolutionEngine._spectrum_cache_lock:
+            cache[key] = spectrum
+            cache.move_to_end(key)
+            while len(cache) > ConvolutionEngine.SPECTRUM_CACHE_SIZE:
+                cache.popitem(last=False)
+        return spectrum
+
+    @staticmethod
+    def clear_spectrum_cache() -> None:
+        """Drop all cached kernel spectra."""
+        with ConvolutionEngine._spectrum_cache_lock:
+            ConvolutionEngine._spectrum_cache.clear()
+            ConvolutionEngine._spectrum_cache_stats.update(hits=0, misses=0)
+
+    @staticmethod
+    def spectrum_cache_info() -> Dict[str, int]:
+        """Return hit/miss counters and current size of the spectrum cache."""
+        with ConvolutionEngine._spectrum_cache_lock:
+            return {
+                **ConvolutionEngine._spectrum_cache_stats,
+                "size": len(ConvolutionEngine._spectrum_cache),
+                "max_size": ConvolutionEngine.SPECTRUM_CACHE_SIZE,
+            }
+
+    @staticmethod
+    def next_fast_length(n: int) -> int:
+        """Smallest 5-smooth integer (only factors 2, 3 and 5) not below n."""
+        best = 1 << max(n - 1, 0).bit_length()
+        power_of_five = 1
+        while power_of_five < best:
+            power_of_three = power_of_five
+            while power_of_three < best:
+                candidate = power_of_three
+                while candidate < n:
+                    candidate *= 2
+                best = min(best, candidate)
+                power_of_three *= 3
+            power_of_five *= 5
+        return best
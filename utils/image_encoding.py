@@ -0,0 +1,295 @@
+from fastapi.exceptions import HTTPException
+from fastapi.responses import StreamingResponse
+from PIL import Image
+from typing import BinaryIO, Dict, Iterator, NamedTuple, Optional
+from utils.service_executor import ServiceExecutor
+from io import BytesIO
+import numpy as np
+import io
+import queue
+import threading
+
+
+class EncodedImage(NamedTuple):
+    """An encoded result: body, media type and extra headers, ready for ResultCache.put."""
+    content: bytes
+    media_type: str
+    headers: Optional[Dict[str, str]] = None
+
+
+class _StreamCancelled(Exception):
+    """Raised inside the encoder thread once the client has gone away."""
+
+
+class _ChunkQueueWriter(io.RawIOBase):
+    """
+    File-like sink that regroups encoder writes into chunks of about
+    chunk_size bytes and hands them to a bounded queue, so the encoder
+    blocks instead of buffering the whole output.
+    """
+
+    def __init__(self, chunks: "queue.Queue", chunk_size: int, cancelled: threading.Event):
+        self.chunks = chunks
+        self.chunk_size = chunk_size
+        self.cancelled = cancelled
+        self.buffer = bytearray()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.buffer += data
+        if len(self.buffer) >= self.chunk_size:
+            self.put(bytes(self.buffer))
+            self.buffer.clear()
+        return len(data)
+
+    def put(self, item) -> None:
+        while True:
+            if self.cancelled.is_set():
+                raise _StreamCancelled()
+            try:
+                self.chunks.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        """Flush the last partial chunk, then post the end marker (with the error, if any)."""
+        try:
+            if error is None and self.buffer:
+                self.put(bytes(self.buffer))
+            self.put((None, error))
+        except _StreamCancelled:
+            pass
+
+
+class ImageEncoder:
+    """
+    Output encodings for result images.
+
+    - "png": 8-bit PNG, the default
+    - "png_bilevel": 1-bit PNG (mode "1"), pixels >= 128 become white; for
+      binary masks such as Canny, Marr-Hildreth and binary Otsu
+    - "png_palette": palette PNG holding only the gray levels present, so
+      images with few levels (segmentation, watershed, multi-level Otsu)
+      are written at 1, 2 or 4 bits per pixel
+    - "webp": lossless WebP
+    - "npy": the raw NumPy array (np.save), no compression
+
+    compression_level (0-9) is the zlib level for the PNG formats; 0 and 1
+    trade size for speed. For WebP it is mapped onto the encoder's effort
+    (method 0-6). None keeps the encoder defaults.
+
+    Results of at least Settings.STREAM_MIN_PIXELS pixels are not encoded
+    into one buffer: streaming_response runs the encoder in a thread and
+    sends its output in chunks as it is written, so only a few chunks are
+    held in memory at a time. PNG and .npy are written incrementally;
+    WebP is encoded in one piece by libwebp and then sent in chunks.
+    """
+
+    # Chunks waiting to be sent before the encoder thread blocks
+    STREAM_QUEUE_CHUNKS = 4
+
+    FORMATS = ("png", "png_bilevel", "png_palette", "webp", "npy")
+
+    MEDIA_TYPES = {
+        "png": "image/png",
+        "png_bilevel": "image/png",
+        "png_palette": "image/png",
+        "webp": "image/webp",
+        "npy": "application/octet-stream",
+    }
+
+    @staticmethod
+    def validate(output_format: str = "png", compression_level: Optional[int] = None) -> None:
+        """Check the encoding options before any work is done; raises a 400 HTTPException."""
+        if output_format not in ImageEncoder.FORMATS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid output_format: {output_format}. Choose one of {ImageEncoder.FORMATS}"
+            )
+        if compression_level is not None and not 0 <= compression_level <= 9:
+            raise HTTPException(status_code=400, detail="compression_level must be between 0 and 9")
+
+    @staticmethod
+    def encode(
+        image: Image.Image,
+        output_format: str = "png",
+        compression_level: Optional[int] = None,
+        name: str = "result",
+    ) -> EncodedImage:
+        """
+        Encode an image in the given output format.
+
+        Encoding is CPU-bound, so async callers run it through asyncio.to_thread.
+
+        Args:
+            image: Result image
+            output_format: One of FORMATS
+            compression_level: zlib level 0-9, None for the encoder default
+            name: File name stem for attachments (.npy)
+
+        Returns:
+            EncodedImage with the body, media type and headers
+        """
+        ImageEncoder.validate(output_format, compression_level)
+        byte_io = BytesIO()
+        ImageEncoder.write(image, byte_io, output_format, compression_level)
+        # getvalue hands over the buffer without the copy a seek(0) + read() would make
+        return EncodedImage(
+            byte_io.getvalue(),
+            ImageEncoder.MEDIA_TYPES[output_format],
+            ImageEncoder.headers(output_format, name)
+        )
+
+    @staticmethod
+    def write(image: Image.Image, fp: BinaryIO, output_format: str = "png", compression_level: Optional[int] = None) -> None:
+        """Encode an image into a writable file object."""
+        if output_format == "npy":
+            ImageEncoder.write_npy(image, fp)
+            return
+
+        if output_format == "webp":
+            options = {"lossless": True}
+            if compression_level is not None:
+                options["method"] = round(compression_level * 6 / 9)
+            image.save(fp, format="WEBP", **options)
+            return
+
+        if output_format == "png_bilevel":
+            image = ImageEncoder.to_bilevel(image)
+        elif output_format == "png_palette":
+            image = ImageEncoder.to_palette(image)
+
+        options = {} if compression_level is None else {"compress_level": compression_level}
+        image.save(fp, format="PNG", **options)
+
+    @staticmethod
+    def write_npy(image: Image.Image, fp: BinaryIO, block_bytes: int = 1024 * 1024) -> None:
+        """
+        Write an image as a .npy file, the same bytes as np.save(fp, np.asarray(image)).
+
+        Rows are converted and written in blocks of about block_bytes, so
+        the full array is never materialized next to the image.
+        """
+        first_row = np.asarray(image.crop((0, 0, image.width, 1)))
+        np.lib.format.write_array_header_1_0(fp, {
+            "descr": np.lib.format.dtype_to_descr(first_row.dtype),
+            "fortran_order": False,
+            "shape": (image.height,) + first_row.shape[1:],
+        })
+
+        block_rows = max(1, block_bytes // max(1, first_row.nbytes))
+        for top in range(0, image.height, block_rows):
+            bottom = min(top + block_rows, image.height)
+            fp.write(np.asarray(image.crop((0, top, image.width, bottom))).tobytes())
+
+    @staticmethod
+    def headers(output_format: str, name: str) -> Dict[str, str]:
+        """Extra response headers: .npy results are sent as attachments."""
+        if output_format == "npy":
+            return {"Content-Disposition": f'attachment; filename="{name}.npy"'}
+        return {}
+
+    @staticmethod
+    def should_stream(image: Image.Image) -> bool:
+        """Whether a result is large enough to be streamed instead of encoded into one buffer."""
+        from config import Settings
+        return 0 < Settings.STREAM_MIN_PIXELS <= image.width * image.height
+
+    @staticmethod
+    def streaming_response(
+        image: Image.Image,
+        output_format: str = "png",
+        compression_level: Optional[int] = None,
+        name: str = "result",
+        headers: Optional[Dict[str, str]] = None,
+    ) -> StreamingResponse:
+        """
+        Stream the encoded image as it is produced.
+
+        Streamed results are not stored in the result cache, since that
+        would need the whole body in memory. The encoder runs while the
+        response is sent, so the stream holds an executor admission slot
+        until it ends.
+        """
+        from config import Settings
+        ImageEncoder.validate(output_format, compression_level)
+        return StreamingResponse(
+            ServiceExecutor.hold(
+                ImageEncoder.iter_encode(image, output_format, compression_level, Settings.STREAM_CHUNK_BYTES)
+            ),
+            media_type=ImageEncoder.MEDIA_TYPES[output_format],
+            headers={**ImageEncoder.headers(output_format, name), **(headers or {})}
+        )
+
+    @staticmethod
+    def iter_encode(
+        image: Image.Image,
+        output_format: str = "png",
+        compression_level: Optional[int] = None,
+        chunk_size: int = 1024 * 1024,
+    ) -> Iterator[bytes]:
+        """
+        Yield the encoded image in chunks while an encoder thread writes it.
+
+        Closing the generator early (the client disconnected) stops the
+        encoder at its next write.
+        """
+        chunks: "queue.Queue" = queue.Queue(maxsize=ImageEncoder.STREAM_QUEUE_CHUNKS)
+        cancelled = threading.Event()
+
+        def produce() -> None:
+            writer = _ChunkQueueWriter(chunks, chunk_size, cancelled)
+            try:
+                ImageEncoder.write(image, writer, output_format, compression_level)
+            except _StreamCancelled:
+                return
+            except BaseException as e:
+                writer.finish(e)
+                return
+            writer.finish()
+
+        try:
+            # Started on the first next(), so a response that is never sent leaves no thread behind
+            threading.Thread(target=produce, daemon=True).start()
+            while True:
+                chunk = chunks.get()
+                if isinstance(chunk, tuple):
+                    _, error = chunk
+                    if error is not None:
+                        raise error
+                    return
+                yield chunk
+        finally:
+            cancelled.set()
+
+    @staticmethod
+    def to_bilevel(image: Image.Image) -> Image.Image:
+        """Threshold at 128 into a mode "1" image, without dithering."""
+        if image.mode != "L":
+            image = image.convert("L")
+        return image.point(lambda value: 255 if value >= 128 else 0, mode="1")
+
+    @staticmethod
+    def to_palette(image: Image.Image) -> Image.Image:
+        """
+        Palette image with one entry per gray level present.
+
+        Pillow picks the PNG bit depth from the palette size, so the fewer
+        the levels, the fewer bits per pixel.
+        """
+        if image.mode != "L":
+            return image.convert("P", palette=Image.Palette.ADAPTIVE)
+
+        array = np.asarray(image)
+        # A histogram finds the levels in one pass, without sorting the pixels
+        levels = np.flatnonzero(np.bincount(array.ravel(), minlength=256))
+        lookup = np.zeros(256, dtype=np.uint8)
+        lookup[levels] = np.arange(levels.size, dtype=np.uint8)
+
+        # putpalette turns the "L" index image into a "P" image
+        palette_image = Image.fromarray(lookup[array])
+        palette_image.putpalette(np.repeat(levels, 3).astype(np.uint8).tobytes())
+        return palette_image
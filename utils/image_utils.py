@@ -1,6 +1,17 @@
-from PIL import Image
+from PIL import Image, UnidentifiedImageError
+from typing import BinaryIO, List, Optional, Tuple, Union
 import numpy as np
 from io import BytesIO
+import math
+from utils.convolution import ConvolutionEngine
+from utils.connected_components import ConnectedComponents
+from utils.tiling import TiledExecutor
+from functools import partial
+
+
+# Anything a service can read an image from: a path, encoded bytes, a binary
+# file object (e.g. an upload's spooled file) or an already decoded array
+ImageSource = Union[str, bytes, BinaryIO, np.ndarray]
 
 
 class ImageUtils:
@@ -8,6 +19,78 @@ class ImageUtils:
     def load_image(path: str) -> Image.Image:
         return Image.open(path)
 
+    @staticmethod
+    def load_array(source: ImageSource, max_side: Optional[int] = None) -> np.ndarray:
+        """Decodes an image source into an array, without going through a temporary file."""
+        return ImageUtils.load_array_with_scale(source, max_side)[0]
+
+    @staticmethod
+    def load_array_with_scale(source: ImageSource, max_side: Optional[int] = None) -> Tuple[np.ndarray, Tuple[float, float]]:
+        """
+        Decodes an image source, shrinking it while decoding so that its longest side fits max_side.
+
+        JPEGs are decoded directly at 1/2, 1/4 or 1/8 scale (draft), so their
+        full-resolution pixels are never materialized; then any image is
+        reduced by an integer factor with box averaging (reduce). Other
+        formats are decoded in full before reduce. Arrays are returned as is.
+
+        Returns:
+            Image array and (row_scale, col_scale): original size over decoded size
+
+        Raises:
+            ValueError: If the source is not an image PIL can identify
+        """
+        if max_side is not None and max_side < 1:
+            raise ValueError("max_side must be a positive integer")
+        if isinstance(source, np.ndarray):
+            return source, (1.0, 1.0)
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            source = BytesIO(source)
+
+        try:
+            image = Image.open(source)
+        except UnidentifiedImageError:
+            raise ValueError("Could not decode the uploaded image") from None
+        original_width, original_height = image.size
+        if max_side is not None and max(image.size) > max_side:
+            # The overall factor comes from the original size: a JPEG is drafted at the
+            # largest DCT scale that still lets reduce() reach it, so the draft never
+            # forces a coarser result than reduce() alone would give
+            factor = math.ceil(max(image.size) / max_side)
+            for draft_scale in (8, 4, 2, 1):
+                drafted_side = math.ceil(max(image.size) / draft_scale)
+                if draft_scale <= factor and draft_scale * math.ceil(drafted_side / max_side) == factor:
+                    break
+            if draft_scale > 1:
+                # Only JPEG supports draft; other formats ignore it
+                image.draft(image.mode, (max(1, original_width // draft_scale), max(1, original_height // draft_scale)))
+
+            factor = math.ceil(max(image.size) / max_side)
+            if factor > 1:
+                image = ImageUtils.reducible(image).reduce(factor)
+
+        width, height = image.size
+        return ImageUtils.pil_to_numpy(image), (original_height / height, original_width / width)
+
+    @staticmethod
+    def reducible(image: Image.Image) -> Image.Image:
+        """
+        Convert modes Image.reduce does not support: palette images to RGB
+        (RGBA with transparency), bilevel to L and 16-bit integer to I.
+        """
+        if image.mode == "P":
+            return image.convert("RGBA" if "transparency" in image.info else "RGB")
+        if image.mode == "1":
+            return image.convert("L")
+        if image.mode.startswith("I;16"):
+            return image.convert("I")
+        return image
+
+    @staticmethod
+    def to_original_point(point: List[int], scale: Tuple[float, float]) -> List[int]:
+        """Maps a pixel of a downscaled image to the original pixel at the center of its footprint."""
+        return [int((coordinate + 0.5) * factor) for coordinate, factor in zip(point, scale)]
+
     @staticmethod
     def pil_to_numpy(image: Image.Image) -> np.ndarray:
         return np.array(image)
@@ -20,28 +103,12 @@ class ImageUtils:
     def image_to_bytes(image: Image.Image) -> bytes:
         byte_io = BytesIO()
         image.save(byte_io, format='PNG')
-        byte_io.seek(0)
-        return byte_io.read()
+        return byte_io.getvalue()
     
     @staticmethod
-    def convolve2d(image: np.ndarray, kernel: np.ndarray) -> np.ndarray:
-        image_height, image_width = image.shape
-        kernel_height, kernel_width = kernel.shape
-        pad_height = kernel_height // 2
-        pad_width = kernel_width // 2
-
-        # Pad the image to handle borders
-        padded_image = np.pad(image, ((pad_height, pad_height), (pad_width, pad_width)), mode='edge')
-        convolved_image = np.zeros_like(image)
-
-        # Perform convolution
-        for i in range(image_height):
-            for j in range(image_width):
-                region = padded_image[i:i + kernel_height, j:j + kernel_width]
-                convolved_value = np.sum(region * kernel)
-                convolved_image[i, j] = convolved_value
-
-        return convolved_image
+    def convolve2d(image: np.ndarray, kernel: np.ndarray, method: str = "auto") -> np.ndarray:
+        """Convolves a 2D image with edge-replicated borders, keeping the input dtype."""
+        return ConvolutionEngine.convolve2d(image, kernel, method)
     
     @staticmethod
     def generate_gaussian_kernel(size: int, sigma: float) -> np.ndarray:
@@ -82,43 +149,151 @@ class ImageUtils:
         return gradient_magnitude, gradient_direction
     
     @staticmethod
-    def non_maximum_suppression(gradient_magnitude: np.ndarray, gradient_direction: np.ndarray) -> np.ndarray:
-        """Applies non-maximum suppression to thin edges."""
+    def non_maximum_suppression(
+        gradient_magnitude: np.ndarray,
+        gradient_direction: np.ndarray,
+        interpolate: bool = False
+    ) -> np.ndarray:
+        """
+        Applies non-maximum suppression to thin edges.
+
+        Args:
+            gradient_magnitude: Gradient magnitude (e.g. from sobel_filters)
+            gradient_direction: Gradient direction in radians
+            interpolate: Compare against bilinearly interpolated magnitudes along
+                the exact gradient direction instead of the nearest of four sectors
+
+        Returns:
+            Magnitude at local maxima, 0 elsewhere (border pixels are always 0)
+        """
         image_height, image_width = gradient_magnitude.shape
         suppressed_image = np.zeros((image_height, image_width), dtype=np.float32)
+        if image_height < 3 or image_width < 3:
+            return suppressed_image
 
-        angle = gradient_direction * (180.0 / np.pi)
-        angle[angle < 0] += 180
+        center = gradient_magnitude[1:-1, 1:-1]
 
-        for i in range(1, image_height - 1):
-            for j in range(1, image_width - 1):
-                q = 255
-                r = 255
+        if interpolate:
+            q, r = ImageUtils._interpolated_neighbors(gradient_magnitude, gradient_direction[1:-1, 1:-1])
+        else:
+            angle = gradient_direction[1:-1, 1:-1] * (180.0 / np.pi)
+            angle[angle < 0] += 180
 
+            # Quantize the direction once into four sectors
+            sectors = [
                 # Angle 0 - East-West gradient -> Vertical edge
-                if (0 <= angle[i, j] < 22.5) or (157.5 <= angle[i, j] <= 180):
-                    q = gradient_magnitude[i, j + 1]
-                    r = gradient_magnitude[i, j - 1]
+                ((0 <= angle) & (angle < 22.5)) | ((157.5 <= angle) & (angle <= 180)),
                 # Angle 45 - Northeast-Southwest gradient -> Diagonal edge
-                elif (22.5 <= angle[i, j] < 67.5):
-                    q = gradient_magnitude[i + 1, j - 1]
-                    r = gradient_magnitude[i - 1, j + 1]
+                (22.5 <= angle) & (angle < 67.5),
                 # Angle 90 - North-South gradient -> Horizontal edge
-                elif (67.5 <= angle[i, j] < 112.5):
-                    q = gradient_magnitude[i + 1, j]
-                    r = gradient_magnitude[i - 1, j]
+                (67.5 <= angle) & (angle < 112.5),
                 # Angle 135 - Northwest-Southeast gradient -> Diagonal edge
-                elif (112.5 <= angle[i, j] < 157.5):
-                    q = gradient_magnitude[i - 1, j - 1]
-                    r = gradient_magnitude[i + 1, j + 1]
+                (112.5 <= angle) & (angle < 157.5),
+            ]
+
+            # Neighbor magnitudes as shifted views of the interior
+            east, west = gradient_magnitude[1:-1, 2:], gradient_magnitude[1:-1, :-2]
+            south, north = gradient_magnitude[2:, 1:-1], gradient_magnitude[:-2, 1:-1]
+            south_west, north_east = gradient_magnitude[2:, :-2], gradient_magnitude[:-2, 2:]
+            north_west, south_east = gradient_magnitude[:-2, :-2], gradient_magnitude[2:, 2:]
+
+            q = np.select(sectors, [east, south_west, south, north_west], default=255)
+            r = np.select(sectors, [west, north_east, north, south_east], default=255)
 
-                # Local maximum check
-                if (gradient_magnitude[i, j] >= q) and (gradient_magnitude[i, j] >= r):
-                    suppressed_image[i, j] = gradient_magnitude[i, j]
-                else:
-                    suppressed_image[i, j] = 0
+        # Local maximum check
+        local_maximum = (center >= q) & (center >= r)
+        suppressed_image[1:-1, 1:-1] = np.where(local_maximum, center, 0)
 
         return suppressed_image
+
+    @staticmethod
+    def _interpolated_neighbors(
+        gradient_magnitude: np.ndarray,
+        interior_direction: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Samples the magnitude one pixel ahead of and behind each interior pixel along its gradient."""
+        image_height, image_width = gradient_magnitude.shape
+        rows, cols = np.mgrid[1:image_height - 1, 1:image_width - 1]
+
+        # Image rows grow downwards while the Sobel y kernel points up
+        step_row = -np.sin(interior_direction)
+        step_col = np.cos(interior_direction)
+
+        ahead = ImageUtils._bilinear_sample(gradient_magnitude, rows + step_row, cols + step_col)
+        behind = ImageUtils._bilinear_sample(gradient_magnitude, rows - step_row, cols - step_col)
+        return ahead, behind
+
+    @staticmethod
+    def _bilinear_sample(array: np.ndarray, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+        """Bilinearly interpolates array at fractional (rows, cols) positions inside the image."""
+        image_height, image_width = array.shape
+        row0 = np.clip(np.floor(rows).astype(np.intp), 0, image_height - 2)
+        col0 = np.clip(np.floor(cols).astype(np.intp), 0, image_width - 2)
+        row_fraction = rows - row0
+        col_fraction = cols - col0
+
+        flat = array.ravel()
+        top_left = row0 * image_width + col0
+        top = flat[top_left] * (1 - col_fraction) + flat[top_left + 1] * col_fraction
+        bottom = flat[top_left + image_width] * (1 - col_fraction) + flat[top_left + image_width + 1] * col_fraction
+        return top * (1 - row_fraction) + bottom * row_fraction
+    
+    @staticmethod
+    def zero_crossings(laplacian: np.ndarray, threshold: float, mode: str = "window") -> np.ndarray:
+        """
+        Detects zero-crossings of a Laplacian response.
+
+        Args:
+            laplacian: Filtered image (e.g. LoG response)
+            threshold: Minimum difference between the positive and negative side
+            mode: "window" compares the min and max of each 3x3 neighborhood,
+                "opposing" only compares the four pairs of opposing neighbors
+
+        Returns:
+            Binary edge map (0 or 255, uint8); border pixels are always 0
+        """
+        if mode not in ("window", "opposing"):
+            raise ValueError(f"Invalid zero-crossing mode: {mode}. Choose 'window' or 'opposing'")
+
+        # Each pixel only looks at its 3x3 neighborhood: a one-row halo per band is enough
+        return TiledExecutor.map_rows(
+            partial(ImageUtils._zero_crossings_band, threshold=threshold, mode=mode), laplacian, halo=1
+        )
+
+    @staticmethod
+    def _zero_crossings_band(laplacian: np.ndarray, threshold: float, mode: str) -> np.ndarray:
+        """Untiled zero_crossings."""
+        image_height, image_width = laplacian.shape
+        zero_crossing_image = np.zeros((image_height, image_width), dtype=np.uint8)
+        if image_height < 3 or image_width < 3:
+            return zero_crossing_image
+
+        if mode == "window":
+            min_val, max_val = ImageUtils._min_max_filter3(laplacian)
+            crossing = (min_val < 0) & (max_val > 0) & ((max_val - min_val) > threshold)
+        else:
+            # (north, south), (west, east), (north-east, south-west), (north-west, south-east)
+            pairs = [
+                (laplacian[:-2, 1:-1], laplacian[2:, 1:-1]),
+                (laplacian[1:-1, :-2], laplacian[1:-1, 2:]),
+                (laplacian[:-2, 2:], laplacian[2:, :-2]),
+                (laplacian[:-2, :-2], laplacian[2:, 2:]),
+            ]
+            crossing = np.zeros((image_height - 2, image_width - 2), dtype=bool)
+            for first, second in pairs:
+                crossing |= (np.sign(first) * np.sign(second) < 0) & (np.abs(first - second) > threshold)
+
+        zero_crossing_image[1:-1, 1:-1][crossing] = 255
+        return zero_crossing_image
+
+    @staticmethod
+    def _min_max_filter3(array: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Returns the 3x3 minimum and maximum of every interior pixel, as separable running passes."""
+        column_min = np.minimum(np.minimum(array[:-2], array[1:-1]), array[2:])
+        column_max = np.maximum(np.maximum(array[:-2], array[1:-1]), array[2:])
+        window_min = np.minimum(np.minimum(column_min[:, :-2], column_min[:, 1:-1]), column_min[:, 2:])
+        window_max = np.maximum(np.maximum(column_max[:, :-2], column_max[:, 1:-1]), column_max[:, 2:])
+        return window_min, window_max
     
     @staticmethod
     def convert_to_grayscale(image: Image.Image) -> Image.Image:
@@ -129,46 +304,32 @@ class ImageUtils:
         image.save(path)
 
     @staticmethod
-    def label_connected_components(binary_image: np.ndarray) -> np.ndarray:
+    def label_connected_components(binary_image: np.ndarray, connectivity: int = 4) -> np.ndarray:
         """
-        Label connected components in a binary image using flood-fill.
+        Label connected components in a binary image using two-pass union-find.
         
         Args:
             binary_image: Binary image (0 or 1, uint8)
+            connectivity: 4 or 8
         
         Returns:
             Labeled image where each connected component has a unique label
         """
-        rows, cols = binary_image.shape
-        labels = np.zeros((rows, cols), dtype=np.int32)
-        current_label = 1
-        
-        def flood_fill(start_i, start_j, label):
-            """Flood fill using iterative approach with stack."""
-            stack = [(start_i, start_j)]
-            
-            while stack:
-                i, j = stack.pop()
-                
-                # Check bounds and if pixel should be labeled
-                if (0 <= i < rows and 0 <= j < cols and 
-                    binary_image[i, j] == 1 and labels[i, j] == 0):
-                    
-                    labels[i, j] = label
-                    
-                    # Add 4-connected neighbors to stack
-                    stack.append((i - 1, j))  # Top
-                    stack.append((i + 1, j))  # Bottom
-                    stack.append((i, j - 1))  # Left
-                    stack.append((i, j + 1))  # Right
-        
-        # Scan image and label each connected component
-        for i in range(rows):
-            for j in range(cols):
-                if binary_image[i, j] == 1 and labels[i, j] == 0:
-                    # Found new connected component
-                    flood_fill(i, j, current_label)
-                    current_label += 1
-        
-        return labels
- 
+        return ConnectedComponents.label(binary_image, connectivity)
+
+    @staticmethod
+    def label_connected_components_with_stats(
+        binary_image: np.ndarray,
+        connectivity: int = 4
+    ) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+        """Labels connected components and returns per-component area, bbox and centroid."""
+        return ConnectedComponents.label_with_stats(binary_image, connectivity)
+
+    @staticmethod
+    def connected_component_stats_tiled(
+        binary_image: np.ndarray,
+        connectivity: int = 4,
+        tile_size: int = 4096,
+    ) -> dict[str, np.ndarray]:
+        """Per-component area, bbox and centroid from tiles labeled in parallel, without a label image."""
+        return ConnectedComponents.tiled_statistics(binary_image, connectivity, tile_size)
@@ -0,0 +1,274 @@
+from collections import OrderedDict
+from fastapi.responses import Response
+from typing import Any, Dict, NamedTuple, Optional
+from utils.image_utils import ImageSource
+import numpy as np
+import hashlib
+import json
+import os
+import threading
+import time
+
+
+class CachedResponse(NamedTuple):
+    """A finished response body with its media type and extra headers."""
+    content: bytes
+    media_type: str
+    headers: Optional[Dict[str, str]] = None
+
+    def to_response(self) -> Response:
+        return Response(content=self.content, media_type=self.media_type, headers=dict(self.headers or {}))
+
+
+class ResultCache:
+    """
+    Content-addressed cache of processed responses.
+
+    Keys hash the input image bytes together with the algorithm name and
+    its normalized parameters, so the same upload with the same parameters
+    is served without recomputing. Entries live in a byte-bounded in-memory
+    LRU and, when a directory is configured, in an on-disk tier with its
+    own byte limit and a TTL. Disk hits are promoted back to memory.
+
+    Disk entries are one file per key: a JSON header line (media type and
+    headers) followed by the raw body. The size of the disk tier is kept as
+    a running total; the directory is only scanned again when that total
+    goes over the limit or the TTL is due, which also picks up entries
+    written by other processes sharing the directory.
+
+    Every method may hash files or touch the disk, so async callers run
+    them through asyncio.to_thread.
+    """
+
+    # Uploads are hashed in blocks of this size
+    HASH_BLOCK_BYTES = 1024 * 1024
+
+    _memory: "OrderedDict[str, CachedResponse]" = OrderedDict()
+    _memory_bytes: int = 0
+    _configured: bool = False
+    _memory_limit: int = 0
+    _disk_dir: str = ""
+    _disk_limit: int = 0
+    _ttl: int = 0
+    _disk_bytes: int = 0
+    _disk_swept_at: float = 0.0
+    _stats: Dict[str, int] = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+    _lock = threading.Lock()
+
+    @classmethod
+    def configure(cls, memory_bytes: int = 0, disk_dir: str = "", disk_bytes: int = 0, ttl: int = 0) -> None:
+        """
+        Set the cache limits and drop the in-memory entries.
+
+        Args:
+            memory_bytes: Byte limit of the memory tier (0 disables it)
+            disk_dir: Directory of the disk tier ("" disables it)
+            disk_bytes: Byte limit of the disk tier
+            ttl: Lifetime of disk entries in seconds (0 keeps them until evicted)
+        """
+        with cls._lock:
+            cls._memory.clear()
+            cls._memory_bytes = 0
+            cls._memory_limit = memory_bytes
+            cls._disk_dir = disk_dir
+            cls._disk_limit = disk_bytes
+            cls._ttl = ttl
+            cls._disk_bytes = 0
+            cls._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+            cls._configured = True
+
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            cls._disk_evict()
+
+    @classmethod
+    def _ensure_configured(cls) -> None:
+        if not cls._configured:
+            from config import Settings
+            cls.configure(Settings.RESULT_CACHE_MEMORY_BYTES, Settings.RESULT_CACHE_DIR,
+                          Settings.RESULT_CACHE_DISK_BYTES, Settings.RESULT_CACHE_TTL)
+
+    @staticmethod
+    def make_key(image_source: ImageSource, algorithm: str, **params: Any) -> str:
+        """
+        Hash an image source with the algorithm name and its parameters.
+
+        File objects are read and rewound to where they were, so the same
+        source can still be handed to the service afterwards.
+        """
+        digest = hashlib.sha256()
+        digest.update(json.dumps([algorithm, params], sort_keys=True, default=str).encode())
+
+        if isinstance(image_source, np.ndarray):
+            digest.update(f"{image_source.dtype}{image_source.shape}".encode())
+            digest.update(np.ascontiguousarray(image_source).tobytes())
+        elif isinstance(image_source, (bytes, bytearray, memoryview)):
+            digest.update(image_source)
+        elif isinstance(image_source, str):
+            with open(image_source, "rb") as image_file:
+                ResultCache._hash_file(digest, image_file)
+        else:
+            position = image_source.tell()
+            ResultCache._hash_file(digest, image_source)
+            image_source.seek(position)
+
+        return digest.hexdigest()
+
+    @staticmethod
+    def _hash_file(digest, file_object) -> None:
+        """Hash a file in blocks, so large uploads are never held in memory whole."""
+        for block in iter(lambda: file_object.read(ResultCache.HASH_BLOCK_BYTES), b""):
+            digest.update(block)
+
+    @classmethod
+    def get(cls, key: str) -> Optional[CachedResponse]:
+        """Look a key up in memory, then on disk; None on a miss."""
+        cls._ensure_configured()
+        with cls._lock:
+            entry = cls._memory.get(key)
+            if entry is not None:
+                cls._memory.move_to_end(key)
+                cls._stats["memory_hits"] += 1
+                return entry
+
+        entry = cls._disk_get(key)
+        with cls._lock:
+            cls._stats["disk_hits" if entry is not None else "misses"] += 1
+        if entry is not None:
+            cls._memory_put(key, entry)
+        return entry
+
+    @classmethod
+    def put(cls, key: str, content: bytes, media_type: str, headers: Optional[Dict[str, str]] = None) -> CachedResponse:
+        """Store a response body in both tiers and return it as a CachedResponse."""
+        cls._ensure_configured()
+        entry = CachedResponse(content, media_type, headers or {})
+        cls._memory_put(key, entry)
+        cls._disk_put(key, entry)
+        return entry
+
+    @classmethod
+    def stats(cls) -> Dict[str, int]:
+        """Hit/miss counters and current tier sizes."""
+        cls._ensure_configured()
+        with cls._lock:
+            return {
+                **cls._stats,
+                "memory_entries": len(cls._memory),
+                "memory_bytes": cls._memory_bytes,
+                "disk_bytes": cls._disk_bytes,
+            }
+
+    @classmethod
+    def _memory_put(cls, key: str, entry: CachedResponse) -> None:
+        size = len(entry.content)
+        if size > cls._memory_limit:
+            return
+
+        with cls._lock:
+            previous = cls._memory.pop(key, None)
+            if previous is not None:
+                cls._memory_bytes -= len(previous.content)
+
+            cls._memory[key] = entry
+            cls._memory_bytes += size
+            while cls._memory_bytes > cls._memory_limit:
+                _, evicted = cls._memory.popitem(last=False)
+                cls._memory_bytes -= len(evicted.content)
+
+    @classmethod
+    def _disk_path(cls, key: str) -> str:
+        return os.path.join(cls._disk_dir, key + ".bin")
+
+    @classmethod
+    def _disk_get(cls, key: str) -> Optional[CachedResponse]:
+        if not cls._disk_dir:
+            return None
+
+        path = cls._disk_path(key)
+        try:
+            status = os.stat(path)
+            if cls._ttl and time.time() - status.st_mtime > cls._ttl:
+                os.remove(path)
+                cls._disk_add(-status.st_size)
+                return None
+            with open(path, "rb") as cache_file:
+                header = json.loads(cache_file.readline())
+                content = cache_file.read()
+            # Refresh the timestamp so eviction stays least recently used
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+
+        return CachedResponse(content, header["media_type"], header["headers"])
+
+    @classmethod
+    def _disk_put(cls, key: str, entry: CachedResponse) -> None:
+        if not cls._disk_dir or len(entry.content) > cls._disk_limit:
+            return
+
+        path = cls._disk_path(key)
+        temporary_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temporary_path, "wb") as cache_file:
+                cache_file.write(json.dumps({"media_type": entry.media_type, "headers": entry.headers or {}}).encode() + b"\n")
+                cache_file.write(entry.content)
+                size = cache_file.tell()
+            try:
+                replaced = os.stat(path).st_size
+            except OSError:
+                replaced = 0
+            # Atomic, so concurrent workers never read a partial entry
+            os.replace(temporary_path, path)
+        except OSError:
+            return
+
+        cls._disk_add(size - replaced)
+        if cls._disk_bytes > cls._disk_limit or (cls._ttl and time.time() - cls._disk_swept_at > cls._ttl):
+            cls._disk_evict()
+
+    @classmethod
+    def _disk_add(cls, size: int) -> None:
+        with cls._lock:
+            cls._disk_bytes += size
+
+    @classmethod
+    def _disk_files(cls):
+        """(path, size, mtime) of every disk entry."""
+        if not cls._disk_dir:
+            return []
+
+        files = []
+        for name in os.listdir(cls._disk_dir):
+            if not name.endswith(".bin"):
+                continue
+            path = os.path.join(cls._disk_dir, name)
+            try:
+                status = os.stat(path)
+            except OSError:
+                continue
+            files.append((path, status.st_size, status.st_mtime))
+        return files
+
+    @classmethod
+    def _disk_evict(cls) -> None:
+        """
+        Drop expired entries, then the least recently used until under the
+        byte limit, and reset the running total from the scan.
+        """
+        files = cls._disk_files()
+        now = time.time()
+        total_bytes = sum(size for _, size, _ in files)
+
+        for path, size, mtime in sorted(files, key=lambda entry: entry[2]):
+            if total_bytes <= cls._disk_limit and not (cls._ttl and now - mtime > cls._ttl):
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total_bytes -= size
+
+        with cls._lock:
+            cls._disk_bytes = total_bytes
+            cls._disk_swept_at = now
@@ -0,0 +1,185 @@
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from fastapi.exceptions import HTTPException
+from typing import Any, Callable, Iterable, Iterator, Optional, Tuple
+import asyncio
+import threading
+
+
+class ServiceExecutor:
+    """
+    Runs CPU-bound service calls off the event loop with bounded admission.
+
+    Calls go to a thread or process pool (see Settings.EXECUTOR_KIND). At most
+    workers + queue_size calls are admitted at once; beyond that the request
+    is rejected right away with 503 and a Retry-After header instead of
+    piling up, so cheap endpoints such as /health keep answering while the
+    pool is saturated.
+
+    Streamed responses keep working after run() returns (tracing contours,
+    encoding chunks); hold() wraps their iterator so it counts as an
+    admitted call until it is exhausted or closed.
+    """
+
+    KINDS = ("thread", "process")
+
+    _pool: Optional[Executor] = None
+    _kind: str = "thread"
+    _workers: int = 1
+    _queue_size: int = 0
+    _retry_after: int = 1
+    _in_flight: int = 0
+    _lock = threading.Lock()
+
+    @classmethod
+    def configure(cls, kind: str = "thread", workers: int = 1, queue_size: int = 0, retry_after: int = 1) -> None:
+        """
+        Create the pool, replacing (and shutting down) any previous one.
+
+        Args:
+            kind: "thread" or "process"
+            workers: Number of pool workers
+            queue_size: Calls allowed to wait for a free worker
+            retry_after: Seconds suggested to rejected clients
+        """
+        if kind not in cls.KINDS:
+            raise ValueError(f"Invalid executor kind: {kind}. Choose one of {cls.KINDS}")
+
+        cls.shutdown()
+        if kind == "process":
+            cls._pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+        else:
+            cls._pool = ThreadPoolExecutor(max_workers=workers)
+        cls._kind = kind
+        cls._workers = workers
+        cls._queue_size = queue_size
+        cls._retry_after = retry_after
+
+    @classmethod
+    def shutdown(cls) -> None:
+        """Shut the pool down, waiting for running calls."""
+        if cls._pool is not None:
+            cls._pool.shutdown(wait=True)
+            cls._pool = None
+
+    @classmethod
+    def in_flight(cls) -> int:
+        """Number of admitted calls that have not finished yet."""
+        return cls._in_flight
+
+    @classmethod
+    async def run(cls, func: Callable, *args: Any) -> Any:
+        """
+        Run func(*args) in the pool and await its result.
+
+        Raises:
+            HTTPException: 503 with Retry-After when the queue is full; any
+                HTTPException raised by func is re-raised as is
+        """
+        if cls._pool is None:
+            from config import Settings
+            cls.configure(Settings.EXECUTOR_KIND, Settings.EXECUTOR_WORKERS,
+                          Settings.EXECUTOR_QUEUE_SIZE, Settings.EXECUTOR_RETRY_AFTER)
+
+        with cls._lock:
+            if cls._in_flight >= cls._workers + cls._queue_size:
+                raise HTTPException(
+                    status_code=503,
+                    detail="Server busy, try again later",
+                    headers={"Retry-After": str(cls._retry_after)}
+                )
+            cls._in_flight += 1
+
+        try:
+            if cls._kind == "process":
+                # Uploads arrive as file objects, which cannot be sent to another process
+                args = tuple([
+                    await asyncio.to_thread(arg.read) if hasattr(arg, "read") else arg for arg in args
+                ])
+            future = cls._pool.submit(_invoke, func, args)
+        except BaseException:
+            # Covers a failed read or a cancelled request as well as a failed submit
+            cls._release()
+            raise
+        # Release the slot when the call really ends, even if the client went away
+        future.add_done_callback(lambda _: cls._release())
+
+        result, error = await asyncio.wrap_future(future)
+        if error is not None:
+            status_code, detail, headers = error
+            raise HTTPException(status_code=status_code, detail=detail, headers=headers)
+        return result
+
+    @classmethod
+    def hold(cls, iterator: Iterable) -> Iterator:
+        """
+        Count a streamed response as an admitted call until it ends.
+
+        The stream continues a call that run() already admitted and finished,
+        so the slot is taken without the limit check: rejecting here would
+        throw that finished work away. It is released once the iterator is
+        exhausted, fails, is closed, or is dropped without being started.
+        """
+        held = _HeldIterator(iterator, cls._release)
+        with cls._lock:
+            cls._in_flight += 1
+        return held
+
+    @classmethod
+    def _release(cls) -> None:
+        with cls._lock:
+            cls._in_flight -= 1
+
+
+class _HeldIterator:
+    """Iterator that calls release exactly once, when it ends or is closed."""
+
+    def __init__(self, iterator: Iterable, release: Callable[[], None]):
+        self._held = False
+        self._iterator = iter(iterator)
+        self._release = release
+        self._held = True
+
+    def __iter__(self) -> "_HeldIterator":
+        return self
+
+    def __next__(self) -> Any:
+        try:
+            return next(self._iterator)
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        if not self._held:
+            return
+        self._held = False
+        try:
+            close = getattr(self._iterator, "close", None)
+            if close is not None:
+                close()
+        finally:
+            self._release()
+
+    # Starlette does not close sync iterators when the client disconnects
+    __del__ = close
+
+
+def _init_worker() -> None:
+    """Process pool initializer: give the worker its own tiling and labeling pools instead of the parent's."""
+    from config import Settings
+    from utils.connected_components import ConnectedComponents
+    from utils.tiling import TiledExecutor
+    TiledExecutor.configure_worker(Settings.TILE_WORKERS, Settings.TILE_MIN_ROWS)
+    # Split the labeling threads between the workers, like TILE_WORKERS
+    ConnectedComponents.configure_worker(max(1, Settings.CCL_WORKERS // max(1, Settings.EXECUTOR_WORKERS)))
+
+
+def _invoke(func: Callable, args: Tuple) -> Tuple[Any, Optional[Tuple]]:
+    """
+    Pool entry point. HTTPException does not survive pickling, so it is
+    returned as (status_code, detail, headers) and raised again by the caller.
+    """
+    try:
+        return func(*args), None
+    except HTTPException as e:
+        return None, (e.status_code, e.detail, e.headers)
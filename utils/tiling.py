@@ -0,0 +1,134 @@
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Optional
+import numpy as np
+
+
+class TiledExecutor:
+    """
+    Runs row-local filters band by band across a thread or process pool.
+
+    The output is split into bands of rows; each band is computed from the
+    matching input rows plus a halo above and below, and the bands are
+    stitched back in order. Band functions only see their slice, so as long
+    as the halo covers the filter's reach the result is bit-identical to
+    processing the whole image at once.
+
+    Band functions are called as func(band, top, rows): band is the input
+    slice (halo included), top is the index in band of the first row the
+    output band depends on, and rows is the number of output rows to return.
+    """
+
+    KINDS = ("thread", "process")
+
+    _pool: Optional[Executor] = None
+    _configured: bool = False
+    _workers: int = 1
+    _min_rows: int = 256
+
+    @classmethod
+    def configure(cls, kind: str = "thread", workers: int = 1, min_rows: int = 256) -> None:
+        """
+        Create the pool, replacing (and shutting down) any previous one.
+
+        Args:
+            kind: "thread" or "process"
+            workers: Number of bands processed in parallel (1 disables tiling)
+            min_rows: Smallest band height; shorter images run in one piece
+        """
+        if kind not in cls.KINDS:
+            raise ValueError(f"Invalid tiling executor kind: {kind}. Choose one of {cls.KINDS}")
+
+        cls.shutdown()
+        if workers > 1:
+            pool_class = ProcessPoolExecutor if kind == "process" else ThreadPoolExecutor
+            cls._pool = pool_class(max_workers=workers)
+        cls._workers = workers
+        cls._min_rows = max(1, min_rows)
+        cls._configured = True
+
+    @classmethod
+    def configure_worker(cls, workers: int = 1, min_rows: int = 256) -> None:
+        """
+        Set up tiling inside a ServiceExecutor worker process.
+
+        A forked worker inherits the parent's pool object, whose threads or
+        processes do not exist on its side, so it is dropped without being
+        shut down. Bands then run on threads: a process pool inside every
+        service process would nest one pool of processes per worker.
+        """
+        cls._pool = None
+        cls.configure("thread", workers, min_rows)
+
+    @classmethod
+    def shutdown(cls) -> None:
+        """Shut the pool down, waiting for running bands."""
+        if cls._pool is not None:
+            cls._pool.shutdown(wait=True)
+            cls._pool = None
+        cls._configured = False
+
+    @classmethod
+    def _ensure_configured(cls) -> None:
+        if not cls._configured:
+            from config import Settings
+            cls.configure(Settings.TILE_EXECUTOR_KIND, Settings.TILE_WORKERS, Settings.TILE_MIN_ROWS)
+
+    @classmethod
+    def map_bands(
+        cls,
+        func: Callable[[np.ndarray, int, int], np.ndarray],
+        array: np.ndarray,
+        output_rows: int,
+        halo_before: int,
+        halo_after: int,
+        row_multiple: int = 1,
+    ) -> np.ndarray:
+        """
+        Compute output rows [0, output_rows) band by band.
+
+        Output rows [start, stop) are computed from
+        array[start - halo_before : stop + halo_after] (clipped to the array).
+
+        Args:
+            func: Band function, func(band, top, rows) -> array with rows rows
+            array: Input, split along axis 0
+            output_rows: Number of output rows
+            halo_before: Input rows needed above the first output row of a band
+            halo_after: Input rows needed below the last output row of a band
+            row_multiple: Bands start at multiples of this, for filters that
+                work in fixed blocks of rows
+
+        Returns:
+            The output bands stacked along axis 0
+        """
+        cls._ensure_configured()
+        band_rows = max(cls._min_rows, -(-output_rows // cls._workers))
+        band_rows = -(-band_rows // row_multiple) * row_multiple
+
+        if cls._pool is None or output_rows <= band_rows:
+            return func(array, 0, output_rows)
+
+        futures = []
+        for start in range(0, output_rows, band_rows):
+            stop = min(start + band_rows, output_rows)
+            input_start = max(0, start - halo_before)
+            input_stop = min(array.shape[0], stop + halo_after)
+            futures.append(cls._pool.submit(func, array[input_start:input_stop], start - input_start, stop - start))
+
+        return np.concatenate([future.result() for future in futures], axis=0)
+
+    @classmethod
+    def map_rows(cls, func: Callable[[np.ndarray], np.ndarray], array: np.ndarray, halo: int, row_multiple: int = 1) -> np.ndarray:
+        """
+        Tile a filter that maps an array to one of the same height.
+
+        func runs on every band with halo rows on both sides, and only the
+        band's own rows are kept, so halo must cover the filter's reach.
+        """
+        return cls.map_bands(partial(_crop_band, func), array, array.shape[0], halo, halo, row_multiple)
+
+
+def _crop_band(func: Callable[[np.ndarray], np.ndarray], band: np.ndarray, top: int, rows: int) -> np.ndarray:
+    """Band function for map_rows: filter the slice, then keep the output band."""
+    return func(band)[top:top + rows]